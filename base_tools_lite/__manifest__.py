@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+{
+    'name': 'Base Tools Lite',
+    'summary': 'Shared background jobs and instrumentation for the Lite modules',
+    'version': '1.0.0',
+    'license': 'LGPL-3',
+    'author': 'Roksana Piwowarczyk',
+    'category': 'Hidden/Tools',
+    'depends': ['base', 'bus'],
+    'data': [
+        'security/ir.model.access.csv',
+        'security/bg_job_rules.xml',
+        'views/bg_job_views.xml',
+        'views/perf_metric_views.xml',
+        'data/cron.xml',
+    ],
+    'installable': True,
+}
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Base Tools Lite HTTP routes."""
+from odoo import http
+from odoo.http import request
+
+from ..tools import replica
+
+
+class BaseToolsController(http.Controller):
+
+    @http.route('/base_tools_lite/perf', type='http', auth='user', methods=['GET'])
+    def perf_metrics(self, hours=24, recent=0, **kw):
+        """Instrumentation metrics as JSON (administrators only).
+
+        ``hours`` limits the aggregated totals to the last hours; ``recent`` adds the
+        latest calls recorded by the worker answering the request.
+        """
+        if not request.env.user.has_group('base.group_system'):
+            return request.make_json_response({'error': 'forbidden'}, status=403)
+        try:
+            hours, recent = int(hours), int(recent)
+        except ValueError:
+            return request.make_json_response({'error': 'hours and recent must be integers'}, status=400)
+        return request.make_json_response(request.env['perf.metric'].sudo().get_metrics(hours, recent))
+
+    @http.route('/base_tools_lite/replica', type='http', auth='user', methods=['GET'])
+    def replica_status(self, **kw):
+        """Read replica configuration, lag and whether reads are routed to it, as JSON (administrators only)."""
+        if not request.env.user.has_group('base.group_system'):
+            return request.make_json_response({'error': 'forbidden'}, status=403)
+        return request.make_json_response(replica.replica_status(request.env.registry))
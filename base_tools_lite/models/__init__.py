@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import bg_job
+from . import perf_metric
@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+"""Background jobs.
+
+Heavy actions and crons of the Lite modules enqueue a ``bg.job`` instead of doing
+the work in the user's request or in one cron transaction. Jobs are executed by
+a few ``ir.cron`` runner slots, so pending jobs spread over the cron workers; each
+job runs as the user who enqueued it, optionally in chunks of records with a
+commit after each chunk, and is retried with exponential backoff when it fails.
+"""
+
+import base64
+import logging
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+import psycopg2
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools.pdf import merge_pdf
+
+_logger = logging.getLogger(__name__)
+
+# Cron slots executing jobs
+RUNNER_CRONS = [f'base_tools_lite.ir_cron_bg_job_runner_{n}' for n in range(1, 5)]
+# Seconds a runner keeps claiming jobs before handing over to a new cron run
+RUNNER_TIME_LIMIT = 300
+# First key of the session-level advisory lock (second key: job id) held by the
+# runner executing a job; a running job whose lock is free was left by a dead worker
+RUNNER_LOCK_KEY = 0x62674a
+# Context keys kept from the enqueuing environment
+CONTEXT_KEYS = ('lang', 'tz', 'allowed_company_ids')
+
+
+class BgJob(models.Model):
+    """Unit of background work: a method called on records, optionally chunk by chunk."""
+    _name = 'bg.job'
+    _description = 'Background Job'
+    _order = 'id desc'
+
+    name = fields.Char(required=True, readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+        ('cancelled', 'Cancelled'),
+    ], default='pending', required=True, readonly=True, index=True)
+    user_id = fields.Many2one('res.users', string='User', required=True, readonly=True, index=True,
+                              default=lambda self: self.env.user)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, default=lambda self: self.env.company)
+
+    # What to run
+    res_model = fields.Char(string='Model', required=True, readonly=True)
+    res_ids = fields.Json(string='Record IDs', readonly=True, default=list)
+    method = fields.Char(required=True, readonly=True)
+    kwargs = fields.Json(string='Arguments', readonly=True, default=dict)
+    context = fields.Json(readonly=True, default=dict)
+    chunk_size = fields.Integer(readonly=True, help='Records per call and commit; 0 calls the method once on all records.')
+    identity_key = fields.Char(readonly=True,
+                               help='Enqueuing a job with the key of an unfinished job returns that job.')
+    failure_method = fields.Char(readonly=True, help='Method called on the records when the job gives up.')
+
+    # Scheduling
+    priority = fields.Integer(default=10, readonly=True, help='Lower runs first.')
+    date_scheduled = fields.Datetime(string='Scheduled', default=fields.Datetime.now, required=True, readonly=True, index=True)
+    date_started = fields.Datetime(string='Started', readonly=True)
+    date_done = fields.Datetime(string='Finished', readonly=True)
+    heartbeat = fields.Datetime(readonly=True)
+    attempt = fields.Integer(readonly=True)
+    max_attempts = fields.Integer(default=3, readonly=True)
+    retry_delay = fields.Integer(string='Retry Delay (s)', default=60, readonly=True,
+                                 help='Delay before the first retry, doubled for each further attempt.')
+    cancel_requested = fields.Boolean(readonly=True)
+    error = fields.Text(readonly=True)
+
+    # Progress
+    offset = fields.Integer(readonly=True, help='Records already processed by a chunked job.')
+    progress_done = fields.Integer(readonly=True)
+    progress_total = fields.Integer(readonly=True)
+    progress = fields.Float(compute='_compute_progress')
+
+    # Result
+    result_type = fields.Selection([('text', 'Text'), ('pdf', 'PDF')], default='text', readonly=True,
+                                   help='How the outputs of the calls are joined into the result file.')
+    result_name = fields.Char(string='Result File Name', readonly=True)
+    result_mimetype = fields.Char(readonly=True)
+    result_attachment_id = fields.Many2one('ir.attachment', string='Result', readonly=True)
+    result_file = fields.Binary(related='result_attachment_id.datas', string='Result File')
+
+    def init(self):
+        # At most one unfinished job per identity key, also for concurrent enqueues
+        self.env.cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS bg_job_identity_key_unfinished_uniq
+                ON bg_job (identity_key) WHERE state IN ('pending', 'running')
+        """)
+
+    @api.depends('progress_done', 'progress_total', 'state')
+    def _compute_progress(self):
+        for job in self:
+            if job.state == 'done':
+                job.progress = 100.0
+            else:
+                job.progress = 100.0 * job.progress_done / job.progress_total if job.progress_total else 0.0
+
+    # ---------------------------------------------------------------------
+    # Enqueueing
+    # ---------------------------------------------------------------------
+    @api.model
+    def _enqueue(self, records, method, name=None, kwargs=None, chunk_size=0, identity_key=None,
+                 priority=10, max_attempts=3, result_name=None, result_type='text', result_mimetype=None,
+                 failure_method=None):
+        """Queue ``records.<method>(**kwargs)`` for the runners and return the job.
+
+        Args:
+            records: recordset the method is called on; an empty recordset for
+                model-level methods.
+            method: name of the method. Anything it returns other than None or a
+                boolean is stored as output and joined into the result file.
+            chunk_size: when set, the method is called on chunks of that many
+                records with a commit after each chunk. The offset of the chunk is
+                in the ``bg_job_offset`` context key.
+            identity_key: when an unfinished job has this key, it is returned
+                instead of queueing a duplicate. When such a job was enqueued by a
+                concurrent transaction, not visible to this one, nothing is queued
+                and an empty recordset is returned.
+            failure_method: method called on the records (with the error message)
+                when the last attempt failed.
+            result_name, result_type, result_mimetype: file name and join mode
+                (``'text'``: concatenation, ``'pdf'``: merged documents) of the result.
+        """
+        if identity_key:
+            existing = self.sudo().search([('identity_key', '=', identity_key),
+                                           ('state', 'in', ('pending', 'running'))], limit=1)
+            if existing:
+                return existing.with_env(self.env)
+        vals = {
+            'name': name or f'{records._name}.{method}',
+            'user_id': self.env.uid,
+            'company_id': self.env.company.id,
+            'res_model': records._name,
+            'res_ids': records.ids,
+            'method': method,
+            'kwargs': kwargs or {},
+            'context': {key: self.env.context[key] for key in CONTEXT_KEYS if key in self.env.context},
+            'chunk_size': chunk_size,
+            'identity_key': identity_key,
+            'priority': priority,
+            'max_attempts': max_attempts,
+            'progress_total': len(records) if chunk_size else 0,
+            'result_name': result_name,
+            'result_type': result_type,
+            'result_mimetype': result_mimetype,
+            'failure_method': failure_method,
+        }
+        try:
+            with self.env.cr.savepoint():
+                job = self.sudo().create(vals)
+        except psycopg2.errors.UniqueViolation:
+            if not identity_key:
+                raise
+            # Enqueued by a concurrent transaction; its job runs for both callers
+            return self.browse()
+        self._trigger_runners()
+        return job.with_env(self.env)
+
+    @api.model
+    def _trigger_runners(self, at=None):
+        crons = self.env['ir.cron']
+        for xmlid in RUNNER_CRONS:
+            crons |= self.env.ref(xmlid, raise_if_not_found=False) or self.env['ir.cron']
+        for cron in crons.sudo():
+            cron._trigger(at)
+
+    def _action_open(self):
+        """Window action showing the job in a dialog (progress, cancel, result)."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': self.name,
+            'res_model': 'bg.job',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    # ---------------------------------------------------------------------
+    # Used by running methods
+    # ---------------------------------------------------------------------
+    @api.model
+    def _current(self):
+        """Job executing the current call, or an empty recordset outside jobs."""
+        return self.sudo().browse(self.env.context.get('bg_job_id'))
+
+    @api.model
+    def _report_progress(self, done, total, commit=True):
+        """Record progress of the current job and commit the work done so far.
+
+        Long single-call methods call this between their own batches. Outside a job
+        it does nothing.
+
+        Returns:
+            bool: False when the job was asked to stop, True otherwise.
+        """
+        job = self._current()
+        if not job:
+            return True
+        job.write({'progress_done': done, 'progress_total': total, 'heartbeat': fields.Datetime.now()})
+        if commit and not getattr(threading.current_thread(), 'testing', False):
+            self.env.cr.commit()
+        return not job._cancel_requested()
+
+    def _cancel_requested(self):
+        self.invalidate_recordset(['cancel_requested'])
+        return self.cancel_requested
+
+    # ---------------------------------------------------------------------
+    # User actions
+    # ---------------------------------------------------------------------
+    def _check_owner(self):
+        # Users may act on the jobs they can read (their own ones)
+        self.check_access('read')
+
+    def action_cancel(self):
+        """Cancel pending jobs; running ones stop before their next chunk."""
+        self._check_owner()
+        for job in self.sudo():
+            if job.state == 'pending':
+                job.write({'state': 'cancelled', 'date_done': fields.Datetime.now()})
+            elif job.state == 'running':
+                job.cancel_requested = True
+        return True
+
+    def action_retry(self):
+        """Queue failed or cancelled jobs again, resuming chunked jobs where they stopped."""
+        self._check_owner()
+        jobs = self.sudo().filtered(lambda j: j.state in ('failed', 'cancelled'))
+        keys = [key for key in jobs.mapped('identity_key') if key]
+        if keys and self.sudo().search_count([('identity_key', 'in', keys), ('state', 'in', ('pending', 'running'))]):
+            raise UserError(_('Another job with the same key is already queued or running.'))
+        jobs.write({
+            'state': 'pending',
+            'attempt': 0,
+            'cancel_requested': False,
+            'error': False,
+            'date_done': False,
+            'date_scheduled': fields.Datetime.now(),
+        })
+        if jobs:
+            self._trigger_runners()
+        return True
+
+    def action_refresh(self):
+        self.ensure_one()
+        return self._action_open()
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.result_attachment_id:
+            raise UserError(_('This job has no result file.'))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.result_attachment_id.id,
+            'target': 'self',
+        }
+
+    # ---------------------------------------------------------------------
+    # Runner
+    # ---------------------------------------------------------------------
+    @api.model
+    def _cron_run_jobs(self):
+        """Runner slot: claim and run due jobs one by one for a limited time."""
+        testing = getattr(threading.current_thread(), 'testing', False)
+        self._requeue_stale()
+        started = time.monotonic()
+        while time.monotonic() - started < RUNNER_TIME_LIMIT:
+            job = self._claim()
+            if not job:
+                return True
+            try:
+                if not testing:
+                    self.env.cr.commit()
+                job._run()
+                if not testing:
+                    self.env.cr.commit()
+            finally:
+                job._unlock()
+        # Time is up: let a fresh cron run continue with the remaining jobs
+        self._trigger_runners()
+        return True
+
+    @api.model
+    def _claim(self):
+        """Mark the next due job as running; jobs claimed by other runners are skipped.
+
+        The runner lock of the job is taken before the claim is committed, so other
+        runners never see the job running without its lock.
+        """
+        self.flush_model()
+        self.env.cr.execute("""
+            UPDATE bg_job
+               SET state = 'running',
+                   attempt = attempt + 1,
+                   date_started = now() at time zone 'UTC',
+                   heartbeat = now() at time zone 'UTC'
+             WHERE id = (
+                    SELECT id FROM bg_job
+                     WHERE state = 'pending'
+                       AND date_scheduled <= now() at time zone 'UTC'
+                  ORDER BY priority, date_scheduled, id
+                     LIMIT 1
+                       FOR UPDATE SKIP LOCKED)
+         RETURNING id
+        """)
+        row = self.env.cr.fetchone()
+        self.invalidate_model()
+        if not row:
+            return self.browse()
+        self.env.cr.execute("SELECT pg_advisory_lock(%s, %s)", [RUNNER_LOCK_KEY, row[0]])
+        return self.sudo().browse(row[0])
+
+    def _unlock(self):
+        """Release the runner lock of the job (session-level, so commits do not release it)."""
+        self.ensure_one()
+        try:
+            self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [RUNNER_LOCK_KEY, self.id])
+        except psycopg2.Error:
+            # Aborted transaction; rolling it back keeps session locks
+            self.env.cr.rollback()
+            self.env.cr.execute("SELECT pg_advisory_unlock(%s, %s)", [RUNNER_LOCK_KEY, self.id])
+
+    @api.model
+    def _requeue_stale(self):
+        """Give jobs whose worker died another attempt (or fail them).
+
+        A running job is stale when its runner lock is free: the lock is held by the
+        connection of the runner for the whole run, however long the job goes without
+        reporting progress, and released by PostgreSQL when that worker dies.
+        """
+        running = self.sudo().search([('state', '=', 'running')])
+        for job in running:
+            # Transaction-level probe: released at the end of this transaction
+            self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s, %s)", [RUNNER_LOCK_KEY, job.id])
+            if self.env.cr.fetchone()[0]:
+                job._handle_failure(_('The worker running this job stopped responding.'))
+
+    def _get_records(self):
+        """Records of the job in the environment of the user who enqueued it."""
+        self.ensure_one()
+        env = self.env(user=self.user_id.id, su=False, context=dict(self.context or {}, bg_job_id=self.id))
+        return env[self.res_model].with_company(self.company_id).browse(self.res_ids or [])
+
+    def _run(self):
+        self.ensure_one()
+        testing = getattr(threading.current_thread(), 'testing', False)
+        try:
+            records = self._get_records()
+            if self.chunk_size:
+                ids = self.res_ids or []
+                while self.offset < len(ids):
+                    if self._cancel_requested():
+                        self.write({'state': 'cancelled', 'date_done': fields.Datetime.now()})
+                        return
+                    chunk = records.browse(ids[self.offset:self.offset + self.chunk_size])
+                    output = getattr(chunk.with_context(bg_job_offset=self.offset).exists(), self.method)(**self.kwargs)
+                    self._store_output(output)
+                    self.write({
+                        'offset': self.offset + len(chunk),
+                        'progress_done': self.offset + len(chunk),
+                        'heartbeat': fields.Datetime.now(),
+                    })
+                    if not testing:
+                        self.env.cr.commit()
+            else:
+                output = getattr(records, self.method)(**self.kwargs)
+                # The method returns early when _report_progress tells it to stop
+                if self._cancel_requested():
+                    self.write({'state': 'cancelled', 'date_done': fields.Datetime.now()})
+                    return
+                self._store_output(output)
+            self._finish()
+        except Exception:
+            self.env.cr.rollback()
+            self.env.invalidate_all()
+            _logger.exception('Background job %s (%s) failed', self.id, self.name)
+            self._handle_failure(traceback.format_exc())
+
+    def _store_output(self, output):
+        """Keep one call's output as an attachment part of the result."""
+        if output is None or isinstance(output, bool):
+            return
+        if isinstance(output, str):
+            output = output.encode('utf-8')
+        self.env['ir.attachment'].sudo().create({
+            'name': 'part-%09d' % self.offset,
+            'type': 'binary',
+            'raw': output,
+            'res_model': self._name,
+            'res_id': self.id,
+        })
+
+    def _finish(self):
+        """Join the output parts into the result file and notify the user."""
+        Attachment = self.env['ir.attachment'].sudo()
+        parts = Attachment.search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('name', '=like', 'part-%'),
+        ], order='name')
+        vals = {'state': 'done', 'date_done': fields.Datetime.now(), 'error': False}
+        if parts:
+            raws = parts.mapped('raw')
+            data = merge_pdf(raws) if self.result_type == 'pdf' else b''.join(raws)
+            vals['result_attachment_id'] = Attachment.create({
+                'name': self.result_name or self.name,
+                'type': 'binary',
+                'datas': base64.b64encode(data),
+                'mimetype': self.result_mimetype or ('application/pdf' if self.result_type == 'pdf' else 'text/plain'),
+                'res_model': self._name,
+                'res_id': self.id,
+            }).id
+            parts.unlink()
+        self.write(vals)
+        self._notify(_('%s is done.') % self.name, 'success')
+
+    def _handle_failure(self, error):
+        """Schedule a retry with exponential backoff, or give up after the last attempt."""
+        if self.attempt < self.max_attempts:
+            date = fields.Datetime.now() + timedelta(seconds=self.retry_delay * 2 ** max(self.attempt - 1, 0))
+            self.write({'state': 'pending', 'date_scheduled': date, 'error': error})
+            self._trigger_runners(date)
+            return
+        self.write({'state': 'failed', 'date_done': fields.Datetime.now(), 'error': error})
+        if self.failure_method:
+            try:
+                with self.env.cr.savepoint():
+                    getattr(self._get_records(), self.failure_method)(error.strip().splitlines()[-1])
+            except Exception:
+                _logger.exception('Failure handler of background job %s failed', self.id)
+        self._notify(_('%s failed.') % self.name, 'danger')
+
+    def _notify(self, message, notification_type):
+        self.env['bus.bus']._sendone(self.user_id.partner_id, 'simple_notification', {
+            'title': _('Background job'),
+            'message': message,
+            'type': notification_type,
+        })
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Performance metrics.
+
+Hourly aggregates of the calls recorded by ``tools.perf.instrument``: one row per
+instrumented method or route and hour, summed over all workers.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from odoo import api, fields, models
+
+from ..tools import perf
+
+# Days of hourly metrics kept by the autovacuum
+KEEP_DAYS = 30
+
+
+class PerfMetric(models.Model):
+    """Calls, queries and time of one instrumented method or route over one hour."""
+    _name = 'perf.metric'
+    _description = 'Performance Metric'
+    _order = 'bucket desc, sql_time desc'
+    _log_access = False
+
+    name = fields.Char(required=True, readonly=True, index=True)
+    bucket = fields.Datetime(string='Hour', required=True, readonly=True, index=True)
+    calls = fields.Integer(readonly=True)
+    query_count = fields.Integer(string='Queries', readonly=True)
+    sql_time = fields.Float(string='SQL Time (s)', readonly=True, digits=(16, 4))
+    wall_time = fields.Float(string='Wall Time (s)', readonly=True, digits=(16, 4))
+    max_wall_time = fields.Float(string='Slowest Call (s)', readonly=True, digits=(16, 4), aggregator='max')
+    avg_queries = fields.Float(string='Queries / Call', compute='_compute_averages', digits=(16, 1))
+    avg_wall_time = fields.Float(string='Wall Time / Call (s)', compute='_compute_averages', digits=(16, 4))
+
+    _sql_constraints = [
+        ('name_bucket_uniq', 'unique(name, bucket)', 'One metric row per name and hour.'),
+    ]
+
+    @api.depends('calls', 'query_count', 'wall_time')
+    def _compute_averages(self):
+        for metric in self:
+            metric.avg_queries = metric.query_count / metric.calls if metric.calls else 0.0
+            metric.avg_wall_time = metric.wall_time / metric.calls if metric.calls else 0.0
+
+    @api.model
+    def _upsert_aggregates(self, aggregates):
+        """Add flushed samples to the hourly rows.
+
+        Args:
+            aggregates: ``{(name, hour_timestamp): [calls, queries, sql_time, wall_time, max_wall_time]}``.
+        """
+        rows = [
+            (name, datetime.fromtimestamp(hour, timezone.utc).replace(tzinfo=None), *values)
+            for (name, hour), values in aggregates.items()
+        ]
+        names, buckets, calls, queries, sql_times, wall_times, max_times = zip(*rows)
+        self.env.cr.execute("""
+            INSERT INTO perf_metric (name, bucket, calls, query_count, sql_time, wall_time, max_wall_time)
+                 SELECT * FROM unnest(%s::varchar[], %s::timestamp[], %s::int[], %s::int[],
+                                      %s::float8[], %s::float8[], %s::float8[])
+            ON CONFLICT (name, bucket) DO UPDATE
+                    SET calls = perf_metric.calls + EXCLUDED.calls,
+                        query_count = perf_metric.query_count + EXCLUDED.query_count,
+                        sql_time = perf_metric.sql_time + EXCLUDED.sql_time,
+                        wall_time = perf_metric.wall_time + EXCLUDED.wall_time,
+                        max_wall_time = GREATEST(perf_metric.max_wall_time, EXCLUDED.max_wall_time)
+        """, [list(names), list(buckets), list(calls), list(queries),
+              list(sql_times), list(wall_times), list(max_times)])
+
+    @api.model
+    def get_metrics(self, hours=24, recent=0):
+        """Totals per instrumented name over the last ``hours``, most SQL time first.
+
+        This worker's pending samples are flushed first. With ``recent``, the latest
+        calls still in this worker's ring buffer are returned as well.
+        """
+        perf.flush()
+        since = fields.Datetime.now() - timedelta(hours=hours)
+        groups = self._read_group(
+            [('bucket', '>=', since)], ['name'],
+            ['calls:sum', 'query_count:sum', 'sql_time:sum', 'wall_time:sum', 'max_wall_time:max'],
+            order='sql_time:sum desc')
+        result = {
+            'enabled': perf.is_enabled(),
+            'since': fields.Datetime.to_string(since),
+            'dropped': perf.dropped_samples(),
+            'metrics': [{
+                'name': name,
+                'calls': calls,
+                'query_count': queries,
+                'sql_time': sql_time,
+                'wall_time': wall_time,
+                'max_wall_time': max_wall_time,
+                'avg_queries': queries / calls if calls else 0.0,
+                'avg_wall_time': wall_time / calls if calls else 0.0,
+            } for name, calls, queries, sql_time, wall_time, max_wall_time in groups],
+        }
+        if recent:
+            result['recent'] = perf.recent_samples(self.env.cr.dbname, limit=recent)
+        return result
+
+    @api.autovacuum
+    def _gc_old_metrics(self):
+        self.search([('bucket', '<', fields.Datetime.now() - timedelta(days=KEEP_DAYS))]).unlink()
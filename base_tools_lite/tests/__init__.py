@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_bg_job
+from . import test_perf
+from . import test_replica
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+import base64
+from datetime import timedelta
+from unittest.mock import patch
+
+import psycopg2
+
+from odoo import fields
+from odoo.exceptions import AccessError, UserError
+from odoo.tests import TransactionCase, new_test_user, tagged
+from odoo.tools import mute_logger
+
+
+@tagged('post_install', '-at_install')
+class TestBgJob(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Job = cls.env['bg.job']
+        cls.partners = cls.env['res.partner'].create([{'name': 'Job Partner %s' % i} for i in range(5)])
+        # Keep jobs queued by other modules out of the runner
+        cls.Job.search([('state', '=', 'pending')]).write({'date_scheduled': '2999-01-01 00:00:00'})
+
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        Partner = type(self.env['res.partner'])
+        self.startPatcher(patch.object(Partner, '_bg_test_names', create=True,
+                                       new=lambda records: ','.join(records.mapped('name')) + '\n'))
+        self.startPatcher(patch.object(Partner, '_bg_test_failed', create=True,
+                                       new=lambda records, error: self.calls.append((records.ids, error))))
+
+    def _due(self, jobs):
+        jobs.write({'date_scheduled': '2000-01-01 00:00:00'})
+        return jobs
+
+    def test_chunked_job_merges_outputs(self):
+        job = self._due(self.Job._enqueue(self.partners, '_bg_test_names', chunk_size=2, result_name='names.txt'))
+        self.assertEqual((job.state, job.progress_total), ('pending', 5))
+        self.Job._cron_run_jobs()
+        self.assertEqual((job.state, job.attempt, job.offset, job.progress), ('done', 1, 5, 100.0))
+        self.assertEqual(job.result_attachment_id.name, 'names.txt')
+        self.assertEqual(base64.b64decode(job.result_file).decode(), 'Job Partner 0,Job Partner 1\n'
+                         'Job Partner 2,Job Partner 3\nJob Partner 4\n')
+        self.assertFalse(self.env['ir.attachment'].search([
+            ('res_model', '=', 'bg.job'), ('res_id', '=', job.id), ('name', '=like', 'part-%')]), 'parts are merged')
+
+    def test_claim_order(self):
+        low = self._due(self.Job._enqueue(self.partners, 'exists', priority=20))
+        high = self._due(self.Job._enqueue(self.partners, 'exists', priority=5))
+        later = self.Job._enqueue(self.partners, 'exists', priority=1)
+        later.date_scheduled = fields.Datetime.now() + timedelta(hours=1)
+        job = self.Job._claim()
+        try:
+            self.assertEqual(job, high, 'due jobs by priority; future ones wait')
+            self.assertEqual((job.state, job.attempt), ('running', 1))
+        finally:
+            job._unlock()
+        self.assertEqual(low.state, 'pending')
+
+    def test_runs_as_enqueuing_user(self):
+        user = new_test_user(self.env, login='bg_job_user', groups='base.group_user')
+        job = self.Job.with_user(user).with_context(lang='en_US')._enqueue(self.partners[:1], 'exists')
+        records = job.sudo()._get_records()
+        self.assertEqual((records.env.uid, records.env.su), (user.id, False))
+        self.assertEqual((records.env.context['bg_job_id'], records.env.context['lang']), (job.id, 'en_US'))
+
+    def test_identity_key(self):
+        job = self.Job._enqueue(self.partners, 'exists', identity_key='test.key')
+        self.assertEqual(self.Job._enqueue(self.partners, 'exists', identity_key='test.key'), job)
+        # A job of a concurrent transaction, not visible to the search, is caught by the unique index
+        with patch.object(type(self.Job), 'search', lambda self, *args, **kwargs: self.browse()), \
+                mute_logger('odoo.sql_db'):
+            self.assertFalse(self.Job._enqueue(self.partners, 'exists', identity_key='test.key'))
+        job.write({'state': 'done'})
+        other = self.Job._enqueue(self.partners, 'exists', identity_key='test.key')
+        self.assertNotEqual(other, job, 'finished jobs do not block the key')
+        with mute_logger('odoo.sql_db'), self.assertRaises(psycopg2.IntegrityError), self.env.cr.savepoint():
+            self.Job.create({'name': 'Duplicate', 'res_model': 'res.partner', 'method': 'exists',
+                             'identity_key': 'test.key', 'state': 'running'})
+
+    def test_retry_with_backoff(self):
+        job = self._due(self.Job._enqueue(self.partners[:2], 'exists', failure_method='_bg_test_failed'))
+        for attempt, delay in ((1, 60), (2, 120)):
+            self.assertEqual(self.Job._claim(), job)
+            job._unlock()
+            before = fields.Datetime.now()
+            job._handle_failure('Traceback\nValueError: boom')
+            self.assertEqual((job.state, job.attempt), ('pending', attempt))
+            self.assertAlmostEqual((job.date_scheduled - before).total_seconds(), delay, delta=5)
+            self._due(job)
+        self.assertEqual(self.Job._claim(), job)
+        job._unlock()
+        job._handle_failure('Traceback\nValueError: boom')
+        self.assertEqual((job.state, job.attempt), ('failed', 3))
+        self.assertEqual(self.calls, [(self.partners[:2].ids, 'ValueError: boom')])
+
+    def test_stale_job_requeued(self):
+        job = self._due(self.Job._enqueue(self.partners, 'exists'))
+        self.assertEqual(self.Job._claim(), job)
+        # The runner lock is released as if its worker died
+        job._unlock()
+        self.Job._requeue_stale()
+        self.assertEqual((job.state, job.error), ('pending', 'The worker running this job stopped responding.'))
+
+    def test_cancel_and_retry(self):
+        pending = self.Job._enqueue(self.partners, 'exists', identity_key='test.cancel')
+        pending.action_cancel()
+        self.assertEqual(pending.state, 'cancelled')
+        running = self.Job._enqueue(self.partners, 'exists')
+        running.state = 'running'
+        running.action_cancel()
+        self.assertEqual((running.state, running.cancel_requested), ('running', True))
+        self.assertFalse(self.Job.with_context(bg_job_id=running.id)._report_progress(1, 2))
+        self.assertEqual((running.progress_done, running.progress_total), (1, 2))
+        self.assertTrue(self.Job._report_progress(1, 2), 'outside a job')
+
+        blocking = self.Job._enqueue(self.partners, 'exists', identity_key='test.cancel')
+        with self.assertRaises(UserError):
+            pending.action_retry()
+        blocking.action_cancel()
+        pending.action_retry()
+        self.assertEqual((pending.state, pending.attempt, pending.cancel_requested), ('pending', 0, False))
+
+    def test_owner_only(self):
+        job = self.Job._enqueue(self.partners, 'exists')
+        other = new_test_user(self.env, login='bg_job_other', groups='base.group_user')
+        with self.assertRaises(AccessError):
+            job.with_user(other).action_cancel()
+        self.assertEqual(job.state, 'pending')
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+import collections
+import time
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import config
+
+from ..tools import perf
+
+
+@tagged('post_install', '-at_install')
+class TestPerf(TransactionCase):
+
+    def setUp(self):
+        super().setUp()
+        # Keep the process buffer and flush state of the server out of the tests
+        self.samples = collections.deque(maxlen=perf.RING_SIZE)
+        self.startPatcher(patch.object(perf, '_samples', self.samples))
+        self.startPatcher(patch.dict(perf._flush_state, {'seq': -1, 'dropped': 0}))
+        self.written = []
+        self.startPatcher(patch.object(perf, '_write_aggregates',
+                                       lambda dbname, aggregates: self.written.append((dbname, aggregates))))
+
+    def _instrument(self, func, name=None):
+        with patch.dict(config.options, {perf.CONFIG_KEY: True}):
+            return perf.instrument(name)(func)
+
+    def test_disabled(self):
+        def probe(records):
+            return records
+        with patch.dict(config.options, {perf.CONFIG_KEY: False}):
+            self.assertIs(perf.instrument()(probe), probe)
+
+    def test_records_calls(self):
+        def probe(records, fail=False):
+            records.env.cr.execute("SELECT 1")
+            records.env.cr.execute("SELECT 2")
+            if fail:
+                raise ValueError('boom')
+            return 'ok'
+        named = self._instrument(probe, 'test.probe')
+        self.assertEqual(named(self.env['res.partner']), 'ok')
+        with self.assertRaises(ValueError):
+            named(self.env['res.partner'], fail=True)
+        self._instrument(probe)(self.env['res.partner'])
+        self.samples.append((-1, 'other_db', 'test.probe', time.time(), 0.1, 1, 0.0))
+
+        recent = perf.recent_samples(self.env.cr.dbname)
+        self.assertEqual(len(recent), 3, 'failed calls are recorded too; other databases are not')
+        self.assertTrue(recent[0]['name'].startswith('base_tools_lite.'), 'default name: module and qualified name')
+        self.assertEqual([sample['name'] for sample in recent[1:]], ['test.probe', 'test.probe'])
+        self.assertEqual([sample['query_count'] for sample in recent], [2, 2, 2])
+        self.assertEqual(len(perf.recent_samples(self.env.cr.dbname, limit=1)), 1)
+        self.assertFalse(self.written, 'tests never flush from an instrumented call')
+
+    def test_flush(self):
+        hour = 1750000000 // 3600 * 3600
+        dbname = self.env.cr.dbname
+        self.samples.extend([
+            (0, dbname, 'test.a', hour + 10, 0.5, 3, 0.1),
+            (1, dbname, 'test.a', hour + 20, 1.5, 5, 0.2),
+            (2, dbname, 'test.a', hour + 3600, 0.1, 1, 0.0),
+        ])
+        perf.flush()
+        self.assertEqual(self.written, [(dbname, {
+            ('test.a', hour): [2, 8, 0.1 + 0.2, 2.0, 1.5],
+            ('test.a', hour + 3600): [1, 1, 0.0, 0.1, 0.1],
+        })])
+        self.written.clear()
+        perf.flush()
+        self.assertFalse(self.written, 'flushed samples are not aggregated again')
+
+        # Samples 3 and 4 left the buffer before this flush
+        self.samples.extend([(5, dbname, 'test.a', hour, 0.2, 2, 0.1), (6, 'other_db', 'test.b', hour, 0.2, 2, 0.1)])
+        perf.flush()
+        self.assertEqual(dict(self.written), {
+            dbname: {('test.a', hour): [1, 2, 0.1, 0.2, 0.2]},
+            'other_db': {('test.b', hour): [1, 2, 0.1, 0.2, 0.2]},
+        })
+        self.assertEqual(perf.dropped_samples(), 2)
+
+    def test_upsert_aggregates(self):
+        Metric = self.env['perf.metric']
+        hour = int(time.time()) // 3600 * 3600
+        Metric._upsert_aggregates({('test.metric', hour): [2, 10, 0.5, 1.0, 0.75]})
+        Metric._upsert_aggregates({('test.metric', hour): [1, 4, 0.25, 1.5, 1.5], ('test.other', hour): [1, 1, 0.0, 0.1, 0.1]})
+        metric = Metric.search([('name', '=', 'test.metric')])
+        self.assertEqual(len(metric), 1)
+        self.assertRecordValues(metric, [{
+            'calls': 3, 'query_count': 14, 'sql_time': 0.75, 'wall_time': 2.5, 'max_wall_time': 1.5,
+        }])
+        self.assertAlmostEqual(metric.avg_queries, 14 / 3)
+
+        result = Metric.get_metrics(hours=2, recent=5)
+        totals = {row['name']: row for row in result['metrics']}
+        self.assertEqual((totals['test.metric']['calls'], totals['test.metric']['avg_wall_time']), (3, 2.5 / 3))
+        self.assertLess(result['metrics'].index(totals['test.metric']), result['metrics'].index(totals['test.other']),
+                        'most SQL time first')
+        self.assertEqual(result['recent'], [])
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import os
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import config
+
+from odoo.addons.base_tools_lite.tools import replica
+from odoo.addons.base_tools_lite.tools.replica import replica_env
+
+
+@tagged('post_install', '-at_install')
+class TestReplica(TransactionCase):
+    """``replica_env`` on the primary by default; on a second database when one is configured.
+
+    Run the second group with a copy of the test database, e.g.::
+
+        createdb -T <db> <db>_replica
+        ODOO_REPLICA_TEST_DB=<db>_replica ./odoo-bin -d <db> --test-tags /base_tools_lite:TestReplica
+    """
+
+    def test_primary_in_tests(self):
+        with patch.dict(os.environ, {replica.TEST_DB_ENV: ''}), \
+                patch.dict(config.options, {replica.TEST_DB_KEY: False}), \
+                replica_env(self.env) as env:
+            self.assertIs(env, self.env)
+
+    def test_unusable_replica(self):
+        options = {'db_replica_host': 'replica.invalid', 'replica_max_lag': 0}
+        with patch.dict(config.options, options):
+            self.assertTrue(replica.is_configured())
+            self.assertFalse(replica.replica_usable(self.env.registry), 'a zero tolerance disables the replica')
+            self.assertEqual(replica.replica_status(self.env.registry)['usable'], False)
+
+    def test_second_database(self):
+        test_db = replica.replica_test_db()
+        if not test_db:
+            self.skipTest('set %s (or the %s option) to a copy of the test database' % (
+                replica.TEST_DB_ENV, replica.TEST_DB_KEY))
+        partner = self.env['res.partner'].create({'name': 'Written by the test'})
+        env = self.env(context=dict(self.env.context, replica_probe=True))
+        with replica_env(env) as renv:
+            cr = renv.cr
+            self.assertIsNot(cr, self.env.cr)
+            cr.execute("SELECT current_database()")
+            self.assertEqual(cr.fetchone()[0], test_db)
+            self.assertEqual((renv.uid, renv.su), (env.uid, env.su))
+            self.assertTrue(renv.context.get('replica_probe'))
+            self.assertIs(renv.registry, self.env.registry)
+            self.assertTrue(renv['res.users'].search_count([]))
+            self.assertFalse(renv['res.partner'].search([('id', '=', partner.id)]),
+                             'uncommitted writes of the test are not on the replica')
+            # Already on a read-only cursor: no second cursor
+            with replica_env(renv) as nested:
+                self.assertIs(nested, renv)
+        self.assertTrue(cr.closed)
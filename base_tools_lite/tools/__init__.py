@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from .perf import instrument
+from .replica import replica_env, replica_readonly
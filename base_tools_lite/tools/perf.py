@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""Hot-path instrumentation.
+
+``@instrument()`` records the query count, SQL time and wall time of each call of
+the decorated method or route into a per-process ring buffer. The buffer is
+folded into hourly ``perf.metric`` rows at most once a minute, on a separate
+cursor, by whichever instrumented call notices the interval has passed.
+
+It is enabled with ``perf_instrumentation = True`` in the ``[options]`` section
+of the server configuration file. The option is read when the modules are
+imported: when it is off, the decorator returns the function unchanged and costs
+nothing; changing it needs a restart.
+"""
+
+import collections
+import functools
+import itertools
+import logging
+import threading
+import time
+
+from odoo import api, SUPERUSER_ID
+from odoo.http import request
+from odoo.modules.registry import Registry
+from odoo.tools import config, str2bool
+
+_logger = logging.getLogger(__name__)
+
+CONFIG_KEY = 'perf_instrumentation'
+# Calls kept per process; older ones are dropped when the buffer is full
+RING_SIZE = 10000
+# Seconds between two flushes of the buffer into perf.metric
+FLUSH_INTERVAL = 60
+
+
+def is_enabled():
+    return str2bool(str(config.get(CONFIG_KEY) or False), False)
+
+
+# (seq, dbname, name, started, wall_time, query_count, sql_time); deque.append is thread-safe
+_samples = collections.deque(maxlen=RING_SIZE)
+_seq = itertools.count()
+_flush_lock = threading.Lock()
+_flush_state = {'seq': -1, 'at': time.monotonic(), 'dropped': 0}
+
+
+def instrument(name=None):
+    """Decorator recording SQL query count, SQL time and wall time per call.
+
+    Place it under the ORM or route decorators (``@api.depends``, ``@http.route``…).
+    Calls are attributed to the database of the current request or cron; calls
+    made without one (e.g. during module loading) are not recorded. Queries run by
+    a later flush of pending writes are counted on the call that triggers it.
+
+    Args:
+        name: metric name; defaults to ``<module>.<Class>.<method>``.
+    """
+    def decorator(func):
+        if not is_enabled():
+            return func
+        metric = name or '%s.%s' % (func.__module__.split('.')[2] if func.__module__.startswith('odoo.addons.')
+                                    else func.__module__, func.__qualname__)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            thread = threading.current_thread()
+            if not hasattr(thread, 'query_count'):
+                # Cursors only count queries on threads set up by the server
+                thread.query_count, thread.query_time = 0, 0.0
+            queries, sql_time = thread.query_count, thread.query_time
+            started, wall = time.time(), time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                dbname = _get_dbname(thread, args)
+                if dbname:
+                    _samples.append((next(_seq), dbname, metric, started, time.perf_counter() - wall,
+                                     thread.query_count - queries, thread.query_time - sql_time))
+                    if (time.monotonic() - _flush_state['at'] > FLUSH_INTERVAL
+                            and not getattr(thread, 'testing', False)):
+                        flush()
+        return wrapper
+    return decorator
+
+
+def _get_dbname(thread, args):
+    dbname = getattr(thread, 'dbname', None)
+    if dbname:
+        return dbname
+    env = getattr(args[0], 'env', None) if args else None
+    if isinstance(env, api.Environment):
+        return env.cr.dbname
+    return request.db if request else None
+
+
+def recent_samples(dbname, limit=100):
+    """Latest calls of this process for ``dbname``, newest first, as dicts."""
+    result = []
+    for __, db, metric, started, wall, queries, sql_time in reversed(list(_samples)):
+        if db != dbname:
+            continue
+        result.append({'name': metric, 'started': started, 'wall_time': wall,
+                       'query_count': queries, 'sql_time': sql_time})
+        if len(result) >= limit:
+            break
+    return result
+
+
+def flush():
+    """Aggregate the samples recorded since the last flush into ``perf.metric``.
+
+    Only one thread of the process flushes at a time; the others skip it.
+    """
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _flush_state['at'] = time.monotonic()
+        last_seq = _flush_state['seq']
+        samples = [sample for sample in list(_samples) if sample[0] > last_seq]
+        if not samples:
+            return
+        if samples[0][0] > last_seq + 1:
+            # The ring buffer wrapped around since the last flush
+            _flush_state['dropped'] += samples[0][0] - last_seq - 1
+        _flush_state['seq'] = samples[-1][0]
+        by_db = collections.defaultdict(dict)
+        for __, dbname, metric, started, wall, queries, sql_time in samples:
+            key = (metric, int(started // 3600) * 3600)
+            agg = by_db[dbname].setdefault(key, [0, 0, 0.0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += queries
+            agg[2] += sql_time
+            agg[3] += wall
+            agg[4] = max(agg[4], wall)
+        for dbname, aggregates in by_db.items():
+            _write_aggregates(dbname, aggregates)
+    finally:
+        _flush_lock.release()
+
+
+def dropped_samples():
+    """Calls dropped from the ring buffer before a flush could aggregate them."""
+    return _flush_state['dropped']
+
+
+def _write_aggregates(dbname, aggregates):
+    try:
+        registry = Registry(dbname)
+        if 'perf.metric' not in registry:
+            return
+        with registry.cursor() as cr:
+            api.Environment(cr, SUPERUSER_ID, {})['perf.metric']._upsert_aggregates(aggregates)
+    except Exception:
+        # Metrics must never break the instrumented call
+        _logger.warning('Could not store performance metrics for %s', dbname, exc_info=True)
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""Read-replica routing with a replication lag tolerance.
+
+Odoo 18 opens read-only cursors on the replica configured with ``db_replica_host``
+/ ``db_replica_port`` (``Registry.cursor(readonly=True)``): for the routes
+declared ``readonly`` and for the RPC calls of ``@api.readonly`` methods, i.e. the
+list, pivot and graph views of every model, retrying on the primary when a write
+is attempted. This module adds:
+
+- ``replica_readonly``: a ``readonly=`` predicate for routes, true only while the
+  replica is within the lag tolerance;
+- ``replica_env(env)``: an environment on the replica for read-only work done on
+  the server (exports, report data, portal counts), or ``env`` itself when the
+  replica is not configured, too far behind or unreachable.
+
+The tolerance is ``replica_max_lag`` (seconds, default 30) in the ``[options]``
+section of the server configuration; 0 keeps these helpers on the primary. The
+lag is measured on the replica at most every ``LAG_CHECK_INTERVAL`` seconds per
+process and database.
+
+Tests run in a transaction that is never committed, so ``replica_env`` keeps them
+on the primary unless ``replica_test_db`` (server option) or the
+``ODOO_REPLICA_TEST_DB`` environment variable names a copy of the tested database
+(``createdb -T <db> <copy>``) to read from instead.
+"""
+
+import contextlib
+import logging
+import os
+import threading
+import time
+
+from odoo import sql_db
+from odoo.api import Transaction
+from odoo.http import request
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+CONFIG_KEY = 'replica_max_lag'
+# Default tolerance in seconds
+DEFAULT_MAX_LAG = 30
+# Seconds between two lag measurements
+LAG_CHECK_INTERVAL = 5
+# Database read by replica_env in tests, as server option or environment variable
+TEST_DB_KEY = 'replica_test_db'
+TEST_DB_ENV = 'ODOO_REPLICA_TEST_DB'
+
+# Seconds behind the primary: 0 when everything received is replayed (an idle
+# primary does not move the replay timestamp) or when the "replica" is a plain
+# copy that is not in recovery
+LAG_QUERY = """
+    SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0
+                WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END
+"""
+
+# {dbname: (monotonic time of the check, lag in seconds or None when unreachable)}
+_lag_state = {}
+
+
+def is_configured():
+    return bool(config.get('db_replica_host') or config.get('db_replica_port'))
+
+
+def max_lag():
+    value = config.get(CONFIG_KEY)
+    return DEFAULT_MAX_LAG if value in (None, False, '') else float(value)
+
+
+def is_testing():
+    return bool(getattr(threading.current_thread(), 'testing', False))
+
+
+def replica_test_db():
+    """Database standing in for the replica in tests, or None (always outside tests)."""
+    if not is_testing():
+        return None
+    return os.environ.get(TEST_DB_ENV) or config.get(TEST_DB_KEY) or None
+
+
+def replica_lag(registry):
+    """Replication lag of the replica in seconds, or None when it cannot be reached."""
+    now = time.monotonic()
+    state = _lag_state.get(registry.db_name)
+    if state and now - state[0] < LAG_CHECK_INTERVAL:
+        return state[1]
+    lag = None
+    try:
+        with contextlib.closing(registry.cursor(readonly=True)) as cr:
+            cr.execute(LAG_QUERY)
+            lag = float(cr.fetchone()[0])
+    except Exception:
+        _logger.warning('Read replica of %s unreachable, reading from the primary', registry.db_name, exc_info=True)
+    _lag_state[registry.db_name] = (now, lag)
+    return lag
+
+
+def replica_usable(registry):
+    """Whether read-only work may go to the replica now."""
+    if not is_configured() or max_lag() <= 0:
+        return False
+    lag = replica_lag(registry)
+    return lag is not None and lag <= max_lag()
+
+
+def replica_readonly(*args, **kwargs):
+    """``readonly=`` predicate of routes: serve the request on the replica while it is usable.
+
+    Odoo retries the request on the primary if it attempts a write.
+    """
+    return request is not None and bool(request.db) and replica_usable(request.registry)
+
+
+@contextlib.contextmanager
+def replica_env(env):
+    """Yield an environment (same user, context and superuser flag) on the replica.
+
+    Yields ``env`` itself when the replica is not usable, when ``env`` is already on
+    a read-only cursor, and in tests, whose data is never committed, unless
+    ``replica_test_db`` names a database to read from instead. Data written by the
+    current transaction, or committed less than the lag tolerance ago, may be
+    missing: only use it for reads that can be slightly behind. Records read
+    through it must not be used once the block is left.
+    """
+    test_db = replica_test_db()
+    if getattr(env.cr, 'readonly', False) or (is_testing() and not test_db) or (
+            not test_db and not replica_usable(env.registry)):
+        yield env
+        return
+    if test_db:
+        cr = sql_db.db_connect(test_db, readonly=True).cursor()
+        # a copy of the tested database: keep its registry instead of loading another
+        cr.transaction = Transaction(env.registry)
+    else:
+        cr = env.registry.cursor(readonly=True)
+    with contextlib.closing(cr):
+        yield env(cr=cr)
+
+
+def replica_status(registry):
+    """Configuration and current lag of the replica, for the status route."""
+    configured = is_configured()
+    lag = replica_lag(registry) if configured else None
+    return {
+        'configured': configured,
+        'host': config.get('db_replica_host') or None,
+        'port': config.get('db_replica_port') or None,
+        'max_lag': max_lag(),
+        'lag': lag,
+        'usable': replica_usable(registry),
+    }
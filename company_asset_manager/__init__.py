@@ -1,3 +1,12 @@
 # -*- coding: utf-8 -*-
+from . import controllers
 from . import models
+from . import report
 from . import wizard
+
+
+def post_init_hook(env):
+    """Build the assignment history from existing chatter tracking values and fill
+    the service forecast, so the reports do not wait for the cron."""
+    env['company.asset.assignment']._backfill_from_tracking()
+    env['company.asset.forecast']._cron_refresh()
@@ -2,22 +2,27 @@
 {
     'name': 'Company Asset Manager',
     'summary': 'Manage company assets and their service schedules with assignments and reporting',
-    'version': '1.0.0',
+    'version': '1.1.0',
     'license': 'LGPL-3',
     'author': 'Roksana Piwowarczyk',
     'category': 'Human Resources/Assets',
-    'depends': ['base', 'mail', 'hr', 'contacts'],
+    'depends': ['base', 'mail', 'hr', 'contacts', 'base_tools_lite'],
     'data': [
         'security/asset_groups.xml',
         'security/ir.model.access.csv',
         'security/asset_record_rules.xml',
         'wizard/assign_wizard_views.xml',
+        'views/assignment_views.xml',
         'views/asset_views.xml',
         'views/service_views.xml',
+        'views/forecast_views.xml',
         'views/menus.xml',
+        'report/asset_label_report.xml',
+        'report/asset_label_templates.xml',
         'data/server_actions.xml',
         'data/cron.xml',
     ],
+    'post_init_hook': 'post_init_hook',
     'application': True,
     'installable': True,
 }
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""Company Asset Manager HTTP routes."""
+from odoo import http
+from odoo.http import request
+
+
+class CompanyAssetController(http.Controller):
+
+    @http.route('/company_asset/scan', type='http', auth='user', methods=['GET'])
+    def scan(self, code='', **kw):
+        """Open the asset of a scanned label (serial number or ``ASSET-<id>``)."""
+        asset = request.env['company.asset']._find_by_label_code(code)
+        if not asset:
+            return request.not_found()
+        return request.redirect('/odoo/action-company_asset_manager.action_company_assets/%s' % asset.id)
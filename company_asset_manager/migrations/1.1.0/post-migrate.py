@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    """Backfill the assignment history and fill the service forecast for databases
+    upgraded from 1.0.x."""
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['company.asset.assignment']._backfill_from_tracking()
+    env['company.asset.forecast']._cron_refresh()
@@ -1,2 +1,5 @@
 # -*- coding: utf-8 -*-
 from . import asset
+from . import asset_assignment
+from . import asset_forecast
+from . import hr_employee
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Company Asset Manager models.
 
-Asset model with services and utilities; includes CSV export and scheduling helpers.
+Asset model with services and utilities; includes CSV export, label printing and
+scheduling helpers.
 """
 
 import base64
@@ -9,6 +10,20 @@ from dateutil.relativedelta import relativedelta
 
 from odoo import api, fields, models, _
 from odoo.exceptions import AccessError
+from odoo.addons.base_tools_lite.tools import instrument, replica_env
+
+# Exports above this many assets run as a background job
+EXPORT_BACKGROUND_THRESHOLD = 2000
+# Assets per background export chunk
+EXPORT_CHUNK_SIZE = 1000
+# Assets per committed chunk of the upcoming service reminders
+REMINDER_CHUNK_SIZE = 200
+# Selections above this many assets get their labels rendered by a background job
+LABEL_BACKGROUND_THRESHOLD = 240
+# Assets per label PDF chunk (whole sheets of 24 labels, so the merged PDF has no gaps)
+LABEL_CHUNK_SIZE = 240
+# Label code of assets without serial number
+LABEL_ID_PREFIX = 'ASSET-'
 
 
 class CompanyAsset(models.Model):
@@ -17,6 +32,7 @@ class CompanyAsset(models.Model):
     _description = 'Company Asset'
     _inherit = ['mail.thread', 'mail.activity.mixin']
     _order = 'name'
+    _rec_names_search = ['name', 'serial_no']
 
     name = fields.Char(string='Asset Name', required=True, tracking=True)
     category = fields.Selection(
@@ -46,12 +62,39 @@ class CompanyAsset(models.Model):
 
     service_ids = fields.One2many('company.asset.service', 'asset_id', string='Services')
     service_count = fields.Integer(string='Services Count', compute='_compute_service_count')
+    assignment_ids = fields.One2many('company.asset.assignment', 'asset_id', string='Assignment History')
 
     _sql_constraints = [
         ('serial_no_unique', 'unique(serial_no)', 'Serial number must be unique.'),
     ]
 
+    @api.model_create_multi
+    @instrument()
+    def create(self, vals_list):
+        assets = super().create(vals_list)
+        assets.filtered('employee_id')._record_assignment_change()
+        return assets
+
+    @instrument()
+    def write(self, vals):
+        """Write assets and keep the assignment history in sync with ``employee_id``."""
+        if 'employee_id' not in vals:
+            return super().write(vals)
+        new_employee = vals['employee_id'] or False
+        if isinstance(new_employee, models.BaseModel):
+            new_employee = new_employee.id
+        changed = self.filtered(lambda a: a.employee_id.id != new_employee)
+        res = super().write(vals)
+        changed._record_assignment_change()
+        return res
+
+    def _record_assignment_change(self):
+        """Close previous assignments and open new ones for the current employees."""
+        return self.env['company.asset.assignment']._record_change(
+            self, note=self.env.context.get('asset_assignment_note'))
+
     @api.depends('service_ids.service_date', 'service_interval_months', 'purchase_date')
+    @instrument()
     def _compute_next_service_date(self):
         """Compute next service date based on last service or purchase date and interval."""
         for asset in self:
@@ -70,6 +113,7 @@ class CompanyAsset(models.Model):
                 asset.next_service_date = False
 
     @api.depends('service_ids')
+    @instrument()
     def _compute_service_count(self):
         """Compute number of related service records for each asset."""
         counts = {}
@@ -102,6 +146,14 @@ class CompanyAsset(models.Model):
             'target': 'current',
         }
 
+    def action_view_assignments(self):
+        """Open the assignment history of the asset."""
+        self.ensure_one()
+        action = self.env.ref('company_asset_manager.action_company_asset_assignments').read()[0]
+        action['domain'] = [('asset_id', '=', self.id)]
+        action['context'] = {'default_asset_id': self.id}
+        return action
+
     def action_assign_wizard(self):
         """Open assignment wizard prefilled with the current asset."""
         self.ensure_one()
@@ -116,34 +168,107 @@ class CompanyAsset(models.Model):
             },
         }
 
+    # ---------------------------------------------------------------------
+    # Labels and scanning
+    # ---------------------------------------------------------------------
+    def _get_label_code(self):
+        """Code printed as barcode: the serial number, or ``ASSET-<id>`` without one."""
+        self.ensure_one()
+        return self.serial_no or '%s%s' % (LABEL_ID_PREFIX, self.id)
+
+    @api.model
+    def _find_by_label_code(self, code):
+        """Asset of a scanned label code, with one index lookup on ``serial_no`` (or the id)."""
+        code = (code or '').strip()
+        if not code:
+            return self.browse()
+        asset = self.search([('serial_no', '=', code)], limit=1)
+        if not asset and code.startswith(LABEL_ID_PREFIX) and code[len(LABEL_ID_PREFIX):].isdigit():
+            asset = self.search([('id', '=', int(code[len(LABEL_ID_PREFIX):]))], limit=1)
+        return asset
+
+    @api.model
+    def _search_display_name(self, operator, value):
+        # A scanned label typed into a many2one or the search bar resolves exactly,
+        # instead of an ilike over name and serial number
+        if operator in ('ilike', '=') and isinstance(value, str):
+            asset = self._find_by_label_code(value)
+            if asset:
+                return [('id', '=', asset.id)]
+        return super()._search_display_name(operator, value)
+
+    @instrument()
+    def action_print_labels(self):
+        """Print QR/barcode labels of the selected assets.
+
+        Large selections are rendered in chunks by a background job that merges them
+        into one PDF; the job dialog offers the file when it is done.
+        """
+        if not self:
+            return False
+        if len(self) <= LABEL_BACKGROUND_THRESHOLD:
+            return self.env.ref('company_asset_manager.report_asset_label_action').report_action(self)
+        return self.env['bg.job']._enqueue(
+            self, '_render_labels', name=_('Asset labels (%s assets)') % len(self),
+            chunk_size=LABEL_CHUNK_SIZE, result_type='pdf', result_name=_('Asset Labels.pdf'),
+        )._action_open()
+
+    @instrument()
+    def _render_labels(self):
+        """PDF labels of these assets (one chunk of a background label job)."""
+        pdf, __ = self.env['ir.actions.report']._render_qweb_pdf(
+            'company_asset_manager.report_asset_label', res_ids=self.ids)
+        return pdf
+
     def _get_export_fields_for_csv(self):
         """Return the fields to include in exported CSV (technical names)."""
         return ['name', 'serial_no', 'category', 'employee_id', 'status', 'next_service_date']
 
+    def _export_csv_chunk(self):
+        """CSV text of these assets; the header is included unless this is a later job chunk.
+
+        Read from the read replica when one is configured and within the lag tolerance.
+        """
+        lines = []
+        if not self.env.context.get('bg_job_offset'):
+            headers = ['Name', 'Serial', 'Category', 'Employee', 'Status', 'Next Service Date']
+            lines.append(','.join('"%s"' % h for h in headers))
+        categories = dict(self._fields['category'].selection)
+        statuses = dict(self._fields['status'].selection)
+        with replica_env(self.env) as env:
+            for rec in self.with_env(env).exists():
+                vals = [
+                    rec.name or '',
+                    rec.serial_no or '',
+                    categories.get(rec.category or '', '') or '',
+                    rec.employee_id.name or '',
+                    statuses.get(rec.status or '', '') or '',
+                    rec.next_service_date and fields.Date.to_string(rec.next_service_date) or '',
+                ]
+                # Escape quotes per CSV conventions
+                lines.append(','.join('"%s"' % (v.replace('"', '""')) for v in vals))
+        return '\n'.join(lines) + '\n'
+
+    @instrument()
     def action_export_csv(self):
-        """Export selected (or all) assets to CSV and return a download URL."""
+        """Export selected (or all) assets to CSV and return a download URL.
+
+        Large exports are written by a background job in chunks; the job dialog
+        offers the file when it is done.
+        """
         # Managers only
         if not self.env.user.has_group('company_asset_manager.group_asset_manager'):
             raise AccessError(_('Only managers can export assets.'))
         # Prepare data
         records = self if self else self.search([])
-        headers = ['Name', 'Serial', 'Category', 'Employee', 'Status', 'Next Service Date']
-        lines = [','.join('"%s"' % h for h in headers)]
-        for rec in records:
-            vals = [
-                rec.name or '',
-                rec.serial_no or '',
-                dict(self._fields['category'].selection).get(rec.category or '', '') or '',
-                rec.employee_id.name or '',
-                dict(self._fields['status'].selection).get(rec.status or '', '') or '',
-                rec.next_service_date and fields.Date.to_string(rec.next_service_date) or '',
-            ]
-            # Escape quotes per CSV conventions
-            lines.append(','.join('"%s"' % (v.replace('"', '""')) for v in vals))
-        content = '\n'.join(lines)
-        # Create attachment
         filename = 'assets_export_%s.csv' % fields.Date.to_string(fields.Date.context_today(self))
-        data = content.encode('utf-8')
+        if len(records) > EXPORT_BACKGROUND_THRESHOLD:
+            return self.env['bg.job']._enqueue(
+                records, '_export_csv_chunk', name=_('Asset CSV export'), chunk_size=EXPORT_CHUNK_SIZE,
+                result_name=filename, result_mimetype='text/csv',
+            )._action_open()
+        data = records._export_csv_chunk().encode('utf-8')
+        # Create attachment
         attachment = self.env['ir.attachment'].create({
             'name': filename,
             'type': 'binary',
@@ -158,6 +283,65 @@ class CompanyAsset(models.Model):
             'target': 'self',
         }
 
+    # ---------------------------------------------------------------------
+    # Upcoming Services
+    # ---------------------------------------------------------------------
+    @api.model
+    @instrument()
+    def _cron_schedule_upcoming_services(self):
+        """Weekly cron: queue reminders for assets due for service within 14 days."""
+        deadline = fields.Date.today() + relativedelta(days=14)
+        assets = self.search([
+            ('next_service_date', '!=', False),
+            ('next_service_date', '<=', deadline),
+            ('status', '!=', 'retired'),
+        ])
+        if assets:
+            self.env['bg.job']._enqueue(
+                assets, '_remind_upcoming_service', name=_('Upcoming service reminders'),
+                chunk_size=REMINDER_CHUNK_SIZE, identity_key='company_asset.upcoming_services',
+            )
+        return True
+
+    @instrument()
+    def _remind_upcoming_service(self):
+        """Post a chatter log and schedule an activity for every Asset Manager (one job chunk)."""
+        today = fields.Date.today()
+        try:
+            mgr_group = self.env.ref('company_asset_manager.group_asset_manager')
+            users = mgr_group.users
+        except Exception:
+            users = self.env['res.users']
+        # Avoid duplicate activities for same user/asset/summary, looked up once for the chunk
+        existing = {
+            (activity['res_id'], activity['user_id'])
+            for activity in self.env['mail.activity'].search_read([
+                ('res_model', '=', self._name),
+                ('res_id', 'in', self.ids),
+                ('user_id', 'in', users.ids),
+                ('summary', '=', 'Upcoming service'),
+            ], ['res_id', 'user_id'], load=None)
+        }
+        for asset in self:
+            # Log once per run
+            try:
+                asset.message_post(body=_('Upcoming service due on %(date)s.', date=fields.Date.to_string(asset.next_service_date)))
+            except Exception:
+                pass
+            for user in users:
+                if (asset.id, user.id) in existing:
+                    continue
+                try:
+                    asset.activity_schedule(
+                        act_type_xmlid='mail.mail_activity_data_todo',
+                        date_deadline=asset.next_service_date or today,
+                        summary=_('Upcoming service'),
+                        note=_('Asset %(name)s requires service by %(date)s.', name=asset.name, date=fields.Date.to_string(asset.next_service_date or today)),
+                        user_id=user.id,
+                    )
+                except Exception:
+                    pass
+
     # ---------------------------------------------------------------------
     # State Transition Actions
     # ---------------------------------------------------------------------
@@ -204,49 +388,3 @@ class CompanyAssetService(models.Model):
     currency_id = fields.Many2one('res.currency', string='Currency', related='asset_id.company_id.currency_id', store=True, readonly=True)
 
     company_id = fields.Many2one(related='asset_id.company_id', store=True, readonly=True)
-
-
-    @api.model
-    def _cron_schedule_upcoming_services(self):
-        today = fields.Date.today()
-        deadline = today + relativedelta(days=14)
-        assets = self.search([
-            ('next_service_date', '!=', False),
-            ('next_service_date', '<=', deadline),
-            ('status', '!=', 'retired'),
-        ])
-        if not assets:
-            return True
-        # Post chatter log and schedule activities for all Asset Managers
-        try:
-            mgr_group = self.env.ref('company_asset_manager.group_asset_manager')
-            users = mgr_group.users
-        except Exception:
-            users = self.env['res.users']
-        for asset in assets:
-            # Log once per run
-            try:
-                asset.message_post(body=_('Upcoming service due on %(date)s.', date=fields.Date.to_string(asset.next_service_date)))
-            except Exception:
-                pass
-            for user in users:
-                # Avoid duplicate activities for same user/asset/summary
-                existing = self.env['mail.activity'].search([
-                    ('res_model', '=', asset._name),
-                    ('res_id', '=', asset.id),
-                    ('user_id', '=', user.id),
-                    ('summary', '=', 'Upcoming service'),
-                ], limit=1)
-                if existing:
-                    continue
-                try:
-                    asset.activity_schedule(
-                        act_type_xmlid='mail.mail_activity_data_todo',
-                        date_deadline=asset.next_service_date or today,
-                        summary=_('Upcoming service'),
-                        note=_('Asset %(name)s requires service by %(date)s.', name=asset.name, date=fields.Date.to_string(asset.next_service_date or today)),
-                        user_id=user.id,
-                    )
-                except Exception:
-                    pass
-        return True
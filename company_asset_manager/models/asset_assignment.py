@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Asset assignment history.
+
+One row per period an asset was held by an employee, written by every path that
+changes ``company.asset.employee_id`` and indexed for point-in-time and
+per-employee queries.
+"""
+
+from odoo import api, fields, models, tools
+
+
+class CompanyAssetAssignment(models.Model):
+    """Period during which an asset was assigned to an employee."""
+    _name = 'company.asset.assignment'
+    _description = 'Asset Assignment History'
+    _order = 'date_from desc, id desc'
+
+    asset_id = fields.Many2one('company.asset', string='Asset', required=True, ondelete='cascade', index=True)
+    # Kept when the employee is deleted: the period is closed and stays in the history
+    employee_id = fields.Many2one('hr.employee', string='Employee', ondelete='set null')
+    date_from = fields.Datetime(string='From', required=True)
+    date_to = fields.Datetime(string='To', help='Empty while the assignment is still open.')
+    note = fields.Text(string='Note')
+    company_id = fields.Many2one(related='asset_id.company_id', store=True, readonly=True)
+
+    def init(self):
+        # "Who had asset X at T" and "what did employee Y hold" both start from
+        # a (key, date_from) range scan; at most one open row per asset.
+        tools.create_index(self._cr, 'company_asset_assignment_asset_period_idx',
+                           self._table, ['asset_id', 'date_from', 'date_to'])
+        tools.create_index(self._cr, 'company_asset_assignment_employee_period_idx',
+                           self._table, ['employee_id', 'date_from', 'date_to'])
+        self._cr.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS company_asset_assignment_open_uniq
+                ON company_asset_assignment (asset_id) WHERE date_to IS NULL
+        """)
+
+    # ---------------------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------------------
+    @api.model
+    def _get_holders_at(self, assets, at):
+        """Return ``{asset_id: hr.employee}`` for the holders of ``assets`` at ``at``.
+
+        ``at`` may be a date (interpreted as midnight) or a datetime.
+        """
+        at = fields.Datetime.to_datetime(at)
+        rows = self.search([
+            ('asset_id', 'in', assets.ids),
+            ('date_from', '<=', at),
+            '|', ('date_to', '=', False), ('date_to', '>', at),
+        ])
+        return {row.asset_id.id: row.employee_id for row in rows}
+
+    @api.model
+    def _get_assets_held_by(self, employees, date_from=None, date_to=None):
+        """Return the assignment rows of ``employees``, optionally overlapping a period."""
+        domain = [('employee_id', 'in', employees.ids)]
+        if date_to:
+            domain.append(('date_from', '<=', fields.Datetime.to_datetime(date_to)))
+        if date_from:
+            domain += ['|', ('date_to', '=', False), ('date_to', '>', fields.Datetime.to_datetime(date_from))]
+        return self.search(domain)
+
+    # ---------------------------------------------------------------------
+    # Writers
+    # ---------------------------------------------------------------------
+    @api.model
+    def _record_change(self, assets, when=None, note=False):
+        """Close the open assignment of ``assets`` and open one for their current employee."""
+        if not assets:
+            return self.browse()
+        when = when or fields.Datetime.now()
+        History = self.sudo()
+        History.search([('asset_id', 'in', assets.ids), ('date_to', '=', False)]).write({'date_to': when})
+        return History.create([{
+            'asset_id': asset.id,
+            'employee_id': asset.employee_id.id,
+            'date_from': when,
+            'note': note,
+        } for asset in assets if asset.employee_id])
+
+    @api.model
+    def _backfill_from_tracking(self):
+        """Build history from the ``employee_id`` tracking values of assets without history.
+
+        Assets that already have history rows are left untouched, so the method is safe
+        to run again. Assets that were created with an employee but never reassigned are
+        opened from their creation date.
+        """
+        field = self.env['ir.model.fields']._get('company.asset', 'employee_id')
+        self.env.cr.execute("""
+            SELECT a.id, a.create_date, a.employee_id
+              FROM company_asset a
+             WHERE NOT EXISTS (SELECT 1 FROM company_asset_assignment h WHERE h.asset_id = a.id)
+        """)
+        assets = {asset_id: (create_date, employee_id) for asset_id, create_date, employee_id in self.env.cr.fetchall()}
+        if not assets:
+            return 0
+        self.env.cr.execute("""
+            SELECT m.res_id, m.date, v.old_value_integer, v.new_value_integer
+              FROM mail_tracking_value v
+              JOIN mail_message m ON m.id = v.mail_message_id
+             WHERE m.model = 'company.asset'
+               AND m.res_id = ANY(%s)
+               AND v.field_id = %s
+          ORDER BY m.res_id, m.date, v.id
+        """, [list(assets), field.id])
+        changes = {}
+        for asset_id, date, old_emp, new_emp in self.env.cr.fetchall():
+            changes.setdefault(asset_id, []).append((date, old_emp, new_emp))
+
+        existing_employees = set(self.env['hr.employee'].with_context(active_test=False).search([]).ids)
+        vals_list = []
+        for asset_id, (create_date, current_emp) in assets.items():
+            periods = []
+            holder, since = None, create_date
+            for date, old_emp, new_emp in changes.get(asset_id, []):
+                holder = holder if holder is not None else old_emp
+                if holder:
+                    periods.append((holder, since, date))
+                holder, since = new_emp, date
+            if holder is None:
+                holder = current_emp
+            if holder:
+                periods.append((holder, since, False))
+            vals_list += [{
+                'asset_id': asset_id,
+                'employee_id': emp,
+                'date_from': start,
+                'date_to': end,
+            } for emp, start, end in periods if emp in existing_employees]
+        self.sudo().create(vals_list)
+        return len(vals_list)
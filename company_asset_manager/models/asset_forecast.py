@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Asset service load forecast.
+
+Projects the service dates of the whole fleet over the next months from each
+asset's next service date (last service or purchase date plus the interval) and
+its service interval, with one ``generate_series`` per asset in a single
+``INSERT ... SELECT``. The hourly cron refreshes the assets changed since its
+last run; the first run of a day rebuilds everything, since the horizon and the
+overdue services move with the date.
+"""
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+from odoo.addons.base_tools_lite.tools import instrument
+
+# Months projected ahead
+FORECAST_MONTHS = 12
+# Assets refreshed per SQL statement by incremental refreshes
+FORECAST_BATCH_SIZE = 5000
+# Last time the forecast was refreshed
+FORECAST_REFRESH_PARAM = 'company_asset_manager.forecast_refresh_date'
+# Assets are rescanned this far before the watermark: ``write_date`` is the start of
+# the writing transaction, which may commit after the previous run took its snapshot
+FORECAST_REFRESH_OVERLAP = relativedelta(hours=2)
+
+
+class CompanyAssetForecast(models.Model):
+    """Projected service of an asset."""
+    _name = 'company.asset.forecast'
+    _description = 'Asset Service Forecast'
+    _order = 'date, asset_id'
+    _rec_name = 'asset_id'
+
+    asset_id = fields.Many2one('company.asset', string='Asset', required=True, readonly=True, ondelete='cascade', index=True)
+    category = fields.Selection(selection=lambda self: self.env['company.asset']._fields['category'].selection,
+                                readonly=True, index=True)
+    company_id = fields.Many2one('res.company', string='Company', required=True, readonly=True, index=True)
+    date = fields.Date(string='Planned Date', required=True, readonly=True, index=True,
+                       help='Projected service date; overdue services are planned today.')
+    due_date = fields.Date(string='Due Date', readonly=True)
+    is_overdue = fields.Boolean(string='Overdue', readonly=True)
+
+    @api.model
+    @instrument()
+    def _refresh(self, asset_ids=None):
+        """Rebuild the forecast rows of ``asset_ids``, or of every asset when None.
+
+        Each asset not retired is due on its next service date (today when overdue),
+        then every ``service_interval_months`` until the horizon.
+        """
+        if asset_ids is not None:
+            asset_ids = sorted({aid for aid in asset_ids if aid})
+            if not asset_ids:
+                return
+        self.env['company.asset'].flush_model(['category', 'company_id', 'status', 'service_interval_months', 'next_service_date'])
+        today = fields.Date.context_today(self)
+        params = {
+            'today': today,
+            'horizon': today + relativedelta(months=FORECAST_MONTHS),
+            'months': FORECAST_MONTHS,
+            'uid': self.env.uid,
+        }
+        if asset_ids is None:
+            self.env.cr.execute("DELETE FROM company_asset_forecast")
+            self._insert_forecast("", params)
+        else:
+            for batch in split_every(FORECAST_BATCH_SIZE, asset_ids, list):
+                self.env.cr.execute("DELETE FROM company_asset_forecast WHERE asset_id = ANY(%s)", [batch])
+                self._insert_forecast("AND a.id = ANY(%(assets)s)", dict(params, assets=batch))
+        self.invalidate_model()
+
+    def _insert_forecast(self, where, params):
+        self.env.cr.execute(f"""
+            INSERT INTO company_asset_forecast (asset_id, category, company_id, date, due_date, is_overdue,
+                                                create_uid, create_date, write_uid, write_date)
+            SELECT a.id, a.category, a.company_id, o.date,
+                   CASE WHEN o.k = 0 THEN a.next_service_date ELSE o.date END,
+                   o.k = 0 AND a.next_service_date < %(today)s,
+                   %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM company_asset a
+        CROSS JOIN LATERAL (
+                   SELECT k, (GREATEST(a.next_service_date, %(today)s)
+                              + make_interval(months => k * a.service_interval_months))::date AS date
+                     FROM generate_series(0, %(months)s / a.service_interval_months) AS k
+                   ) o
+             WHERE a.status != 'retired'
+               AND a.next_service_date IS NOT NULL
+               AND a.service_interval_months > 0
+               AND o.date < %(horizon)s
+               {where}
+        """, params)
+
+    @api.model
+    @instrument()
+    def _cron_refresh(self):
+        """Refresh the assets changed since the last run; rebuild everything on a new day.
+
+        Service changes reach the assets through the stored ``next_service_date``,
+        whose recompute updates their ``write_date``; deleted assets cascade. The
+        watermark is the start of this transaction (the clock of ``write_date``) and
+        is rescanned with an overlap of ``FORECAST_REFRESH_OVERLAP``.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        now = self.env.cr.now()
+        last = fields.Datetime.to_datetime(params.get_param(FORECAST_REFRESH_PARAM) or False)
+        if last and last.date() == now.date():
+            self.env.cr.execute("SELECT id FROM company_asset WHERE write_date >= %s",
+                                [last - FORECAST_REFRESH_OVERLAP])
+            self._refresh([row[0] for row in self.env.cr.fetchall()])
+        else:
+            self._refresh()
+        params.set_param(FORECAST_REFRESH_PARAM, fields.Datetime.to_string(now))
+        return True
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    def unlink(self):
+        """Unassign the employees' assets first, so their open assignments are closed.
+
+        The history rows of the deleted employees are kept with an empty employee.
+        """
+        assets = self.env['company.asset'].sudo().search([('employee_id', 'in', self.ids)])
+        assets.write({'employee_id': False})
+        return super().unlink()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import base64
+from urllib.parse import quote
+
+from odoo import api, models
+from odoo.tools.lru import LRU
+
+# Labels per A4 sheet (3 columns x 8 rows of 70 x 37 mm)
+LABELS_PER_PAGE = 24
+# Barcode images kept by the per-worker cache
+BARCODE_CACHE_SIZE = 20000
+# Route opened by the QR code of a label
+SCAN_ROUTE = '/company_asset/scan?code='
+
+# Rendered barcodes per worker: {(type, value, width, height): data URI}
+_barcode_cache = LRU(BARCODE_CACHE_SIZE)
+
+
+class ReportAssetLabel(models.AbstractModel):
+    """Data provider for the asset labels.
+
+    Barcode images are rendered in the worker and embedded as data URIs, so
+    wkhtmltopdf does not call back the server once per label; they only depend on
+    their value and are cached across chunks, reprints and job retries.
+    """
+    _name = 'report.company_asset_manager.report_asset_label'
+    _description = 'Asset Label Report'
+
+    @api.model
+    def _barcode_uri(self, barcode_type, value, width, height):
+        key = (barcode_type, value, width, height)
+        uri = _barcode_cache.get(key)
+        if uri is None:
+            png = self.env['ir.actions.report'].barcode(barcode_type, value, width=width, height=height, humanreadable=0)
+            uri = _barcode_cache[key] = 'data:image/png;base64,' + base64.b64encode(png).decode()
+        return uri
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        assets = self.env['company.asset'].browse(docids)
+        base_url = assets.browse().get_base_url()
+        labels = {}
+        for asset in assets:
+            code = asset._get_label_code()
+            labels[asset.id] = {
+                'code': code,
+                'qr': self._barcode_uri('QR', base_url + SCAN_ROUTE + quote(code, safe=''), 200, 200),
+                'barcode': self._barcode_uri('Code128', code, 600, 100),
+            }
+        return {
+            'doc_ids': assets.ids,
+            'doc_model': 'company.asset',
+            'docs': assets,
+            'labels': labels,
+            'labels_per_page': LABELS_PER_PAGE,
+        }
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_asset_assignment
+from . import test_asset_forecast
+from . import test_asset_labels
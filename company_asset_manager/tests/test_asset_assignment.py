@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+from freezegun import freeze_time
+
+from odoo.modules.migration import load_script
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestAssetAssignment(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Assignment = cls.env['company.asset.assignment']
+        cls.alice = cls.env['hr.employee'].create({'name': 'Alice Asset'})
+        cls.bob = cls.env['hr.employee'].create({'name': 'Bob Asset'})
+
+    def _create_asset(self, **vals):
+        return self.env['company.asset'].create(dict({'name': 'Laptop', 'category': 'laptop'}, **vals))
+
+    def _periods(self, asset):
+        history = self.Assignment.search([('asset_id', '=', asset.id)], order='date_from, id')
+        return [(row.employee_id, row.date_from, row.date_to) for row in history]
+
+    def test_reassignments_record_periods(self):
+        with freeze_time('2025-01-01 09:00:00'):
+            asset = self._create_asset(employee_id=self.alice.id)
+        with freeze_time('2025-03-01 09:00:00'):
+            asset.employee_id = self.bob
+            # Writing the same employee again opens no new period
+            asset.write({'employee_id': self.bob.id})
+        with freeze_time('2025-06-01 09:00:00'):
+            asset.employee_id = False
+        self.assertEqual(self._periods(asset), [
+            (self.alice, datetime(2025, 1, 1, 9), datetime(2025, 3, 1, 9)),
+            (self.bob, datetime(2025, 3, 1, 9), datetime(2025, 6, 1, 9)),
+        ])
+
+    def test_holder_queries(self):
+        with freeze_time('2025-01-01 09:00:00'):
+            asset = self._create_asset(employee_id=self.alice.id)
+        with freeze_time('2025-03-01 09:00:00'):
+            asset.employee_id = self.bob
+
+        self.assertEqual(self.Assignment._get_holders_at(asset, '2024-12-31'), {})
+        self.assertEqual(self.Assignment._get_holders_at(asset, '2025-02-01'), {asset.id: self.alice})
+        self.assertEqual(self.Assignment._get_holders_at(asset, datetime(2025, 3, 1, 9)), {asset.id: self.bob})
+
+        held = self.Assignment._get_assets_held_by(self.alice, '2025-02-01', '2025-02-02')
+        self.assertEqual(held.asset_id, asset)
+        self.assertFalse(self.Assignment._get_assets_held_by(self.alice, '2025-04-01'))
+        self.assertEqual(self.Assignment._get_assets_held_by(self.bob).asset_id, asset)
+
+    def test_employee_deletion_keeps_history(self):
+        with freeze_time('2025-01-01 09:00:00'):
+            asset = self._create_asset(employee_id=self.alice.id)
+        with freeze_time('2025-05-01 09:00:00'):
+            self.alice.unlink()
+        self.assertFalse(asset.employee_id)
+        self.assertEqual(self._periods(asset), [
+            (self.env['hr.employee'], datetime(2025, 1, 1, 9), datetime(2025, 5, 1, 9)),
+        ])
+
+    def test_backfill_migration(self):
+        with freeze_time('2025-03-01 09:00:00'):
+            asset = self._create_asset(employee_id=self.alice.id)
+            asset.employee_id = self.bob
+            # Tracking values are written before commit
+            self.env.flush_all()
+            self.env.cr.precommit.run()
+        untracked = self._create_asset(name='Phone', category='phone', employee_id=self.bob.id)
+        self.env.cr.execute("UPDATE company_asset SET create_date = %s WHERE id = %s", ['2025-01-01 09:00:00', asset.id])
+        # Databases upgraded from 1.0.x have no history yet
+        self.Assignment.search([('asset_id', 'in', (asset + untracked).ids)]).unlink()
+        self.env.flush_all()
+        self.env.invalidate_all()
+
+        migration = load_script('company_asset_manager/migrations/1.1.0/post-migrate.py', 'company_asset_manager_migrate_1_1_0')
+        migration.migrate(self.env.cr, '1.0.0')
+        self.env.invalidate_all()
+
+        self.assertEqual(self._periods(asset), [
+            (self.alice, datetime(2025, 1, 1, 9), datetime(2025, 3, 1, 9)),
+            (self.bob, datetime(2025, 3, 1, 9), False),
+        ])
+        # Assets never reassigned are opened from their creation date
+        self.assertEqual(self._periods(untracked), [(self.bob, untracked.create_date, False)])
+        # Assets with history are left alone, so the backfill can run again
+        self.assertEqual(self.Assignment._backfill_from_tracking(), 0)
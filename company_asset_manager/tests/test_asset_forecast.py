@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from .. import post_init_hook
+from ..models.asset_forecast import FORECAST_REFRESH_PARAM
+
+
+@tagged('post_install', '-at_install')
+class TestAssetForecast(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Forecast = cls.env['company.asset.forecast']
+        cls.today = fields.Date.context_today(cls.Forecast)
+        cls.asset = cls._create_asset(purchase_date=cls.today - relativedelta(months=2))
+        cls.overdue = cls._create_asset(name='Old Phone', category='phone', purchase_date=cls.today - relativedelta(months=8))
+        cls.retired = cls._create_asset(name='Retired', status='retired', purchase_date=cls.today)
+        cls.no_interval = cls._create_asset(name='No Interval', service_interval_months=0, purchase_date=cls.today)
+
+    @classmethod
+    def _create_asset(cls, **vals):
+        return cls.env['company.asset'].create(dict({'name': 'Laptop', 'category': 'laptop', 'service_interval_months': 6}, **vals))
+
+    def _rows(self, asset):
+        rows = self.Forecast.search([('asset_id', '=', asset.id)])
+        return [(row.date, row.due_date, row.is_overdue) for row in rows]
+
+    def _set_param(self, value):
+        self.env['ir.config_parameter'].sudo().set_param(FORECAST_REFRESH_PARAM, value)
+
+    def test_refresh_projects_services(self):
+        self.Forecast._refresh()
+        next_date = self.asset.next_service_date
+        self.assertEqual(self._rows(self.asset), [
+            (next_date, next_date, False),
+            (next_date + relativedelta(months=6), next_date + relativedelta(months=6), False),
+        ], 'every interval until the 12-month horizon')
+        # Overdue services are planned today, the next ones one interval later
+        self.assertEqual(self._rows(self.overdue), [
+            (self.today, self.overdue.next_service_date, True),
+            (self.today + relativedelta(months=6), self.today + relativedelta(months=6), False),
+        ])
+        self.assertFalse(self._rows(self.retired))
+        self.assertFalse(self._rows(self.no_interval))
+        self.assertEqual(self.Forecast.search([('asset_id', '=', self.overdue.id)], limit=1).category, 'phone')
+
+    def test_refresh_given_assets(self):
+        self.Forecast._refresh()
+        (self.asset + self.overdue).write({'service_interval_months': 12})
+        self.Forecast._refresh([self.asset.id, False])
+        self.assertEqual(len(self._rows(self.asset)), 1)
+        self.assertEqual(len(self._rows(self.overdue)), 2, 'assets not given keep their rows')
+        self.asset.status = 'retired'
+        self.Forecast._refresh([self.asset.id])
+        self.assertFalse(self._rows(self.asset))
+
+    def test_cron_watermark(self):
+        self.Forecast._cron_refresh()
+        now = self.env.cr.now()
+        self.assertEqual(self.env['ir.config_parameter'].sudo().get_param(FORECAST_REFRESH_PARAM),
+                         fields.Datetime.to_string(now))
+        self.assertTrue(self._rows(self.asset))
+
+        # Same day: only the assets written since the watermark (minus the overlap) are refreshed
+        self.env.flush_all()
+        self.env.cr.execute("UPDATE company_asset SET write_date = %s WHERE id = %s",
+                            [now - timedelta(hours=3), self.overdue.id])
+        self.env.cr.execute("DELETE FROM company_asset_forecast WHERE asset_id IN %s",
+                            [(self.asset.id, self.overdue.id)])
+        self.Forecast.invalidate_model()
+        self.Forecast._cron_refresh()
+        self.assertTrue(self._rows(self.asset))
+        self.assertFalse(self._rows(self.overdue))
+
+        # First run of a day: everything is rebuilt
+        self._set_param(fields.Datetime.to_string(now - timedelta(days=1)))
+        self.Forecast._cron_refresh()
+        self.assertTrue(self._rows(self.overdue))
+
+    def test_install_fills_forecast(self):
+        self.env.cr.execute("DELETE FROM company_asset_forecast")
+        self._set_param(False)
+        self.Forecast.invalidate_model()
+        post_init_hook(self.env)
+        self.assertEqual(len(self._rows(self.asset)), 2)
+        self.assertTrue(self.env['ir.config_parameter'].sudo().get_param(FORECAST_REFRESH_PARAM))
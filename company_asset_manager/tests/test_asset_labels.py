@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+from urllib.parse import quote
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools.lru import LRU
+
+from ..models import asset as asset_module
+from ..report import asset_label_report
+
+REPORT = 'company_asset_manager.report_asset_label'
+
+
+@tagged('post_install', '-at_install')
+class TestAssetLabels(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Asset = cls.env['company.asset']
+        cls.serial = cls.Asset.create({'name': 'Label Laptop', 'category': 'laptop', 'serial_no': 'SN 42/A'})
+        cls.plain = cls.Asset.create({'name': 'Label Phone', 'category': 'phone'})
+
+    def setUp(self):
+        super().setUp()
+        self.barcodes = []
+        self.startPatcher(patch.object(asset_label_report, '_barcode_cache', LRU(100)))
+        self.startPatcher(patch.object(type(self.env['ir.actions.report']), 'barcode',
+                                       lambda report, barcode_type, value, **kwargs: self.barcodes.append((barcode_type, value)) or b'png'))
+
+    def test_label_codes(self):
+        self.assertEqual(self.serial._get_label_code(), 'SN 42/A')
+        self.assertEqual(self.plain._get_label_code(), 'ASSET-%s' % self.plain.id)
+        self.assertEqual(self.Asset._find_by_label_code(' SN 42/A '), self.serial)
+        self.assertEqual(self.Asset._find_by_label_code('ASSET-%s' % self.plain.id), self.plain)
+        for code in ('', None, 'ASSET-x', 'SN 42'):
+            self.assertFalse(self.Asset._find_by_label_code(code))
+
+    def test_search_by_label_code(self):
+        self.assertEqual(self.Asset.search([('display_name', 'ilike', 'ASSET-%s' % self.plain.id)]), self.plain)
+        self.assertEqual(self.Asset.name_search('SN 42/A'), [(self.serial.id, self.serial.display_name)])
+        # Other values keep the ilike over name and serial number
+        self.assertIn(self.serial, self.Asset.search([('display_name', 'ilike', 'SN 42')]))
+
+    def test_report_values(self):
+        Report = self.env['report.%s' % REPORT]
+        values = Report._get_report_values((self.serial + self.plain).ids)
+        label = values['labels'][self.serial.id]
+        self.assertEqual(label['code'], 'SN 42/A')
+        self.assertEqual(label['barcode'], 'data:image/png;base64,cG5n')
+        self.assertEqual(values['labels'][self.plain.id]['code'], 'ASSET-%s' % self.plain.id)
+        base_url = self.Asset.get_base_url()
+        self.assertIn(('QR', base_url + '/company_asset/scan?code=' + quote('SN 42/A', safe='')), self.barcodes)
+        self.assertEqual(len(self.barcodes), 4)
+        # Reprints reuse the rendered images
+        Report._get_report_values(self.serial.ids)
+        self.assertEqual(len(self.barcodes), 4)
+
+    def test_page_breaks(self):
+        assets = self.Asset.create([{'name': 'Sheet %s' % i, 'category': 'other'} for i in range(23)])
+        for records, breaks in ((assets[:22] + self.serial + self.plain, 0), (assets + self.serial + self.plain, 1)):
+            html, __ = self.env['ir.actions.report']._render_qweb_html(REPORT, records.ids)
+            self.assertEqual(html.count(b'page-break-after: always'), breaks, '%s labels' % len(records))
+
+    def test_print_labels(self):
+        assets = self.serial + self.plain
+        action = assets.action_print_labels()
+        self.assertEqual((action['type'], action['report_name']), ('ir.actions.report', REPORT))
+        self.assertFalse(self.Asset.action_print_labels())
+
+        with patch.object(asset_module, 'LABEL_BACKGROUND_THRESHOLD', 1):
+            action = assets.action_print_labels()
+        job = self.env['bg.job'].browse(action['res_id'])
+        self.assertEqual(action['res_model'], 'bg.job')
+        self.assertRecordValues(job, [{
+            'method': '_render_labels', 'res_model': 'company.asset', 'res_ids': assets.ids,
+            'chunk_size': asset_module.LABEL_CHUNK_SIZE, 'result_type': 'pdf', 'state': 'pending',
+        }])
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
+from odoo.addons.base_tools_lite.tools import instrument
 
 
 class AssetAssignWizard(models.TransientModel):
@@ -10,11 +11,12 @@ class AssetAssignWizard(models.TransientModel):
     employee_id = fields.Many2one('hr.employee', string='Employee', required=True)
     note = fields.Text(string='Note')
 
+    @instrument()
     def action_confirm(self):
         self.ensure_one()
         asset = self.asset_id
         old_emp = asset.employee_id
-        asset.write({'employee_id': self.employee_id.id})
+        asset.with_context(asset_assignment_note=self.note).write({'employee_id': self.employee_id.id})
         message = _('Asset assigned to %s') % (self.employee_id.name)
         if self.note:
             message += _('\nNote: %s') % self.note
@@ -7,7 +7,7 @@
     'license': 'LGPL-3',
     'author': 'Roksana Piwowarczyk',
     'website': 'https://example.com/helpdesk_lite',
-    'depends': ['base', 'mail', 'portal', 'contacts'],
+    'depends': ['base', 'mail', 'portal', 'contacts', 'base_tools_lite'],
     'data': [
         'security/helpdesk_security.xml',
         'security/ir.model.access.csv',
@@ -18,6 +18,7 @@
         'report/helpdesk_ticket_report.xml',
         'report/helpdesk_ticket_report_actions.xml',
         'data/mail_template.xml',
+        'data/mail_alias.xml',
         'data/cron.xml',
         'data/server_actions.xml',
         'portal/portal_views.xml',
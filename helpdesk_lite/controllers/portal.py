@@ -2,13 +2,30 @@
 """Helpdesk Lite portal controllers.
 
 Expose minimal portal pages to list, view, and create helpdesk tickets.
+
+The listing and ticket pages answer conditional GETs: their weak ETag hashes the
+change stamp of the displayed tickets (see ``helpdesk.ticket._portal_*_stamp``)
+with what the surrounding layout depends on, and a matching ``If-None-Match``
+gets a 304 before anything is rendered. The ticket table and card are kept in a
+per-worker fragment cache keyed on the same stamp, so other sessions seeing the
+same content skip the searches and the rendering of the fragment.
 """
+import hashlib
+
 from odoo import http, _
 from odoo.http import request
+from odoo.tools.lru import LRU
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+from odoo.addons.base_tools_lite.tools import instrument, replica_env, replica_readonly
 
 # Default page size for portal ticket listings
 PAGE_SIZE = 20
+# Rendered fragments kept per worker
+FRAGMENT_CACHE_SIZE = 1000
+
+# Rendered portal fragments per worker: {key: value}; keys hold the change stamps,
+# so outdated entries are never hit and age out of the LRU
+_fragment_cache = LRU(FRAGMENT_CACHE_SIZE)
 
 
 class HelpdeskPortal(CustomerPortal):
@@ -18,21 +35,54 @@ class HelpdeskPortal(CustomerPortal):
     a record view route, and a simple ticket creation form.
     """
 
+    @instrument()
     def _prepare_home_portal_values(self, counters):
         """Inject helpdesk ticket counter on the portal home."""
         values = super()._prepare_home_portal_values(counters)
         if 'helpdesk_count' in counters:
             partner = request.env.user.partner_id
-            count = request.env['helpdesk.ticket'].sudo().search_count([
-                ('partner_id', '=', partner.id)
-            ])
+            with replica_env(request.env) as env:
+                count = env['helpdesk.ticket'].sudo().search_count([
+                    ('partner_id', '=', partner.id)
+                ])
             values['helpdesk_count'] = count
         return values
 
-    @http.route(['/my/helpdesk', '/my/helpdesk/page/<int:page>'], type='http', auth='user', website=True)
+    def _helpdesk_fragment_key(self, *values):
+        """Cache key of a fragment showing ``values``, in this database, language and templates."""
+        env = request.env
+        return (env.cr.dbname, env.registry.registry_sequence, env.registry.cache_sequences.get('templates'),
+                env.lang) + values
+
+    def _helpdesk_conditional_response(self, fragment_key, last_modified, render):
+        """Return 304 when the client has the current page, else ``render()``, tagged with its ETag.
+
+        Args:
+            fragment_key: key of the page content (see ``_helpdesk_fragment_key``).
+            last_modified: datetime of the last change of the content, or None.
+            render: callable returning the full response.
+        """
+        user = request.env.user
+        # The layout shows the user and embeds the session's CSRF token
+        etag = hashlib.sha256(repr((
+            fragment_key, user.id, user.partner_id.write_date, request.session.sid,
+        )).encode()).hexdigest()[:32]
+        if request.httprequest.if_none_match.contains_weak(etag):
+            response = request.make_response('', status=304)
+        else:
+            response = render()
+        response.set_etag(etag, weak=True)
+        # Always revalidate, never shared by proxies
+        response.headers['Cache-Control'] = 'private, no-cache'
+        if last_modified:
+            response.last_modified = last_modified
+        return response
+
+    @http.route(['/my/helpdesk', '/my/helpdesk/page/<int:page>'], type='http', auth='user', website=True,
+                readonly=replica_readonly)
+    @instrument()
     def portal_my_helpdesk(self, page=1, sortby='date', stage=None, priority=None, **kw):
         """List the current user's tickets with basic filters and sorting."""
-        values = self._prepare_portal_layout_values()
         partner = request.env.user.partner_id
         Helpdesk = request.env['helpdesk.ticket'].sudo()
         domain = [('partner_id', '=', partner.id)]
@@ -49,42 +99,68 @@ class HelpdeskPortal(CustomerPortal):
         }
         order = sort_options.get(sortby, sort_options['date'])['order']
 
-        tickets_count = Helpdesk.search_count(domain)
-        pager = portal_pager(
-            url='/my/helpdesk',
-            total=tickets_count,
-            page=page,
-            step=PAGE_SIZE,
-            url_args={
+        stamp = Helpdesk._portal_partner_stamp(partner.id)
+        key = self._helpdesk_fragment_key('portal_my_helpdesk', partner.id, stamp, stage, priority, order, page)
+
+        def render():
+            def make_pager(total):
+                return portal_pager(
+                    url='/my/helpdesk',
+                    total=total,
+                    page=page,
+                    step=PAGE_SIZE,
+                    url_args={
+                        'sortby': sortby,
+                        'stage': stage or '',
+                        'priority': priority or '',
+                    },
+                )
+
+            cached = _fragment_cache.get(key)
+            if cached is None:
+                tickets_count = Helpdesk.search_count(domain)
+                tickets = Helpdesk.search(domain, limit=PAGE_SIZE, offset=make_pager(tickets_count)['offset'], order=order)
+                table = request.env['ir.qweb']._render('helpdesk_lite.portal_my_helpdesk_table', {'tickets': tickets})
+                cached = _fragment_cache[key] = (tickets_count, table)
+            tickets_count, table = cached
+
+            values = self._prepare_portal_layout_values()
+            values.update({
+                'tickets_table': table,
+                'page_name': 'helpdesk',
+                'pager': make_pager(tickets_count),
+                'default_url': '/my/helpdesk',
                 'sortby': sortby,
-                'stage': stage or '',
-                'priority': priority or '',
-            },
-        )
-        tickets = Helpdesk.search(domain, limit=PAGE_SIZE, offset=pager['offset'], order=order)
-
-        values.update({
-            'tickets': tickets,
-            'page_name': 'helpdesk',
-            'pager': pager,
-            'default_url': '/my/helpdesk',
-            'sortby': sortby,
-            'sort_options': sort_options,
-            'selected_stage': stage,
-            'selected_priority': priority,
-        })
-        return request.render('helpdesk_lite.portal_my_helpdesk', values)
+                'sort_options': sort_options,
+                'selected_stage': stage,
+                'selected_priority': priority,
+            })
+            return request.render('helpdesk_lite.portal_my_helpdesk', values)
+
+        return self._helpdesk_conditional_response(key, stamp[1], render)
 
     @http.route(['/my/helpdesk/<int:ticket_id>'], type='http', auth='user', website=True)
+    @instrument()
     def portal_helpdesk_ticket(self, ticket_id, **kw):
         """Display a single ticket ensuring it belongs to the current user."""
         partner = request.env.user.partner_id
         ticket = request.env['helpdesk.ticket'].sudo().browse(ticket_id)
         if not ticket.exists() or ticket.partner_id.id != partner.id:
             return request.redirect('/my')
-        return request.render('helpdesk_lite.portal_helpdesk_ticket', {'ticket': ticket})
+        write_date, __, last_message = stamp = ticket._portal_ticket_stamp()
+        key = self._helpdesk_fragment_key('portal_helpdesk_ticket', ticket.id, stamp)
+
+        def render():
+            card = _fragment_cache.get(key)
+            if card is None:
+                card = _fragment_cache[key] = request.env['ir.qweb']._render(
+                    'helpdesk_lite.portal_helpdesk_ticket_card', {'ticket': ticket})
+            return request.render('helpdesk_lite.portal_helpdesk_ticket', {'ticket': ticket, 'ticket_card': card})
+
+        return self._helpdesk_conditional_response(key, max(filter(None, (write_date, last_message))), render)
 
     @http.route(['/my/helpdesk/create'], type='http', auth='user', website=True, methods=['GET', 'POST'])
+    @instrument()
     def portal_create_helpdesk(self, **post):
         """Create a ticket from the portal (very small form)."""
         partner = request.env.user.partner_id
@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
+from . import fetchmail_server
 from . import helpdesk_ticket
+from . import res_partner
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+from .helpdesk_ticket import gateway_partner_cache
+
+
+class FetchmailServer(models.Model):
+    _inherit = 'fetchmail.server'
+
+    def fetch_mail(self):
+        """Fetch with the helpdesk partner lookups shared across the fetched emails."""
+        with gateway_partner_cache():
+            return super().fetch_mail()
@@ -1,20 +1,54 @@
 # -*- coding: utf-8 -*-
 """Helpdesk Lite models.
 
-Provides a simple helpdesk ticket model with portal support, CSV export, and SLA checks.
+Provides a simple helpdesk ticket model with portal support, CSV export, SLA checks
+and an inbound email gateway.
 """
 
 import base64
 import csv
 import io
 import logging
+import re
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError, AccessError
+from odoo.tools import email_normalize, email_split, email_split_and_format, html2plaintext
+from odoo.addons.base_tools_lite.tools import instrument, replica_env
 
 _logger = logging.getLogger(__name__)
 
+# Exports above this many tickets run as a background job
+EXPORT_BACKGROUND_THRESHOLD = 2000
+# Tickets per background export chunk
+EXPORT_CHUNK_SIZE = 1000
+# Tickets per committed chunk of the SLA overdue notifications
+SLA_CHUNK_SIZE = 200
+# Ticket token in email subjects, e.g. "Re: Printer jam [HD#42]"
+TICKET_TOKEN = '[HD#%s]'
+TICKET_TOKEN_RE = re.compile(r'\[HD#(\d+)\]')
+
+# Partners resolved by the mail gateway during a fetch: {email_normalized: partner id or False}
+_gateway_partner_cache = threading.local()
+
+
+@contextmanager
+def gateway_partner_cache():
+    """Share the partner lookups of the mail gateway across the emails of one fetch.
+
+    Incoming mail servers process and commit fetched emails one by one; inside this
+    context ``_mail_gateway_partners`` only queries the addresses not seen in an
+    earlier email of the fetch.
+    """
+    _gateway_partner_cache.partners = {}
+    try:
+        yield
+    finally:
+        del _gateway_partner_cache.partners
+
 
 class HelpdeskTicket(models.Model):
     """Basic helpdesk/ticket model for Odoo Community.
@@ -25,16 +59,19 @@ class HelpdeskTicket(models.Model):
     - SLA overdue cron helper
     - Email notification on stage change
     - CSV export action for managers
+    - Inbound email gateway (message_new/message_update) with subject token matching
     """
 
     _name = 'helpdesk.ticket'
     _description = 'Helpdesk Ticket'
     _inherit = ['mail.thread', 'mail.activity.mixin', 'portal.mixin']
     _order = 'priority desc, id desc'
+    _primary_email = 'email_from'
 
     name = fields.Char(string='Title', required=True, tracking=True)
     description = fields.Text(string='Description')
     partner_id = fields.Many2one('res.partner', string='Customer', tracking=True)
+    email_from = fields.Char(string='Email', help='Sender of the email the ticket was created from.')
     assignee_id = fields.Many2one('res.users', string='Assignee', tracking=True)
     priority = fields.Selection(
         selection=[('0', 'Low'), ('1', 'Normal'), ('2', 'High')],
@@ -57,6 +94,12 @@ class HelpdeskTicket(models.Model):
     sla_deadline = fields.Datetime(string='SLA Deadline')
     closed_date = fields.Datetime(string='Closed Date', copy=False)
 
+    def init(self):
+        # Portal listings filter on the customer; with write_date in the index, the
+        # change stamp of a customer's tickets is an index-only scan.
+        tools.create_index(self._cr, 'helpdesk_ticket_partner_write_date_idx',
+                           self._table, ['partner_id', 'write_date'])
+
     # ---------------------------------------------------------------------
     # COMPUTES / CONSTRAINTS / ONCHANGE
     # ---------------------------------------------------------------------
@@ -71,6 +114,7 @@ class HelpdeskTicket(models.Model):
             if not ticket.name or len(ticket.name.strip()) <= 3:
                 raise ValidationError(_('The ticket title must be longer than 3 characters.'))
 
+    @instrument()
     def _compute_attachment_count(self) -> None:
         """Compute the number of attachments per ticket using read_group."""
         # Using read_group for batch compute
@@ -91,6 +135,7 @@ class HelpdeskTicket(models.Model):
             if ticket.stage == 'done' and not ticket.closed_date:
                 ticket.closed_date = fields.Datetime.now()
 
+    @instrument()
     def write(self, vals) -> bool:
         """Write changes to tickets and notify on stage change.
 
@@ -118,7 +163,8 @@ class HelpdeskTicket(models.Model):
                     if ticket.stage == 'done' and not ticket.closed_date:
                         ticket.closed_date = fields.Datetime.now()
                     try:
-                        template.send_mail(ticket.id, force_send=True)
+                        # The mail gateway queues the notification instead of sending it while fetching
+                        template.send_mail(ticket.id, force_send=not self.env.context.get('fetchmail_cron_running'))
                     except Exception:
                         # avoid breaking write due to email errors
                         pass
@@ -133,9 +179,144 @@ class HelpdeskTicket(models.Model):
         for ticket in self:
             ticket.access_url = '/my/helpdesk/%s' % ticket.id
 
+    @api.model
+    def _portal_partner_stamp(self, partner_id):
+        """Change stamp of a customer's tickets, for portal HTTP and fragment caching.
+
+        Returns:
+            tuple: (ticket count, last write_date, sum of write_date epochs). The sum
+            also moves when a ticket committed after a newer one keeps an older
+            write_date, which the maximum alone would miss.
+        """
+        self.flush_model(['partner_id'])
+        self.env.cr.execute("""
+            SELECT count(*), max(write_date), sum(extract(epoch FROM write_date))
+              FROM helpdesk_ticket
+             WHERE partner_id = %s
+        """, [partner_id])
+        return self.env.cr.fetchone()
+
+    def _portal_ticket_stamp(self):
+        """Change stamp of this ticket and its messages, for portal HTTP and fragment caching.
+
+        Returns:
+            tuple: (ticket write_date, message count, last message write_date).
+        """
+        self.ensure_one()
+        self.env.cr.execute("""
+            SELECT t.write_date, count(m.id), max(m.write_date)
+              FROM helpdesk_ticket t
+         LEFT JOIN mail_message m ON m.model = %s AND m.res_id = t.id
+             WHERE t.id = %s
+          GROUP BY t.id
+        """, [self._name, self.id])
+        return self.env.cr.fetchone()
+
+    # ---------------------------------------------------------------------
+    # MAIL GATEWAY
+    # ---------------------------------------------------------------------
+    def _message_compute_subject(self):
+        """Add the ticket token so that replies are matched even without mail headers."""
+        return '%s %s' % (super()._message_compute_subject(), TICKET_TOKEN % self.id)
+
+    @api.model
+    def _mail_gateway_partners(self, msg_dict, create_author=True):
+        """Resolve the sender and the Cc'd addresses of an incoming email in one query.
+
+        During a fetch (``gateway_partner_cache``) addresses already resolved for an
+        earlier email are not queried again.
+
+        Args:
+            msg_dict: Parsed email, as given to message_new/message_update.
+            create_author: Create a contact for an unknown sender.
+
+        Returns:
+            tuple: (sender partner, Cc'd partners); the sender may be an empty recordset.
+        """
+        Partner = self.env['res.partner']
+        cache = getattr(_gateway_partner_cache, 'partners', None)
+        if cache is None:
+            cache = {}
+        author = Partner.browse(msg_dict.get('author_id') or [])
+        sender = email_normalize(msg_dict.get('email_from') or '')
+        cc_emails = {email_normalize(email) for email in email_split(msg_dict.get('cc') or '')} - {False, sender}
+        emails = cc_emails | ({sender} if sender and not author else set())
+        missing = emails - cache.keys()
+        if missing:
+            found = {}
+            # lowest id first, as the gateway does when several contacts share an address
+            for partner in Partner.search([('email_normalized', 'in', list(missing))], order='id desc'):
+                found[partner.email_normalized] = partner.id
+            cache.update({email: found.get(email, False) for email in missing})
+        if not author and sender:
+            author = Partner.browse(cache[sender] or [])
+            if not author and create_author:
+                author = Partner.browse(Partner.name_create(email_split_and_format(msg_dict['email_from'])[0])[0])
+                # not cached: the email's transaction may still be rolled back
+                del cache[sender]
+        return author, Partner.browse([cache[email] for email in cc_emails if cache[email]])
+
+    @api.model
+    def _mail_gateway_ticket_from_subject(self, msg_dict):
+        """Ticket named by the subject token, if the sender is its customer or a follower.
+
+        Replies are matched on their In-Reply-To/References headers first (indexed
+        ``mail_message.message_id``); the token is the fallback for mail clients that drop
+        those headers. Tokens are guessable, hence the sender check.
+        """
+        match = TICKET_TOKEN_RE.search(msg_dict.get('subject') or '')
+        sender = email_normalize(msg_dict.get('email_from') or '')
+        if not match or not sender:
+            return self.browse()
+        ticket = self.browse(int(match.group(1))).exists()
+        if not ticket:
+            return ticket
+        known = {ticket.partner_id.email_normalized, email_normalize(ticket.email_from or '')}
+        known.update(ticket.message_partner_ids.mapped('email_normalized'))
+        return ticket if sender in known else self.browse()
+
+    @api.model
+    @instrument()
+    def message_new(self, msg_dict, custom_values=None):
+        """Create a ticket from an email sent to the helpdesk alias.
+
+        Emails carrying the token of an existing ticket are routed to it instead. The
+        sender becomes the customer (a contact is created if unknown) and follows the
+        ticket with the Cc'd contacts.
+        """
+        ticket = self._mail_gateway_ticket_from_subject(msg_dict)
+        if ticket:
+            ticket.message_update(msg_dict)
+            return ticket
+        author, cc_partners = self._mail_gateway_partners(msg_dict)
+        subject = (msg_dict.get('subject') or '').strip()
+        values = {
+            'name': subject if len(subject) > 3 else _('Email from %(sender)s', sender=msg_dict.get('email_from') or '-'),
+            'description': html2plaintext(msg_dict.get('body') or ''),
+            'partner_id': author.id,
+            'email_from': msg_dict.get('email_from'),
+            'channel': 'email',
+            **(custom_values or {}),
+        }
+        ticket = super().message_new(msg_dict, custom_values=values)
+        if author | cc_partners:
+            ticket.message_subscribe(partner_ids=(author | cc_partners).ids)
+        return ticket
+
+    @instrument()
+    def message_update(self, msg_dict, update_vals=None):
+        """Reopen waiting or done tickets when their customer answers by email."""
+        author = self._mail_gateway_partners(msg_dict, create_author=False)[0]
+        if author:
+            reopened = self.filtered(lambda t: t.stage in ('waiting', 'done') and t.partner_id == author)
+            if reopened:
+                reopened.write({'stage': 'in_progress', 'closed_date': False})
+        return super().message_update(msg_dict, update_vals=update_vals)
+
     # ---------------------------------------------------------------------
     # ACTIONS / REPORTING HELPERS
     # ---------------------------------------------------------------------
+    @instrument()
     def action_start_progress(self):
         """Set ticket to In Progress stage.
 
@@ -150,6 +331,7 @@ class HelpdeskTicket(models.Model):
             t.message_post(body=_('Ticket moved to In Progress.'))
         return True
 
+    @instrument()
     def action_put_waiting(self):
         """Set ticket to Waiting stage and post a chatter message."""
         for t in self:
@@ -158,6 +340,7 @@ class HelpdeskTicket(models.Model):
             t.message_post(body=_('Ticket put to Waiting.'))
         return True
 
+    @instrument()
     def action_mark_done(self):
         """Set ticket to Done stage and set Closed Date to now.
 
@@ -215,6 +398,36 @@ class HelpdeskTicket(models.Model):
         ordered = preferred + [n for n in field_names if n not in preferred]
         return ordered
 
+    def _export_csv_chunk(self):
+        """CSV text of these tickets; the header is included unless this is a later job chunk.
+
+        Read from the read replica when one is configured and within the lag tolerance.
+        """
+        field_names = self._get_all_field_names_for_csv()
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if not self.env.context.get('bg_job_offset'):
+            writer.writerow(field_names)
+        with replica_env(self.env) as env:
+            for rec in self.with_env(env).sudo().exists():
+                row = []
+                for name in field_names:
+                    val = rec[name]
+                    # serialize values
+                    if isinstance(val, models.BaseModel):
+                        # Many2one -> display_name/id
+                        if val and val.exists():
+                            row.append('%s' % (val.display_name))
+                        else:
+                            row.append('')
+                    elif isinstance(val, (datetime,)):
+                        row.append(fields.Datetime.to_string(val))
+                    else:
+                        row.append(val if val is not False else '')
+                writer.writerow(row)
+        return buf.getvalue()
+
+    @instrument()
     def action_export_csv(self):
         self.check_access_rights('read')
         # Only managers should be able to trigger via server action; also enforce by group
@@ -224,27 +437,13 @@ class HelpdeskTicket(models.Model):
         records = self
         if not records:
             records = self.search([])
-        field_names = self._get_all_field_names_for_csv()
-        buf = io.StringIO()
-        writer = csv.writer(buf)
-        writer.writerow(field_names)
-        for rec in records.sudo():
-            row = []
-            for name in field_names:
-                val = rec[name]
-                # serialize values
-                if isinstance(val, models.BaseModel):
-                    # Many2one -> display_name/id
-                    if val and val.exists():
-                        row.append('%s' % (val.display_name))
-                    else:
-                        row.append('')
-                elif isinstance(val, (datetime,)):
-                    row.append(fields.Datetime.to_string(val))
-                else:
-                    row.append(val if val is not False else '')
-            writer.writerow(row)
-        data = buf.getvalue().encode('utf-8')
+        # Large exports are written by a background job; its dialog offers the file
+        if len(records) > EXPORT_BACKGROUND_THRESHOLD:
+            return self.env['bg.job']._enqueue(
+                records, '_export_csv_chunk', name=_('Helpdesk ticket CSV export'), chunk_size=EXPORT_CHUNK_SIZE,
+                result_name='helpdesk_tickets.csv', result_mimetype='text/csv',
+            )._action_open()
+        data = records._export_csv_chunk().encode('utf-8')
         attachment = self.env['ir.attachment'].create({
             'name': 'helpdesk_tickets.csv',
             'type': 'binary',
@@ -263,11 +462,25 @@ class HelpdeskTicket(models.Model):
     # CRON
     # ---------------------------------------------------------------------
     @api.model
+    @instrument()
     def _cron_check_sla_overdue(self):
+        """Daily cron: queue the overdue notifications as a chunked background job."""
         now = fields.Datetime.now()
         domain = [('sla_deadline', '!=', False), ('sla_deadline', '<', now), ('stage', '!=', 'done')]
         overdue_tickets = self.search(domain)
-        for t in overdue_tickets:
+        if overdue_tickets:
+            self.env['bg.job']._enqueue(
+                overdue_tickets, '_notify_sla_overdue', name=_('SLA overdue notifications'),
+                kwargs={'now': fields.Datetime.to_string(now)}, chunk_size=SLA_CHUNK_SIZE,
+                identity_key='helpdesk_ticket.sla_overdue',
+            )
+        return True
+
+    @instrument()
+    def _notify_sla_overdue(self, now):
+        """Post the overdue message and schedule the assignee activity (one job chunk)."""
+        now = fields.Datetime.to_datetime(now)
+        for t in self:
             # Post message to chatter
             t.message_post(body=_('SLA deadline is overdue as of %(now)s.', now=now))
             # Schedule activity for assignee
@@ -282,4 +495,3 @@ class HelpdeskTicket(models.Model):
                 except Exception:
                     # ignore activity scheduling issues
                     pass
-        return True
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    def init(self):
+        # The mail gateway resolves senders and Cc'd addresses on email_normalized;
+        # index it unless another module already did.
+        self._cr.execute("""
+            SELECT 1
+              FROM pg_index i
+              JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+             WHERE i.indrelid = 'res_partner'::regclass AND a.attname = 'email_normalized'
+        """)
+        if not self._cr.fetchone():
+            self._cr.execute("CREATE INDEX res_partner_email_normalized_idx ON res_partner (email_normalized)")
@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import test_mail_gateway
+from . import test_portal_cache
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.helpdesk_lite.models.helpdesk_ticket import gateway_partner_cache
+
+MAIL_TEMPLATE = """From: {email_from}
+To: helpdesk@example.com
+Cc: {cc}
+Subject: {subject}
+Message-ID: <{message_id}@example.com>
+Content-Type: text/plain; charset=utf-8
+
+{body}
+"""
+
+
+@tagged('post_install', '-at_install')
+class TestMailGateway(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Ticket = cls.env['helpdesk.ticket']
+        cls.customer = cls.env['res.partner'].create({'name': 'Carol Customer', 'email': 'carol@example.com'})
+        cls.colleague = cls.env['res.partner'].create({'name': 'Dave Colleague', 'email': 'dave@example.com'})
+
+    def _process(self, email_from, subject, cc='', body='Hello', message_id=None):
+        message_id = message_id or 'hd-%s' % abs(hash((email_from, subject, body)))
+        raw = MAIL_TEMPLATE.format(email_from=email_from, cc=cc, subject=subject, message_id=message_id, body=body)
+        return self.Ticket.browse(self.env['mail.thread'].message_process('helpdesk.ticket', raw))
+
+    def test_message_new(self):
+        ticket = self._process('Erin New <erin@example.com>', 'Printer jam', cc='dave@example.com, unknown@example.com')
+        self.assertEqual((ticket.name, ticket.channel, ticket.stage), ('Printer jam', 'email', 'new'))
+        self.assertEqual(ticket.partner_id.email_normalized, 'erin@example.com', 'unknown sender gets a contact')
+        self.assertEqual(ticket.message_partner_ids, ticket.partner_id | self.colleague,
+                         'sender and known Cc contacts follow, unknown Cc addresses are not created')
+        self.assertFalse(self.env['res.partner'].search([('email_normalized', '=', 'unknown@example.com')]))
+
+    def test_message_update_reopens(self):
+        ticket = self._process('Carol Customer <carol@example.com>', 'Broken screen')
+        self.assertEqual(ticket.partner_id, self.customer)
+        ticket.action_mark_done()
+        # Reply without In-Reply-To/References, matched on the subject token
+        routed = self._process('carol@example.com', 'Re: Broken screen [HD#%s]' % ticket.id, body='Still broken')
+        self.assertEqual(routed, ticket)
+        self.assertEqual(ticket.stage, 'in_progress')
+        self.assertFalse(ticket.closed_date)
+        self.assertIn('Still broken', ticket.message_ids[0].body)
+
+    def test_message_update_from_follower_keeps_stage(self):
+        ticket = self._process('carol@example.com', 'Broken screen', cc='dave@example.com')
+        ticket.action_put_waiting()
+        routed = self._process('dave@example.com', 'Re: Broken screen [HD#%s]' % ticket.id, body='Me too')
+        self.assertEqual(routed, ticket, 'followers may use the token')
+        self.assertEqual(ticket.stage, 'waiting', 'only the customer reopens')
+
+    def test_token_from_stranger(self):
+        ticket = self._process('carol@example.com', 'Broken screen')
+        other = self._process('mallory@example.com', 'Re: Broken screen [HD#%s]' % ticket.id, body='Injected')
+        self.assertNotEqual(other, ticket, 'a guessed token opens a new ticket')
+        self.assertEqual(other.partner_id.email_normalized, 'mallory@example.com')
+        self.assertFalse(ticket.message_ids.filtered(lambda m: 'Injected' in (m.body or '')))
+
+    def test_partner_lookup_shared_across_fetch(self):
+        msg_dict = {'email_from': 'carol@example.com', 'cc': 'dave@example.com, unknown@example.com'}
+        with gateway_partner_cache():
+            author, cc_partners = self.Ticket._mail_gateway_partners(msg_dict)
+            self.assertEqual((author, cc_partners), (self.customer, self.colleague))
+            with self.assertQueryCount(0):
+                self.assertEqual(self.Ticket._mail_gateway_partners(msg_dict), (self.customer, self.colleague))
+            # A contact created for an unknown sender is looked up again by the next email
+            author = self.Ticket._mail_gateway_partners({'email_from': 'frank@example.com'})[0]
+            self.assertTrue(author)
+            self.assertEqual(self.Ticket._mail_gateway_partners({'email_from': 'frank@example.com'})[0], author)
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.tests import HttpCase, new_test_user, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPortalCache(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Ticket = cls.env['helpdesk.ticket']
+        cls.portal_user = new_test_user(cls.env, login='hd_portal', groups='base.group_portal')
+        cls.ticket = cls.Ticket.create({'name': 'Portal ticket', 'partner_id': cls.portal_user.partner_id.id})
+        cls.other_ticket = cls.Ticket.create({
+            'name': 'Someone else', 'partner_id': cls.env['res.partner'].create({'name': 'Other Customer'}).id,
+        })
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate('hd_portal', 'hd_portal')
+
+    def _get(self, url, etag=None):
+        return self.url_open(url, headers={'If-None-Match': etag} if etag else None, allow_redirects=False)
+
+    def _assert_revalidated(self, url):
+        """Fetch ``url``, check that the same ETag gets a 304, and return the ETag."""
+        response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, no-cache')
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        cached = self._get(url, etag)
+        self.assertEqual((cached.status_code, cached.content), (304, b''))
+        self.assertEqual(cached.headers['ETag'], etag)
+        return etag
+
+    def test_listing(self):
+        etag = self._assert_revalidated('/my/helpdesk')
+        self.assertIn('Portal ticket', self._get('/my/helpdesk').text)
+        self.assertNotEqual(self._assert_revalidated('/my/helpdesk?sortby=name'), etag, 'other content, other ETag')
+
+        self.Ticket.create({'name': 'Second ticket', 'partner_id': self.portal_user.partner_id.id})
+        response = self._get('/my/helpdesk', etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn('Second ticket', response.text)
+
+    def test_ticket(self):
+        url = '/my/helpdesk/%s' % self.ticket.id
+        etag = self._assert_revalidated(url)
+        # A new message changes the stamp and the cached card is rendered again
+        self.ticket.description = 'Updated by support'
+        self.ticket.message_post(body='A reply from support', message_type='comment')
+        response = self._get(url, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertIn('Updated by support', response.text)
+
+    def test_created_from_portal(self):
+        etag = self._assert_revalidated('/my/helpdesk')
+        self.url_open('/my/helpdesk/create', data={'name': 'Portal created', 'csrf_token': http.Request.csrf_token(self)}, allow_redirects=False)
+        self.assertEqual(self.Ticket.search([('name', '=', 'Portal created')]).partner_id, self.portal_user.partner_id)
+        self.assertEqual(self._get('/my/helpdesk', etag).status_code, 200)
+
+    def test_other_customer_ticket(self):
+        response = self._get('/my/helpdesk/%s' % self.other_ticket.id)
+        self.assertIn(response.status_code, (302, 303))
+        self.assertTrue(response.headers['Location'].endswith('/my'))
+        self.assertNotIn('ETag', response.headers)
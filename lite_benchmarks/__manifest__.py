@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+{
+    'name': 'Lite Modules Benchmarks',
+    'summary': 'Performance benchmark suite and synthetic data generator for the Lite modules',
+    'version': '1.0.0',
+    'license': 'LGPL-3',
+    'author': 'Roksana Piwowarczyk',
+    'category': 'Hidden/Tests',
+    'depends': ['helpdesk_lite', 'company_asset_manager', 'vendor_price_tracker'],
+    'data': [],
+    'installable': True,
+}
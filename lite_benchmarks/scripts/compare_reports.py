@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Compare two benchmark reports written by the lite_benchmarks suite.
+
+Usage::
+
+    python compare_reports.py base.json new.json [--threshold 10]
+
+Prints wall time and query count per scenario with the relative change, and exits
+with status 1 when a scenario got slower than the threshold (in percent) or runs
+more queries than before. Reports generated at different scales are refused.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _change(old, new):
+    if not old:
+        return 0.0 if not new else float('inf')
+    return 100.0 * (new - old) / old
+
+
+def compare(base, new, threshold):
+    """Return the printable lines and whether a regression was found."""
+    lines = ['%-45s %12s %12s %8s %9s %9s %7s' % (
+        'scenario', 'base (s)', 'new (s)', 'time %', 'base q', 'new q', 'q diff')]
+    regression = False
+    for name in sorted(set(base['scenarios']) | set(new['scenarios'])):
+        old_run, new_run = base['scenarios'].get(name), new['scenarios'].get(name)
+        if not old_run or not new_run:
+            lines.append('%-45s %s' % (name, 'only in new report' if new_run else 'only in base report'))
+            continue
+        time_change = _change(old_run['wall_time'], new_run['wall_time'])
+        query_diff = new_run['queries'] - old_run['queries']
+        flag = ''
+        if time_change > threshold or query_diff > 0:
+            regression = True
+            flag = '  <-- regression'
+        lines.append('%-45s %12.3f %12.3f %+7.1f%% %9d %9d %+7d%s' % (
+            name, old_run['wall_time'], new_run['wall_time'], time_change,
+            old_run['queries'], new_run['queries'], query_diff, flag))
+    return lines, regression
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base', help='report of the reference commit')
+    parser.add_argument('new', help='report of the commit under test')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='allowed wall time increase in percent (default: 10)')
+    args = parser.parse_args(argv)
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if base.get('scale') != new.get('scale'):
+        sys.exit('Reports were generated at different scales (%s and %s).' % (base.get('scale'), new.get('scale')))
+    print('base: %s   new: %s   scale: %s' % (base.get('git_commit'), new.get('git_commit'), new.get('scale')))
+    lines, regression = compare(base, new, args.threshold)
+    print('\n'.join(lines))
+    return 1 if regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from . import test_bench_helpdesk
+from . import test_bench_assets
+from . import test_bench_vendor_prices
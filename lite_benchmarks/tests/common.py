@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""Shared helpers of the benchmark suite.
+
+Volumes, repetitions and the report path come from environment variables, so the
+same suite runs as a quick check on a laptop and at production volumes on a
+dedicated benchmark database:
+
+- ``LITE_BENCH_SCALE`` (default 0.01): 1.0 generates 2 million tickets, 100 000
+  assets with their service and assignment history, and 50 000 products with
+  2 million vendor prices
+- ``LITE_BENCH_REPEAT`` (default 3): runs of each read-only scenario; the median
+  is reported
+- ``LITE_BENCH_REPORT`` (default ``lite_benchmarks.json``): path of the JSON report
+"""
+
+import json
+import logging
+import os
+import statistics
+import subprocess
+import time
+
+from odoo import fields, release
+
+_logger = logging.getLogger(__name__)
+
+SCALE = float(os.environ.get('LITE_BENCH_SCALE') or 0.01)
+REPEAT = max(int(os.environ.get('LITE_BENCH_REPEAT') or 3), 1)
+REPORT_PATH = os.environ.get('LITE_BENCH_REPORT') or 'lite_benchmarks.json'
+
+# Report shared by all benchmark classes of one run
+_report = {'volumes': {}, 'scenarios': {}}
+
+
+def scaled(full, minimum=1):
+    """Volume for the configured scale, ``full`` being the volume at scale 1."""
+    return max(int(full * SCALE), minimum)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(__file__),
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class BenchmarkMixin:
+    """Timing, query counting and reporting for the benchmark classes."""
+
+    @classmethod
+    def _analyze(cls, *tables):
+        # Fresh planner statistics, as after autovacuum on a production database
+        for table in tables:
+            cls.env.cr.execute(f'ANALYZE {table}')
+
+    @classmethod
+    def _record_volumes(cls, **volumes):
+        _report['volumes'].update(volumes)
+
+    def measure(self, name, func, repeat=1, rows=None):
+        """Run ``func`` and record its wall time and query count under ``name``.
+
+        Pending writes are flushed and the ORM cache emptied before each run, and
+        the writes of the run are flushed before the clock stops, so every run
+        starts cold and pays for its own queries.
+
+        Args:
+            repeat: number of runs; only for scenarios that leave the data as
+                they found it. The median run is reported.
+            rows: number of records the scenario works on, for per-row figures.
+
+        Returns:
+            the result of the last run.
+        """
+        runs = []
+        result = None
+        for __ in range(repeat):
+            self.env.flush_all()
+            self.env.invalidate_all()
+            queries = self.cr.sql_log_count
+            start = time.perf_counter()
+            result = func()
+            self.env.flush_all()
+            runs.append({
+                'wall_time': round(time.perf_counter() - start, 6),
+                'queries': self.cr.sql_log_count - queries,
+            })
+        wall_time = statistics.median(run['wall_time'] for run in runs)
+        queries = int(statistics.median(run['queries'] for run in runs))
+        _report['scenarios'][name] = {
+            'wall_time': wall_time,
+            'queries': queries,
+            'rows': rows,
+            'runs': runs,
+        }
+        _logger.info('Benchmark %s: %.3fs, %s queries%s', name, wall_time, queries,
+                     ' (%s rows)' % rows if rows else '')
+        self._write_report()
+        return result
+
+    def run_jobs(self):
+        """Run the pending background jobs in this transaction, as the runner cron would."""
+        Job = self.env['bg.job'].sudo()
+        # The runner compares with the transaction time, which precedes the jobs
+        Job.search([('state', '=', 'pending')]).write({'date_scheduled': '2000-01-01 00:00:00'})
+        Job._cron_run_jobs()
+        failed = Job.search([('state', '=', 'failed')])
+        self.assertFalse(failed, 'Background jobs failed: %s' % failed.mapped('error'))
+
+    def _write_report(self):
+        self.cr.execute('SHOW server_version')
+        report = {
+            'generated_at': fields.Datetime.to_string(fields.Datetime.now()),
+            'git_commit': _git_commit(),
+            'odoo_version': release.version,
+            'postgres_version': self.cr.fetchone()[0],
+            'scale': SCALE,
+            'repeat': REPEAT,
+            'volumes': _report['volumes'],
+            'scenarios': dict(sorted(_report['scenarios'].items())),
+        }
+        with open(REPORT_PATH, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""Synthetic data generator for the benchmarks.
+
+Master data the modules look up by name or code (customers, employees, products,
+vendors) is created through the ORM in batches; the high-volume tables (tickets,
+assets, services, assignments, vendor prices) are filled by ``INSERT ... SELECT``
+over ``generate_series``, deterministically, so two runs at the same scale work
+on the same data. Stored computed fields are filled by the same statements with
+the values the ORM would compute.
+"""
+
+from odoo.tools import split_every
+
+# Records created per ORM ``create`` call
+CREATE_BATCH_SIZE = 1000
+# Prefix of generated codes and serial numbers
+PREFIX = 'BENCH'
+
+
+def create_in_batches(model, vals_list):
+    """Create ``vals_list`` in batches and return the ids."""
+    ids = []
+    for batch in split_every(CREATE_BATCH_SIZE, vals_list, list):
+        ids += model.create(batch).ids
+    return ids
+
+
+# create_uid, write_uid, create_date, write_date of inserted rows
+AUDIT_VALUES = "%(uid)s, %(uid)s, now() at time zone 'UTC', now() at time zone 'UTC'"
+
+
+# ---------------------------------------------------------------------
+# Helpdesk
+# ---------------------------------------------------------------------
+def generate_customers(env, count):
+    return create_in_batches(env['res.partner'], [
+        {'name': f'{PREFIX} Customer {n:07d}', 'email': f'customer{n}@bench.example.com'}
+        for n in range(count)
+    ])
+
+
+def generate_tickets(env, count, customer_ids, assignee_ids, heavy_partner_id=None):
+    """Insert ``count`` tickets spread over two years.
+
+    About 70 % are done; one open ticket in 200 is past its SLA deadline. One ticket
+    in 500 belongs to ``heavy_partner_id`` (a large portal customer).
+    """
+    env.cr.execute("""
+        INSERT INTO helpdesk_ticket (name, description, partner_id, assignee_id, priority, stage, channel,
+                                     sla_deadline, closed_date, create_uid, write_uid, create_date, write_date)
+        SELECT 'Ticket ' || g,
+               'Generated ticket ' || g || E'\\nThe device does not start after the last update.',
+               CASE WHEN %(heavy)s IS NOT NULL AND g %% 500 = 0 THEN %(heavy)s
+                    ELSE (%(customers)s::int[])[1 + g %% %(n_customers)s] END,
+               (%(assignees)s::int[])[1 + g %% %(n_assignees)s],
+               ((g * 7) %% 3)::varchar,
+               t.stage,
+               (ARRAY['email', 'phone', 'portal', 'other'])[1 + g %% 4],
+               CASE WHEN t.stage = 'done' THEN NULL
+                    WHEN g %% 200 = 0 THEN t.created + interval '2 days'
+                    ELSE now() at time zone 'UTC' + make_interval(days => 1 + g %% 30) END,
+               CASE WHEN t.stage = 'done' THEN t.created + make_interval(hours => 1 + g %% 96) END,
+               %(uid)s, %(uid)s, t.created, t.created
+          FROM generate_series(1, %(count)s) g,
+               LATERAL (SELECT (ARRAY['done', 'done', 'done', 'done', 'done', 'done', 'done',
+                                      'new', 'in_progress', 'waiting'])[1 + (g * 7919) %% 10] AS stage,
+                               now() at time zone 'UTC' - make_interval(mins => (%(count)s - g) * %(step)s) AS created) t
+    """, {
+        'count': count,
+        'customers': customer_ids,
+        'n_customers': len(customer_ids),
+        'assignees': assignee_ids,
+        'n_assignees': len(assignee_ids),
+        'heavy': heavy_partner_id,
+        # two years of tickets whatever the volume
+        'step': max(2 * 365 * 24 * 60 // count, 1),
+        'uid': env.uid,
+    })
+
+
+# ---------------------------------------------------------------------
+# Assets
+# ---------------------------------------------------------------------
+def generate_employees(env, count):
+    return create_in_batches(env['hr.employee'], [
+        {'name': f'{PREFIX} Employee {n:06d}'} for n in range(count)
+    ])
+
+
+def generate_assets(env, count, employee_ids, services_per_asset):
+    """Insert assets with their service history and assignment history.
+
+    Assets were bought over the last four years; 80 % are assigned and 5 % retired.
+    Each asset was serviced every ``service_interval_months`` since purchase (at most
+    ``services_per_asset`` times) and had one previous holder for its first 180 days.
+    """
+    company = env.company
+    params = {
+        'count': count,
+        'employees': employee_ids,
+        'n_employees': len(employee_ids),
+        'services': services_per_asset,
+        'company': company.id,
+        'currency': company.currency_id.id,
+        'pattern': f'{PREFIX}-SN-%',
+        'uid': env.uid,
+    }
+    env.cr.execute(f"""
+        INSERT INTO company_asset (name, category, serial_no, purchase_date, warranty_months, status, employee_id,
+                                   service_interval_months, company_id, create_uid, write_uid, create_date, write_date)
+        SELECT (ARRAY['Laptop', 'Phone', 'Router', 'Monitor'])[1 + g %% 4] || ' ' || g,
+               (ARRAY['laptop', 'phone', 'networking', 'other'])[1 + g %% 4],
+               '{PREFIX}-SN-' || lpad(g::text, 8, '0'),
+               current_date - (g %% 1460),
+               24,
+               CASE WHEN g %% 20 = 0 THEN 'retired' WHEN g %% 50 = 1 THEN 'in_service' ELSE 'in_use' END,
+               CASE WHEN g %% 5 = 0 THEN NULL ELSE (%(employees)s::int[])[1 + g %% %(n_employees)s] END,
+               (ARRAY[3, 6, 12])[1 + g %% 3],
+               %(company)s, {AUDIT_VALUES}
+          FROM generate_series(1, %(count)s) g
+    """, params)
+    env.cr.execute(f"""
+        INSERT INTO company_asset_service (asset_id, service_date, description, cost, currency_id, company_id,
+                                           create_uid, write_uid, create_date, write_date)
+        SELECT a.id,
+               (a.purchase_date + make_interval(months => s * a.service_interval_months))::date,
+               'Periodic service #' || s,
+               20 + (a.id %% 180),
+               %(currency)s, a.company_id, {AUDIT_VALUES}
+          FROM company_asset a
+          JOIN generate_series(1, %(services)s) s
+            ON a.purchase_date + make_interval(months => s * a.service_interval_months) <= current_date
+         WHERE a.serial_no LIKE %(pattern)s
+    """, params)
+    # Stored compute _compute_next_service_date
+    env.cr.execute("""
+        UPDATE company_asset a
+           SET next_service_date = (COALESCE(
+                   (SELECT max(s.service_date) FROM company_asset_service s WHERE s.asset_id = a.id),
+                   a.purchase_date) + make_interval(months => a.service_interval_months))::date
+         WHERE a.serial_no LIKE %(pattern)s
+    """, params)
+    # A previous holder for the first 180 days, then the current one
+    env.cr.execute(f"""
+        INSERT INTO company_asset_assignment (asset_id, employee_id, date_from, date_to, company_id,
+                                              create_uid, write_uid, create_date, write_date)
+        SELECT a.id, (%(employees)s::int[])[1 + (a.id * 31) %% %(n_employees)s],
+               a.purchase_date, a.purchase_date + 180, a.company_id, {AUDIT_VALUES}
+          FROM company_asset a
+         WHERE a.serial_no LIKE %(pattern)s AND a.purchase_date + 180 < current_date
+         UNION ALL
+        SELECT a.id, a.employee_id,
+               LEAST(a.purchase_date + 180, current_date), NULL, a.company_id, {AUDIT_VALUES}
+          FROM company_asset a
+         WHERE a.serial_no LIKE %(pattern)s AND a.employee_id IS NOT NULL
+    """, params)
+
+
+# ---------------------------------------------------------------------
+# Vendor prices
+# ---------------------------------------------------------------------
+def generate_products(env, count):
+    return create_in_batches(env['product.product'], [
+        {'name': f'{PREFIX} Product {n:06d}', 'default_code': f'{PREFIX}-{n:06d}', 'type': 'consu'}
+        for n in range(count)
+    ])
+
+
+def generate_vendors(env, count):
+    return create_in_batches(env['res.partner'], [
+        {'name': f'{PREFIX} Vendor {n:05d}', 'is_company': True, 'supplier_rank': 1}
+        for n in range(count)
+    ])
+
+
+def generate_vendor_prices(env, product_ids, vendor_ids, vendors_per_product, windows):
+    """Insert ``windows`` consecutive 90-day prices per product and vendor.
+
+    The last window of each pair is open-ended, except for one pair in five that
+    expires within 40 days and one pair in fifty that expired yesterday. All prices
+    are in the company currency.
+    """
+    company = env.company
+    env.cr.execute(f"""
+        INSERT INTO vendor_price (product_id, partner_id, company_id, currency_id, price, price_normalized,
+                                  valid_from, valid_to, display_name, is_current, is_expiring_30,
+                                  create_uid, write_uid, create_date, write_date)
+        SELECT w.product_id, w.partner_id, %(company)s, %(currency)s, w.price, w.price,
+               w.valid_from, w.valid_to,
+               w.product_name || ' - ' || w.vendor_name || ' (' || w.valid_from || ')',
+               w.valid_from <= current_date AND (w.valid_to IS NULL OR w.valid_to >= current_date),
+               w.valid_to IS NOT NULL AND w.valid_to BETWEEN current_date AND current_date + 30,
+               {AUDIT_VALUES}
+          FROM (
+            SELECT p.id AS product_id, v.id AS partner_id,
+                   '[' || pp.default_code || '] ' || (t.name->>'en_US') AS product_name, v.name AS vendor_name,
+                   round((5 + (p.id %% 500) + (v.id %% 37) * 0.25 + k * 0.1)::numeric, 2) AS price,
+                   pair.base + k * 90 AS valid_from,
+                   CASE WHEN k < %(windows)s - 1 THEN pair.base + k * 90 + 89
+                        WHEN (p.id + v.id) %% 50 = 0 THEN current_date - 1
+                        WHEN (p.id + v.id) %% 5 = 0 THEN current_date + (p.id + v.id) %% 40
+                   END AS valid_to
+              FROM unnest(%(products)s::int[]) WITH ORDINALITY AS p(id, n)
+              JOIN product_product pp ON pp.id = p.id
+              JOIN product_template t ON t.id = pp.product_tmpl_id
+              CROSS JOIN generate_series(0, %(per_product)s - 1) j
+              JOIN res_partner v ON v.id = (%(vendors)s::int[])[1 + (p.n * 7 + j) %% %(n_vendors)s]
+              CROSS JOIN LATERAL (SELECT current_date - %(windows)s * 90 + ((p.id * 13 + j) %% 60)::int AS base) pair
+              CROSS JOIN generate_series(0, %(windows)s - 1) k
+          ) w
+    """, {
+        'products': product_ids,
+        'vendors': vendor_ids,
+        'n_vendors': len(vendor_ids),
+        'per_product': min(vendors_per_product, len(vendor_ids)),
+        'windows': windows,
+        'company': company.id,
+        'currency': company.currency_id.id,
+        'uid': env.uid,
+    })
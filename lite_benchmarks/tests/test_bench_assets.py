@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+from . import generator
+from .common import REPEAT, BenchmarkMixin, scaled
+
+# Assets exported directly (below the background threshold of the export)
+EXPORT_DIRECT = 1000
+# Assets whose next service date is recomputed
+RECOMPUTE_BATCH = 10000
+# Assets reassigned by the write scenario
+REASSIGN_BATCH = 1000
+# Employees whose assignment history is read
+HISTORY_EMPLOYEES = 100
+
+
+@tagged('-standard', 'benchmark', 'post_install', '-at_install')
+class TestBenchAssets(BenchmarkMixin, TransactionCase):
+    """CSV exports, service computes, reassignments, history queries, the service forecast and the reminder cron."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = new_test_user(cls.env, login='bench_asset_manager',
+                                    groups='base.group_user,hr.group_hr_user,company_asset_manager.group_asset_manager')
+        cls.employee_ids = generator.generate_employees(cls.env, scaled(5000, 20))
+        asset_count = scaled(100000, 1000)
+        generator.generate_assets(cls.env, asset_count, cls.employee_ids, services_per_asset=8)
+        cls._analyze('hr_employee', 'company_asset', 'company_asset_service', 'company_asset_assignment')
+        cls.env.cr.execute('SELECT count(*) FROM company_asset_service')
+        services = cls.env.cr.fetchone()[0]
+        cls._record_volumes(assets=asset_count, asset_services=services, employees=len(cls.employee_ids))
+        cls.Asset = cls.env['company.asset'].with_user(cls.manager)
+
+    def test_export_csv(self):
+        assets = self.Asset.search([], limit=EXPORT_DIRECT)
+        self.measure('assets.export_csv', assets.action_export_csv, repeat=REPEAT, rows=len(assets))
+
+    def test_export_csv_background(self):
+        assets = self.Asset.search([])
+
+        def export():
+            assets.action_export_csv()
+            self.run_jobs()
+        self.measure('assets.export_csv_background', export, rows=len(assets))
+
+    def test_compute_next_service_date(self):
+        assets = self.Asset.search([], limit=RECOMPUTE_BATCH)
+        self.measure('assets.compute_next_service_date', assets._compute_next_service_date,
+                     repeat=REPEAT, rows=len(assets))
+
+    def test_reassign(self):
+        assets = self.Asset.search([('employee_id', '!=', False)], limit=REASSIGN_BATCH)
+        employee = self.env['hr.employee'].browse(self.employee_ids[0])
+        self.measure('assets.write_reassign', lambda: assets.write({'employee_id': employee.id}), rows=len(assets))
+
+    def test_assignment_history(self):
+        Assignment = self.env['company.asset.assignment'].with_user(self.manager)
+        assets = self.Asset.search([])
+        employees = self.env['hr.employee'].browse(self.employee_ids[:HISTORY_EMPLOYEES])
+        at = fields.Date.today() - relativedelta(months=6)
+        self.measure('assets.holders_at', lambda: Assignment._get_holders_at(assets, at),
+                     repeat=REPEAT, rows=len(assets))
+        self.measure('assets.assets_held_by', lambda: Assignment._get_assets_held_by(employees, date_from=at),
+                     repeat=REPEAT, rows=len(employees))
+
+    def test_forecast_refresh(self):
+        Forecast = self.env['company.asset.forecast']
+        self.measure('assets.forecast_refresh', Forecast._refresh, rows=len(self.Asset.search([])))
+        assets = self.Asset.search([], limit=REASSIGN_BATCH)
+        self.measure('assets.forecast_refresh_incremental', lambda: Forecast._refresh(assets.ids), rows=len(assets))
+
+    def test_cron_upcoming_services(self):
+        Asset = self.env['company.asset']
+
+        def cron():
+            Asset._cron_schedule_upcoming_services()
+            self.run_jobs()
+        due = Asset.search_count([
+            ('next_service_date', '<=', fields.Date.today() + relativedelta(days=14)),
+            ('status', '!=', 'retired'),
+        ])
+        self.measure('assets.cron_upcoming_services', cron, rows=due)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from odoo import fields
+from odoo.tests import HttpCase, new_test_user, tagged
+
+from . import generator
+from .common import REPEAT, BenchmarkMixin, scaled
+
+# Tickets exported directly (below the background threshold of the export)
+EXPORT_DIRECT = 1000
+# Tickets moved to another stage by the write scenario
+WRITE_BATCH = 500
+
+
+@tagged('-standard', 'benchmark', 'post_install', '-at_install')
+class TestBenchHelpdesk(BenchmarkMixin, HttpCase):
+    """Portal listing, CSV exports, stage changes and the SLA cron on a large ticket base."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = new_test_user(cls.env, login='bench_helpdesk_manager',
+                                    groups='base.group_user,helpdesk_lite.group_helpdesk_manager')
+        cls.portal_user = new_test_user(cls.env, login='bench_portal', groups='base.group_portal')
+        agents = [
+            new_test_user(cls.env, login=f'bench_agent_{n}', groups='base.group_user,helpdesk_lite.group_helpdesk_user').id
+            for n in range(scaled(200, 5))
+        ]
+        customers = generator.generate_customers(cls.env, scaled(20000, 50))
+        cls.ticket_count = scaled(2000000, 5000)
+        generator.generate_tickets(cls.env, cls.ticket_count, customers, agents,
+                                   heavy_partner_id=cls.portal_user.partner_id.id)
+        cls._analyze('res_partner', 'res_users', 'helpdesk_ticket')
+        cls._record_volumes(helpdesk_tickets=cls.ticket_count, helpdesk_customers=len(customers),
+                            helpdesk_agents=len(agents))
+        cls.Ticket = cls.env['helpdesk.ticket'].with_user(cls.manager)
+
+    def _get_page(self, url, etag=None, status=200):
+        response = self.url_open(url, headers={'If-None-Match': etag} if etag else None)
+        self.assertEqual(response.status_code, status, url)
+        return response
+
+    def test_portal_listing(self):
+        self.authenticate('bench_portal', 'bench_portal')
+        tickets = self.env['helpdesk.ticket'].search_count([('partner_id', '=', self.portal_user.partner_id.id)])
+        self.measure('helpdesk.portal_home', lambda: self._get_page('/my'), repeat=REPEAT)
+        self.measure('helpdesk.portal_listing', lambda: self._get_page('/my/helpdesk'),
+                     repeat=REPEAT, rows=tickets)
+        self.measure('helpdesk.portal_listing_last_page',
+                     lambda: self._get_page('/my/helpdesk/page/%s?sortby=priority' % max(tickets // 20, 1)),
+                     repeat=REPEAT, rows=tickets)
+        # Revalidation of an unchanged page (browser refresh)
+        etag = self._get_page('/my/helpdesk').headers['ETag']
+        self.measure('helpdesk.portal_listing_not_modified',
+                     lambda: self._get_page('/my/helpdesk', etag=etag, status=304), repeat=REPEAT, rows=tickets)
+
+    def test_export_csv(self):
+        tickets = self.Ticket.search([], limit=EXPORT_DIRECT)
+        self.measure('helpdesk.export_csv', tickets.action_export_csv, repeat=REPEAT, rows=len(tickets))
+
+    def test_export_csv_background(self):
+        tickets = self.Ticket.search([], limit=scaled(200000, 5000))
+
+        def export():
+            tickets.action_export_csv()
+            self.run_jobs()
+        self.measure('helpdesk.export_csv_background', export, rows=len(tickets))
+
+    def test_write_stage(self):
+        tickets = self.Ticket.search([('stage', '=', 'new')], limit=WRITE_BATCH)
+        self.measure('helpdesk.write_stage', lambda: tickets.write({'stage': 'in_progress'}), rows=len(tickets))
+
+    def test_cron_sla_overdue(self):
+        Ticket = self.env['helpdesk.ticket']
+        overdue = Ticket.search_count([('sla_deadline', '<', fields.Datetime.now()), ('stage', '!=', 'done')])
+
+        def cron():
+            Ticket._cron_check_sla_overdue()
+            self.run_jobs()
+        self.measure('helpdesk.cron_sla_overdue', cron, rows=overdue)
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+import base64
+import csv
+import io
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import TransactionCase, new_test_user, tagged
+
+from odoo.addons.vendor_price_tracker.models import vendor_price_best
+from odoo.addons.vendor_price_tracker.models.vendor_price import EXPIRED_PRICES_PARAM, VALIDITY_FLAGS_PARAM
+from odoo.addons.vendor_price_tracker.models.vendor_price_trend import TREND_REFRESH_PARAM
+from odoo.addons.vendor_price_tracker.wizard.vpt_csv_import import BACKGROUND_ROW_THRESHOLD
+
+from . import generator
+from .common import REPEAT, BenchmarkMixin, scaled
+
+# Products whose best-price fields are computed
+COMPUTE_BATCH = 10000
+# Lines of the best-price lookup (one RFQ-sized integration call)
+LOOKUP_LINES = 1000
+# Days of expired prices caught up by the expired-price cron
+EXPIRED_CATCH_UP_DAYS = 7
+
+
+@tagged('-standard', 'benchmark', 'post_install', '-at_install')
+class TestBenchVendorPrices(BenchmarkMixin, TransactionCase):
+    """Best-price computes and lookups, the CSV import wizard and the vendor price crons."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.manager = new_test_user(cls.env, login='bench_vpt_manager',
+                                    groups='base.group_user,vendor_price_tracker.group_vpt_manager')
+        cls.product_ids = generator.generate_products(cls.env, scaled(50000, 200))
+        cls.vendor_ids = generator.generate_vendors(cls.env, scaled(1000, 20))
+        generator.generate_vendor_prices(cls.env, cls.product_ids, cls.vendor_ids, vendors_per_product=8, windows=5)
+        cls._analyze('product_product', 'product_template', 'res_partner', 'vendor_price')
+        cls.env['vendor.price.best']._cron_refresh_all()
+        cls._analyze('vendor_price_best')
+        cls.env.cr.execute('SELECT count(*) FROM vendor_price')
+        cls._record_volumes(products=len(cls.product_ids), vendors=len(cls.vendor_ids),
+                            vendor_prices=cls.env.cr.fetchone()[0])
+
+    def test_compute_best_fields(self):
+        products = self.env['product.product'].with_user(self.manager).browse(self.product_ids[:COMPUTE_BATCH])
+        self.measure('vendor_price.compute_best_fields', lambda: products.mapped('vpt_best_price'),
+                     repeat=REPEAT, rows=len(products))
+
+    def test_get_best_prices(self):
+        Best = self.env['vendor.price.best'].with_user(self.manager)
+        lines = [{'product_id': product_id} for product_id in self.product_ids[:LOOKUP_LINES]]
+
+        def lookup():
+            # Cold lookup cache, as after a price change
+            vendor_price_best._lookup_caches.clear()
+            return Best.get_best_prices(lines)
+        self.measure('vendor_price.get_best_prices', lookup, repeat=REPEAT, rows=len(lines))
+
+    def _import_file(self, rows):
+        """CSV with ``rows`` lines: half updates of stored prices, half new prices."""
+        existing = self.env['vendor.price'].search_read(
+            [('product_id', 'in', self.product_ids)], ['product_id', 'partner_id', 'price', 'valid_from', 'valid_to'],
+            limit=rows // 2, order='id')
+        codes = {p.id: p.default_code for p in self.env['product.product'].browse(self.product_ids)}
+        names = {p.id: p.name for p in self.env['res.partner'].browse(self.vendor_ids)}
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(['product_default_code', 'vendor_name', 'price', 'valid_from', 'valid_to'])
+        for price in existing:
+            writer.writerow([codes[price['product_id'][0]], names[price['partner_id'][0]], price['price'] + 1,
+                             price['valid_from'], price['valid_to'] or ''])
+        start = fields.Date.today() + timedelta(days=365)
+        product_ids, vendor_ids = list(codes), list(names)
+        for n in range(rows - len(existing)):
+            writer.writerow([
+                codes[product_ids[n % len(product_ids)]],
+                names[vendor_ids[n // len(product_ids) % len(vendor_ids)]],
+                '%.2f' % (10 + n % 90),
+                start + timedelta(days=n // (len(product_ids) * len(vendor_ids))),
+                '',
+            ])
+        return base64.b64encode(buf.getvalue().encode('utf-8'))
+
+    def test_import_wizard(self):
+        # The largest file still previewed and imported in the request (header line included)
+        rows = min(scaled(100000, 1000), BACKGROUND_ROW_THRESHOLD - 1)
+        wizard = self.env['vpt.csv.import.wizard'].with_user(self.manager).create({
+            'data_file': self._import_file(rows),
+            'filename': 'bench_prices.csv',
+        })
+        self.measure('vendor_price.import_preview', wizard.action_preview, rows=rows)
+        self.assertEqual(wizard.state, 'preview')
+        self.measure('vendor_price.import', wizard.action_import, rows=rows)
+        self.assertEqual(wizard.state, 'done')
+
+    def test_cron_refresh_best_prices(self):
+        self.measure('vendor_price.cron_refresh_best_prices', self.env['vendor.price.best']._cron_refresh_all,
+                     rows=len(self.product_ids))
+
+    def test_cron_refresh_trends(self):
+        self.env['ir.config_parameter'].sudo().set_param(TREND_REFRESH_PARAM, False)
+        self.measure('vendor_price.cron_refresh_trends', self.env['vendor.price.trend']._cron_refresh,
+                     rows=len(self.product_ids))
+
+    def test_cron_validity_flags(self):
+        # One day to roll over, as on a normal night
+        yesterday = fields.Date.today() - timedelta(days=1)
+        self.env['ir.config_parameter'].sudo().set_param(VALIDITY_FLAGS_PARAM, fields.Date.to_string(yesterday))
+        self.measure('vendor_price.cron_validity_flags', self.env['vendor.price'].cron_refresh_validity_flags)
+
+    def test_cron_post_expired_prices(self):
+        since = fields.Date.today() - timedelta(days=EXPIRED_CATCH_UP_DAYS + 1)
+        self.env['ir.config_parameter'].sudo().set_param(EXPIRED_PRICES_PARAM, fields.Date.to_string(since))
+        expired = self.env['vendor.price'].search_count([
+            ('valid_to', '>', since), ('valid_to', '<', fields.Date.today()),
+        ])
+        self.measure('vendor_price.cron_post_expired_prices', self.env['vendor.price'].cron_post_expired_prices,
+                     rows=expired)
@@ -2,11 +2,11 @@
 {
     'name': 'Vendor Price Tracker',
     'summary': 'Track and compare vendor prices per product with reporting and CSV import',
-    'version': '1.0.0',
+    'version': '1.1.0',
     'license': 'LGPL-3',
     'author': 'Roksana Piwowarczyk',
     'category': 'Purchases',
-    'depends': ['base', 'product', 'purchase', 'mail', "base_automation"],
+    'depends': ['base', 'product', 'purchase', 'mail', "base_automation", 'base_tools_lite'],
     'data': [
         'security/vpt_groups.xml',
         'security/ir.model.access.csv',
@@ -14,9 +14,12 @@
         'report/vendor_price_report.xml',
         'report/vendor_price_report_templates.xml',
         'views/vendor_price_views.xml',
+        'views/vendor_price_trend_views.xml',
+        'views/vendor_price_feed_views.xml',
         'views/product_views.xml',
         'views/menus.xml',
         'wizard/vpt_csv_import_views.xml',
+        'wizard/vpt_snapshot_wizard_views.xml',
         'data/cron.xml',
         # 'data/server_actions.xml',
     ],
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Vendor Price Tracker HTTP routes.
+
+Best-price lookups for purchase users and procurement integrations, and the
+price feed endpoint vendor systems push their price lists to.
+"""
+from odoo import http
+from odoo.exceptions import UserError
+from odoo.http import request
+from odoo.addons.base_tools_lite.tools import instrument
+
+# Content types accepted by the feed endpoint
+FEED_CONTENT_TYPES = {
+    'application/json': 'json',
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+}
+
+
+class VendorPriceController(http.Controller):
+    """JSON endpoints of the Vendor Price Tracker."""
+
+    @http.route('/vendor_price_tracker/best_price', type='json', auth='user')
+    @instrument()
+    def best_price(self, lines=None, product_id=None, company_id=None, date=None):
+        """Best vendor and price for one product or a batch of lines.
+
+        Either pass ``lines`` (list of ``{product_id, company_id, date}`` dicts,
+        ``company_id`` and ``date`` optional) to get a list back in the same order, or
+        ``product_id`` (with optional ``company_id`` and ``date``) to get a single dict.
+        """
+        Best = request.env['vendor.price.best']
+        if lines is not None:
+            return Best.get_best_prices(lines)
+        return Best.get_best_prices([{'product_id': product_id, 'company_id': company_id, 'date': date}])[0]
+
+    @http.route('/vendor_price_tracker/feed', type='http', auth='bearer', methods=['POST'], csrf=False)
+    @instrument()
+    def feed_push(self, reference=None, **kw):
+        """Receive a JSON or CSV price batch and queue it.
+
+        The batch reference comes from the ``reference`` query parameter, the
+        ``X-Batch-Reference`` header or, for JSON, the ``reference`` key of the body;
+        without one the payload checksum is used. Answers 202 with the status
+        resource for a new (or resent failed) batch and 200 with the existing one
+        for a replay of the caller's own batch.
+        """
+        if not request.env.user.has_group('vendor_price_tracker.group_vpt_user'):
+            return request.make_json_response({'error': 'forbidden'}, status=403)
+        payload_type = FEED_CONTENT_TYPES.get(request.httprequest.mimetype)
+        if not payload_type:
+            return request.make_json_response(
+                {'error': 'Content-Type must be one of %s' % ', '.join(FEED_CONTENT_TYPES)}, status=415)
+        reference = reference or request.httprequest.headers.get('X-Batch-Reference')
+        try:
+            status, created = request.env['vendor.price.feed']._receive(
+                request.httprequest.get_data(), payload_type, reference)
+        except UserError as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        return request.make_json_response(
+            status, status=202 if created else 200,
+            headers=[('Location', '/vendor_price_tracker/feed/%s' % status['id'])])
+
+    @http.route('/vendor_price_tracker/feed/<int:feed_id>', type='http', auth='bearer', methods=['GET'])
+    @instrument()
+    def feed_status(self, feed_id, **kw):
+        """Status of a pushed batch; poll it until ``state`` is done or failed."""
+        feed = request.env['vendor.price.feed'].search([('id', '=', feed_id)])
+        if not feed:
+            return request.make_json_response({'error': 'not found'}, status=404)
+        return request.make_json_response(feed._get_status())
@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
 from . import vendor_price
 from . import product
+from . import vendor_price_best
+from . import purchase_order
+from . import vendor_price_trend
+from . import res_currency
+from . import vendor_price_feed
@@ -1,29 +1,78 @@
 # -*- coding: utf-8 -*-
 from odoo import api, fields, models, _
+from odoo.tools import SQL
+from odoo.addons.base_tools_lite.tools import instrument
 
 
 class ProductProduct(models.Model):
     _inherit = 'product.product'
 
     vpt_price_ids = fields.One2many('vendor.price', 'product_id', string='Vendor Prices')
-    vpt_best_vendor_id = fields.Many2one('res.partner', compute='_compute_vpt_best_fields', store=False)
-    vpt_currency_id = fields.Many2one('res.currency', related='company_id.currency_id', readonly=True)
-    vpt_best_price = fields.Monetary(compute='_compute_vpt_best_fields', currency_field='vpt_currency_id', store=False)
-    vpt_price_count = fields.Integer(compute='_compute_vpt_best_fields')
+    vpt_best_ids = fields.One2many('vendor.price.best', 'product_id', string='Best Vendor Prices')
+    vpt_best_vendor_id = fields.Many2one('res.partner', compute='_compute_vpt_best_fields', search='_search_vpt_best_vendor_id')
+    vpt_currency_id = fields.Many2one('res.currency', compute='_compute_vpt_best_fields')
+    vpt_best_price = fields.Monetary(compute='_compute_vpt_best_fields', currency_field='vpt_currency_id', search='_search_vpt_best_price')
+    vpt_price_count = fields.Integer(compute='_compute_vpt_best_fields', search='_search_vpt_price_count')
 
-    @api.depends('vpt_price_ids.price', 'vpt_price_ids.valid_from', 'vpt_price_ids.valid_to', 'vpt_price_ids.partner_id', 'company_id')
+    @api.depends_context('company')
+    @instrument()
     def _compute_vpt_best_fields(self):
-        today = fields.Date.context_today(self)
+        """Read best vendor, price and count for the current company from the cache."""
+        company = self.env.company
+        best_by_product = {}
+        if self.ids:
+            rows = self.env['vendor.price.best'].sudo().search([
+                ('product_id', 'in', self.ids),
+                ('company_id', '=', company.id),
+            ])
+            best_by_product = {row.product_id.id: row for row in rows}
         for product in self:
-            prices = product.vpt_price_ids.filtered(lambda p: p.company_id == product.company_id and p.valid_from and p.valid_from <= today and (not p.valid_to or p.valid_to >= today))
-            product.vpt_price_count = len(prices)
-            if prices:
-                best = prices.sorted(key=lambda p: p.price)[0]
-                product.vpt_best_price = best.price
-                product.vpt_best_vendor_id = best.partner_id
-            else:
-                product.vpt_best_price = False
-                product.vpt_best_vendor_id = False
+            best = best_by_product.get(product.id)
+            product.vpt_currency_id = company.currency_id
+            product.vpt_price_count = best.price_count if best else 0
+            product.vpt_best_price = best.price if best else False
+            product.vpt_best_vendor_id = best.partner_id if best else False
+
+    def _search_vpt_best(self, field_name, operator, value):
+        """Translate a search on a best-price field into a subquery on the cache."""
+        company_domain = [('company_id', '=', self.env.company.id)]
+        if operator in ('=', '!=') and not value:
+            # "no best price" means "no cache row for this company"
+            op = 'not any' if operator == '=' else 'any'
+            return [('vpt_best_ids', op, company_domain)]
+        return [('vpt_best_ids', 'any', company_domain + [(field_name, operator, value)])]
+
+    def _order_field_to_sql(self, alias, field_name, direction, nulls, query):
+        """Sort on the best-price fields with a join on the cache row of the current company."""
+        if field_name not in ('vpt_best_vendor_id', 'vpt_best_price', 'vpt_price_count'):
+            return super()._order_field_to_sql(alias, field_name, direction, nulls, query)
+        best_alias = query.make_alias(alias, 'vpt_best')
+        query.add_join('LEFT JOIN', best_alias, 'vendor_price_best', SQL(
+            "%s = %s AND %s = %s",
+            SQL.identifier(best_alias, 'product_id'), SQL.identifier(alias, 'id'),
+            SQL.identifier(best_alias, 'company_id'), self.env.company.id,
+        ))
+        if field_name == 'vpt_best_vendor_id':
+            partner_alias = query.make_alias(best_alias, 'partner_id')
+            query.add_join('LEFT JOIN', partner_alias, 'res_partner', SQL(
+                "%s = %s", SQL.identifier(partner_alias, 'id'), SQL.identifier(best_alias, 'partner_id'),
+            ))
+            sql_field = SQL.identifier(partner_alias, 'complete_name')
+        elif field_name == 'vpt_best_price':
+            sql_field = SQL.identifier(best_alias, 'price')
+        else:
+            # Products without a cache row have no current price
+            sql_field = SQL("COALESCE(%s, 0)", SQL.identifier(best_alias, 'price_count'))
+        return SQL("%s %s %s", sql_field, direction, nulls)
+
+    def _search_vpt_best_vendor_id(self, operator, value):
+        return self._search_vpt_best('partner_id', operator, value)
+
+    def _search_vpt_best_price(self, operator, value):
+        return self._search_vpt_best('price', operator, value)
+
+    def _search_vpt_price_count(self, operator, value):
+        return self._search_vpt_best('price_count', operator, value)
 
     def action_open_vendor_prices(self):
         self.ensure_one()
@@ -57,3 +106,18 @@ class ProductProduct(models.Model):
             },
             'target': 'current',
         }
+
+    def action_view_price_trends(self):
+        """Open monthly price trends of the product per vendor."""
+        self.ensure_one()
+        action = self.env.ref('vendor_price_tracker.action_vendor_price_trend').read()[0]
+        action['domain'] = [('product_id', '=', self.id)]
+        action['context'] = {'search_default_group_vendor': 1}
+        return action
+
+    @instrument()
+    def _vpt_render_snapshot(self, date):
+        """PDF snapshot of these products as of ``date`` (one chunk of a background snapshot)."""
+        pdf, __ = self.env['ir.actions.report']._render_qweb_pdf(
+            'vendor_price_tracker.report_vendor_price_snapshot', res_ids=self.ids, data={'date': date})
+        return pdf
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.addons.base_tools_lite.tools import instrument
+
+
+class PurchaseOrderLine(models.Model):
+    _inherit = 'purchase.order.line'
+
+    vpt_price_id = fields.Many2one('vendor.price', string='Tracked Vendor Price', compute='_compute_vpt_price')
+    vpt_currency_id = fields.Many2one(related='vpt_price_id.currency_id', string='Tracked Price Currency')
+    vpt_price = fields.Monetary(string='Tracked Price', compute='_compute_vpt_price', currency_field='vpt_currency_id')
+
+    @api.depends('product_id', 'order_id.partner_id', 'order_id.date_order', 'company_id')
+    @instrument()
+    def _compute_vpt_price(self):
+        """Vendor price valid on the order date, looked up for all lines in one query."""
+        lines = self.filtered(lambda l: l.product_id and l.order_id.partner_id and l.order_id.date_order)
+        prices = self.env['vendor.price']._get_prices_at([(
+            line.product_id.id,
+            line.order_id.partner_id.commercial_partner_id.id,
+            line.order_id.date_order.date(),
+            line.company_id.id,
+        ) for line in lines])
+        price_by_line = dict(zip(lines, prices))
+        for line in self:
+            price = price_by_line.get(line) or self.env['vendor.price']
+            line.vpt_price_id = price
+            line.vpt_price = price.price
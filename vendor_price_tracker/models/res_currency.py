@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import itertools
+
+from odoo import api, models, tools
+
+# Transaction-level key of the last rate change (see _vpt_rate_stamp)
+RATE_CHANGE_KEY = 'vendor_price_tracker.rate_change'
+# Tokens of rate changes, unique in the process like the cache entries they key
+_rate_change_tokens = itertools.count(1)
+
+
+class ResCurrency(models.Model):
+    _inherit = 'res.currency'
+
+    @api.model
+    def _vpt_rate_stamp(self):
+        """Return a version of the currency rates visible to this transaction.
+
+        Part of the ``_vpt_rate_table`` cache key, so a rate change (or one made by
+        another worker) is picked up without clearing the ORM cache. Changes made by
+        this transaction keep its ``write_date``; they add a token of their own.
+        """
+        self.env['res.currency.rate'].flush_model()
+        self.env.cr.execute("SELECT count(*), max(write_date) FROM res_currency_rate")
+        count, write_date = self.env.cr.fetchone()
+        return count, write_date and write_date.isoformat(), self.env.cr.postcommit.data.get(RATE_CHANGE_KEY)
+
+    @api.model
+    @tools.ormcache('company_id', 'date', 'stamp')
+    def _vpt_rate_table(self, company_id, date, stamp):
+        """Return ``{currency_id: rate}`` of all currencies for a company and date.
+
+        Cached per worker, so normalizing many prices of the same date costs one
+        rate query; ``stamp`` (``_vpt_rate_stamp``) keys the entries on the rates.
+        """
+        currencies = self.with_context(active_test=False).search([])
+        return currencies._get_rates(self.env['res.company'].browse(company_id), date)
+
+    @api.model
+    def _vpt_to_company_currency(self, amount, currency_id, company, date, stamp=None):
+        """Convert ``amount`` from ``currency_id`` to the currency of ``company`` at ``date``.
+
+        Callers converting many amounts pass ``stamp`` (``_vpt_rate_stamp``) to
+        query it once.
+        """
+        if not currency_id or currency_id == company.currency_id.id:
+            return amount
+        rates = self._vpt_rate_table(company.id, date, stamp or self._vpt_rate_stamp())
+        return company.currency_id.round(amount * rates[company.currency_id.id] / rates[currency_id])
+
+
+class ResCurrencyRate(models.Model):
+    _inherit = 'res.currency.rate'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        rates = super().create(vals_list)
+        self._vpt_rates_changed()
+        self.env['vendor.price']._recompute_normalized_prices(rates._vpt_rate_keys())
+        return rates
+
+    def write(self, vals):
+        keys = self._vpt_rate_keys()
+        res = super().write(vals)
+        self._vpt_rates_changed()
+        self.env['vendor.price']._recompute_normalized_prices(keys | self._vpt_rate_keys())
+        return res
+
+    def unlink(self):
+        keys = self._vpt_rate_keys()
+        res = super().unlink()
+        self._vpt_rates_changed()
+        self.env['vendor.price']._recompute_normalized_prices(keys)
+        return res
+
+    def _vpt_rates_changed(self):
+        """Give this transaction a new rate stamp, so the rate table is read again."""
+        self.env.cr.postcommit.data[RATE_CHANGE_KEY] = next(_rate_change_tokens)
+
+    def _vpt_rate_keys(self):
+        """``(currency_id, company_id, date)`` of these rates; company False for shared rates."""
+        return {(rate.currency_id.id, rate.company_id.id, rate.name) for rate in self.sudo()}
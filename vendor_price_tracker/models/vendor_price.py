@@ -4,10 +4,42 @@
 Tracks vendor prices per product with helpers and cron notifications.
 """
 
+import logging
 from datetime import timedelta
 
-from odoo import api, fields, models, _
+import psycopg2
+from markupsafe import Markup
+
+from odoo import api, fields, models, tools, _
+from odoo.modules.registry import Registry
+from odoo.osv import expression
+from odoo.tools import split_every, str2bool
+from odoo.tools.sql import add_constraint, constraint_definition, drop_constraint
 from odoo.exceptions import ValidationError
+from odoo.addons.base_tools_lite.tools import instrument
+
+_logger = logging.getLogger(__name__)
+
+
+def _validity_range(alias=None):
+    """SQL for the validity window as an inclusive date range (open-ended without valid_to)."""
+    prefix = f'{alias}.' if alias else ''
+    return f"daterange({prefix}valid_from, {prefix}valid_to, '[]')"
+
+
+# Last date the stored validity flags were rolled over to
+VALIDITY_FLAGS_PARAM = 'vendor_price_tracker.validity_flags_date'
+# Last day whose expired prices were posted (optionally ",<last product id>" mid-day)
+EXPIRED_PRICES_PARAM = 'vendor_price_tracker.expired_prices_date'
+# Products posted on per committed chunk of the expired-price cron
+EXPIRED_POST_BATCH_SIZE = 200
+# Optional exclusion constraint on overlapping validity windows
+OVERLAP_PARAM = 'vendor_price_tracker.exclude_overlaps'
+OVERLAP_CONSTRAINT = 'vendor_price_no_overlap'
+# Rows written per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 5000
+# Fields that can change which price is the best one for a product
+BEST_PRICE_FIELDS = {'product_id', 'partner_id', 'company_id', 'currency_id', 'price', 'valid_from', 'valid_to'}
 
 
 class VendorPrice(models.Model):
@@ -21,7 +53,10 @@ class VendorPrice(models.Model):
     display_name = fields.Char(compute='_compute_display_name', store=True)
 
     company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company, index=True)
-    currency_id = fields.Many2one(related='company_id.currency_id', store=True, readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Currency', required=True, tracking=True,
+                                  default=lambda self: self.env.company.currency_id,
+                                  help='Currency the vendor quoted the price in.')
+    company_currency_id = fields.Many2one(related='company_id.currency_id', string='Company Currency', readonly=True)
 
     product_id = fields.Many2one('product.product', required=True, index=True, tracking=True)
     partner_id = fields.Many2one(
@@ -29,18 +64,84 @@ class VendorPrice(models.Model):
         domain="[('supplier_rank','>',0)]", string='Vendor'
     )
     price = fields.Monetary(required=True, currency_field='currency_id', tracking=True)
-    valid_from = fields.Date(required=True, default=fields.Date.context_today, tracking=True)
-    valid_to = fields.Date()
+    # Used to compare vendors: the price converted at the rate of valid_from
+    price_normalized = fields.Monetary(string='Price (Company Currency)', compute='_compute_price_normalized',
+                                       store=True, currency_field='company_currency_id')
+    valid_from = fields.Date(required=True, default=fields.Date.context_today, tracking=True, index=True)
+    valid_to = fields.Date(index=True)
     notes = fields.Text()
 
-    is_current = fields.Boolean(compute='_compute_is_current', search='_search_is_current')
-    is_expiring_30 = fields.Boolean(compute='_compute_is_expiring_30', search='_search_is_expiring_30')
+    # Stored for the day of the last write and rolled over daily by cron_refresh_validity_flags
+    is_current = fields.Boolean(compute='_compute_is_current', store=True)
+    is_expiring_30 = fields.Boolean(compute='_compute_is_expiring_30', store=True)
 
     _sql_constraints = [
         ('uniq_vendor_price', 'unique(product_id, partner_id, valid_from, company_id)',
          'A vendor price with the same product, vendor, company and start date already exists.'),
     ]
 
+    def init(self):
+        # "Current" and "Expiring in 30 days" filters only touch the flagged rows
+        tools.create_index(self._cr, 'vendor_price_current_idx', self._table,
+                           ['product_id', 'company_id'], where='is_current')
+        tools.create_index(self._cr, 'vendor_price_not_current_idx', self._table,
+                           ['product_id', 'company_id'], where='is_current IS NOT TRUE')
+        tools.create_index(self._cr, 'vendor_price_expiring_30_idx', self._table,
+                           ['valid_to'], where='is_expiring_30')
+        # Changed products picked up by the hourly trend refresh (index-only scan)
+        tools.create_index(self._cr, 'vendor_price_write_date_idx', self._table,
+                           ['write_date', 'product_id'])
+        # Point-in-time lookups and overlap checks: validity as a date range.
+        # btree_gist lets the integer keys share the GiST index.
+        keys = ['product_id', 'partner_id', 'company_id'] if self._has_btree_gist() else []
+        tools.create_index(self._cr, 'vendor_price_validity_gist_idx', self._table,
+                           keys + [_validity_range()], method='gist')
+        self._apply_overlap_constraint()
+
+    def _has_btree_gist(self):
+        """Return whether the btree_gist extension is (or could be made) available."""
+        cr = self._cr
+        cr.execute("SELECT 1 FROM pg_extension WHERE extname = 'btree_gist'")
+        if cr.fetchone():
+            return True
+        try:
+            with cr.savepoint(flush=False):
+                cr.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+            return True
+        except psycopg2.Error:
+            _logger.info('btree_gist is not available; vendor price validity index limited to the date range')
+            return False
+
+    def _apply_overlap_constraint(self):
+        """Add or drop the optional exclusion constraint on overlapping validity windows.
+
+        Enabled by the ``vendor_price_tracker.exclude_overlaps`` system parameter and
+        applied on module update. Existing overlaps (see ``_find_validity_overlaps``)
+        must be fixed first, otherwise the constraint is not created.
+        """
+        cr = self._cr
+        enabled = str2bool(self.env['ir.config_parameter'].sudo().get_param(OVERLAP_PARAM, 'False'))
+        exists = constraint_definition(cr, self._table, OVERLAP_CONSTRAINT)
+        if not enabled:
+            if exists:
+                drop_constraint(cr, self._table, OVERLAP_CONSTRAINT)
+            return False
+        if exists:
+            return True
+        if not self._has_btree_gist():
+            _logger.warning('Cannot add %s: the btree_gist extension is missing', OVERLAP_CONSTRAINT)
+            return False
+        try:
+            with cr.savepoint(flush=False):
+                add_constraint(cr, self._table, OVERLAP_CONSTRAINT, f"""
+                    EXCLUDE USING gist (product_id WITH =, partner_id WITH =, company_id WITH =,
+                                        {_validity_range()} WITH &&)
+                """)
+        except psycopg2.Error:
+            _logger.warning('Cannot add %s: overlapping vendor prices exist', OVERLAP_CONSTRAINT)
+            return False
+        return True
+
     @api.depends('product_id', 'partner_id', 'valid_from')
     def _compute_display_name(self):
         for rec in self:
@@ -49,6 +150,50 @@ class VendorPrice(models.Model):
             else:
                 rec.display_name = _('Vendor Price')
 
+    @api.depends('price', 'currency_id', 'company_id', 'valid_from')
+    def _compute_price_normalized(self):
+        Currency = self.env['res.currency']
+        converted = self.filtered(lambda rec: rec.currency_id != rec.company_id.currency_id)
+        stamp = Currency._vpt_rate_stamp() if converted else None
+        for rec in self:
+            rec.price_normalized = Currency._vpt_to_company_currency(
+                rec.price, rec.currency_id.id, rec.company_id, rec.valid_from or fields.Date.context_today(rec),
+                stamp=stamp)
+
+    @api.model
+    def _recompute_normalized_prices(self, rate_keys):
+        """Recompute ``price_normalized`` of the prices converted with changed currency rates.
+
+        A rate ``(currency_id, company_id, date)`` (company False for shared rates)
+        applies to prices in that currency and to prices of companies using it,
+        valid from its date to the next rate of the same currency and company;
+        the first rate also applies to the prices before it. The best-price cache
+        and the trends of the affected products are refreshed.
+        """
+        if not rate_keys:
+            return
+        Rate = self.env['res.currency.rate'].sudo()
+        domains = []
+        for currency_id, company_id, date in rate_keys:
+            domain = ['|', ('currency_id', '=', currency_id), ('company_id.currency_id', '=', currency_id)]
+            if company_id:
+                domain.append(('company_id', '=', company_id))
+            rate_domain = [('currency_id', '=', currency_id), ('company_id', '=', company_id)]
+            if Rate.search_count(rate_domain + [('name', '<', date)], limit=1):
+                domain.append(('valid_from', '>=', date))
+            next_rate = Rate.search(rate_domain + [('name', '>', date)], order='name', limit=1)
+            if next_rate:
+                domain.append(('valid_from', '<', next_rate.name))
+            domains.append(domain)
+        prices = self.sudo().search(expression.OR(domains))
+        if not prices:
+            return
+        self.env.add_to_compute(self._fields['price_normalized'], prices)
+        prices.flush_recordset(['price_normalized'])
+        products = prices.product_id
+        self.env['vendor.price.best']._refresh(products.ids)
+        self.env['vendor.price.trend']._refresh(products.ids)
+
     @api.depends('valid_from', 'valid_to')
     def _compute_is_current(self):
         today = fields.Date.context_today(self)
@@ -68,15 +213,6 @@ class VendorPrice(models.Model):
         for rec in self:
             rec.is_expiring_30 = bool(rec.valid_to and today <= rec.valid_to <= horizon)
 
-    def _search_is_expiring_30(self, operator, value):
-        today = fields.Date.context_today(self)
-        horizon = today + timedelta(days=30)
-        domain_exp = [('valid_to', '>=', today), ('valid_to', '<=', horizon)]
-        if (operator in ('=', '==') and bool(value)) or (operator in ('!=', '<>') and not bool(value)):
-            return domain_exp
-        else:
-            return ['!', ('id', 'in', self.search(domain_exp).ids)]
-
     @api.constrains('valid_from', 'valid_to')
     def _check_dates(self):
         for rec in self:
@@ -87,46 +223,309 @@ class VendorPrice(models.Model):
         return [(rec.id, rec.display_name or _('Vendor Price')) for rec in self]
 
     @api.model_create_multi
+    @instrument()
     def create(self, vals_list):
+        # Optional notification: new best price (evaluated once after commit)
+        self._queue_best_price_notification({vals.get('product_id') for vals in vals_list})
         records = super().create(vals_list)
-        # Optional notification: new best price
-        records._notify_new_best_price()
+        records._refresh_best_prices()
         return records
 
+    @instrument()
     def write(self, vals):
+        if not BEST_PRICE_FIELDS.intersection(vals):
+            return super().write(vals)
+        old_products = self.product_id
+        self._queue_best_price_notification(set(old_products.ids) | {vals.get('product_id')})
         res = super().write(vals)
-        self._notify_new_best_price()
+        self._refresh_best_prices(old_products)
         return res
 
-    def _search_is_current(self, operator, value):
-        # Support search on is_current computed field
-        today = fields.Date.context_today(self)
-        domain_current = ['&', ('valid_from', '<=', today), '|', ('valid_to', '=', False), ('valid_to', '>=', today)]
-        if (operator in ('=', '==') and bool(value)) or (operator in ('!=', '<>') and not bool(value)):
-            return domain_current
-        else:
-            return ['!', ('id', 'in', self.search(domain_current).ids)]
+    def unlink(self):
+        products = self.product_id
+        res = super().unlink()
+        self.env['vendor.price.best']._refresh(products.ids)
+        # the trend cron only sees changed rows, not deleted ones
+        self.env['vendor.price.trend']._refresh(products.ids)
+        return res
+
+    def _refresh_best_prices(self, extra_products=None):
+        """Update the best-price cache for the products of these prices."""
+        products = self.product_id | (extra_products or self.env['product.product'])
+        self.env['vendor.price.best']._refresh(products.ids)
 
     def _notify_new_best_price(self):
-        # Post on product when a new lower current price appears and notify managers
-        for rec in self:
-            product = rec.product_id
-            today = fields.Date.context_today(self)
-            # Consider current prices including this record
-            prices = product.vpt_price_ids.filtered(lambda p: p.company_id == product.company_id and p.valid_from and p.valid_from <= today and (not p.valid_to or p.valid_to >= today))
-            if not prices:
+        """Queue a best-price check for the products of these prices."""
+        self._queue_best_price_notification(set(self.product_id.ids))
+
+    @api.model
+    def _queue_best_price_notification(self, product_ids):
+        """Snapshot the current best prices of ``product_ids`` and check them after commit.
+
+        Must be called before the change. The first snapshot of a product in a
+        transaction wins, so a product touched many times (e.g. by a CSV import) is
+        evaluated once against its state at the start of the transaction.
+        """
+        data = self.env.cr.postcommit.data
+        snapshot = data.get('vendor_price.best_snapshot')
+        if snapshot is None:
+            snapshot = data['vendor_price.best_snapshot'] = {}
+            dbname, uid, context = self.env.cr.dbname, self.env.uid, dict(self.env.context)
+
+            @self.env.cr.postcommit.add
+            def notify():
+                db_registry = Registry(dbname)
+                with db_registry.cursor() as cr:
+                    env = api.Environment(cr, uid, context, su=True)
+                    env['vendor.price']._post_best_price_notifications(snapshot)
+
+        product_ids = [pid for pid in product_ids if pid and pid not in snapshot]
+        if not product_ids:
+            return
+        snapshot.update({pid: {} for pid in product_ids})
+        self.env.cr.execute("""
+            SELECT product_id, company_id, partner_id, price
+              FROM vendor_price_best
+             WHERE product_id = ANY(%s)
+        """, [product_ids])
+        for product_id, company_id, partner_id, price in self.env.cr.fetchall():
+            snapshot[product_id][company_id] = (partner_id, float(price))
+
+    @api.model
+    def _post_best_price_notifications(self, snapshot):
+        """Post on products whose best price dropped since ``snapshot`` and notify managers.
+
+        A first best price counts as a drop; a higher best price, or another vendor at
+        the same price, is not announced.
+        """
+        if not snapshot:
+            return
+        bests = self.env['vendor.price.best'].search([('product_id', 'in', list(snapshot))])
+        managers = self.env.ref('vendor_price_tracker.group_vpt_manager', raise_if_not_found=False)
+        partner_ids = managers.users.partner_id.ids if managers else []
+        for best in bests:
+            before = snapshot.get(best.product_id.id, {}).get(best.company_id.id)
+            if before and best.currency_id.compare_amounts(best.price, before[1]) >= 0:
                 continue
-            best = min(prices.mapped('price'))
-            if rec.price == best:
-                # New best price detected
-                msg = _('New best vendor price: %s at %s from %s') % (
-                    rec.partner_id.display_name,
-                    product.currency_id.symbol + (' %.2f' % rec.price),
-                    rec.valid_from,
-                )
-                managers = self.env.ref('vendor_price_tracker.group_vpt_manager', raise_if_not_found=False)
-                partner_ids = managers.users.mapped('partner_id').ids if managers else []
-                product.message_post(body=msg, partner_ids=partner_ids, subtype_xmlid='mail.mt_note')
+            msg = _('New best vendor price: %s at %s from %s') % (
+                best.partner_id.display_name,
+                best.currency_id.symbol + (' %.2f' % best.price),
+                best.vendor_price_id.valid_from,
+            )
+            best.product_id.message_post(body=msg, partner_ids=partner_ids, subtype_xmlid='mail.mt_note')
+
+    @api.model
+    @instrument()
+    def _upsert_prices(self, vals_list, batch_size=UPSERT_BATCH_SIZE, commit=False):
+        """Insert or update vendor prices in bulk on the ``uniq_vendor_price`` key.
+
+        Rows are written with one ``INSERT ... ON CONFLICT`` statement per batch, so no
+        tracking messages are created; the best-price cache is refreshed and the
+        best-price notification is queued once for all affected products. A batch
+        that fails is retried row by row to isolate the bad rows.
+
+        Args:
+            vals_list: dicts with ``product_id``, ``partner_id``, ``price``,
+                ``valid_from``, optional ``valid_to``, ``currency_id`` (company
+                currency by default) and ``company_id``. When a key
+                appears several times the last row wins; the others are
+                counted as ``duplicates`` and not written.
+            batch_size: rows per statement.
+            commit: in a background job, refresh the best prices of each batch and
+                commit it with ``bg.job._report_progress``, so a large upsert neither
+                holds its locks until the end nor loses the written batches when it
+                fails; stops early when the job is cancelled.
+
+        Returns:
+            dict: ``created``, ``updated`` and ``duplicates`` counts, ``errors``,
+            a list of ``(index in vals_list, message)``, and ``cancelled`` when a
+            committing upsert was stopped by a cancelled job.
+        """
+        self.check_access('create')
+        self.check_access('write')
+        result = {'created': 0, 'updated': 0, 'duplicates': 0, 'errors': [], 'cancelled': False}
+        rows = {}
+        for index, vals in enumerate(vals_list):
+            vals = dict(vals, company_id=vals.get('company_id') or self.env.company.id)
+            key = (vals['product_id'], vals['partner_id'], vals['valid_from'], vals['company_id'])
+            if key in rows:
+                # superseded by a later row of the same file, never written
+                result['duplicates'] += 1
+            rows[key] = (index, vals)
+        if not commit:
+            self._upsert_rows(list(rows.values()), batch_size, result)
+            return result
+        done = 0
+        for batch in split_every(batch_size, rows.values(), list):
+            # Each batch is a transaction of its own: best prices and notifications included
+            self._upsert_rows(batch, batch_size, result)
+            done += len(batch)
+            if not self.env['bg.job']._report_progress(done, len(rows)):
+                result['cancelled'] = True
+                break
+        return result
+
+    @api.model
+    def _upsert_rows(self, rows, batch_size, result):
+        """Write ``(index, vals)`` rows for ``_upsert_prices`` and refresh their best prices."""
+        if not rows:
+            return
+        product_ids = {vals['product_id'] for __, vals in rows}
+        self._queue_best_price_notification(product_ids)
+        self.flush_model()
+        for batch in split_every(batch_size, rows, list):
+            try:
+                with self.env.cr.savepoint():
+                    self._upsert_batch(batch, result)
+            except Exception:
+                for index, vals in batch:
+                    try:
+                        with self.env.cr.savepoint():
+                            self._upsert_batch([(index, vals)], result)
+                    except Exception as e:
+                        result['errors'].append((index, str(e)))
+        self.invalidate_model()
+        self.env['vendor.price.best']._refresh(product_ids)
+
+    @api.model
+    def _upsert_batch(self, batch, result):
+        """Write one batch of ``(index, vals)`` rows with a single statement."""
+        today = fields.Date.context_today(self)
+        Currency = self.env['res.currency']
+        companies = self.env['res.company'].browse([vals['company_id'] for __, vals in batch])
+        currency_ids = [vals.get('currency_id') or company.currency_id.id for company, (__, vals) in zip(companies, batch)]
+        converted = any(currency_id != company.currency_id.id for company, currency_id in zip(companies, currency_ids))
+        stamp = Currency._vpt_rate_stamp() if converted else None
+        normalized = [
+            Currency._vpt_to_company_currency(vals['price'], currency_id, company, vals['valid_from'], stamp=stamp)
+            for company, currency_id, (__, vals) in zip(companies, currency_ids, batch)
+        ]
+        products = self.env['product.product'].browse([vals['product_id'] for __, vals in batch])
+        partners = self.env['res.partner'].browse([vals['partner_id'] for __, vals in batch])
+        names = [
+            f"{product.display_name} - {partner.display_name} ({vals['valid_from']})"
+            for product, partner, (__, vals) in zip(products, partners, batch)
+        ]
+        self.env.cr.execute("""
+            INSERT INTO vendor_price AS vp (
+                product_id, partner_id, company_id, currency_id, price, price_normalized, valid_from, valid_to,
+                is_current, is_expiring_30,
+                display_name, create_uid, create_date, write_uid, write_date
+            )
+            SELECT r.product_id, r.partner_id, r.company_id, r.currency_id, r.price, r.price_normalized, r.valid_from, r.valid_to,
+                   r.valid_from <= %(today)s AND (r.valid_to IS NULL OR r.valid_to >= %(today)s),
+                   r.valid_to IS NOT NULL AND r.valid_to BETWEEN %(today)s AND %(horizon)s,
+                   r.display_name, %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+              FROM unnest(%(product)s::int[], %(partner)s::int[], %(company)s::int[], %(currency)s::int[],
+                          %(price)s::numeric[], %(normalized)s::numeric[],
+                          %(valid_from)s::date[], %(valid_to)s::date[], %(name)s::varchar[])
+                   AS r(product_id, partner_id, company_id, currency_id, price, price_normalized,
+                        valid_from, valid_to, display_name)
+            ON CONFLICT (product_id, partner_id, valid_from, company_id) DO UPDATE
+               SET price = EXCLUDED.price,
+                   currency_id = EXCLUDED.currency_id,
+                   price_normalized = EXCLUDED.price_normalized,
+                   valid_to = EXCLUDED.valid_to,
+                   is_current = EXCLUDED.is_current,
+                   is_expiring_30 = EXCLUDED.is_expiring_30,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+            RETURNING vp.id, (xmax = 0)
+        """, {
+            'uid': self.env.uid,
+            'today': today,
+            'horizon': today + timedelta(days=30),
+            'product': [vals['product_id'] for __, vals in batch],
+            'partner': [vals['partner_id'] for __, vals in batch],
+            'company': [vals['company_id'] for __, vals in batch],
+            'currency': currency_ids,
+            'price': [vals['price'] for __, vals in batch],
+            'normalized': normalized,
+            'valid_from': [vals['valid_from'] for __, vals in batch],
+            'valid_to': [vals.get('valid_to') or None for __, vals in batch],
+            'name': names,
+        })
+        written = self.env.cr.fetchall()
+        # SQL bypasses record rules: check them on the written rows (rolls the batch back)
+        self.browse([row[0] for row in written]).check_access('write')
+        created = sum(1 for __, inserted in written if inserted)
+        result['created'] += created
+        result['updated'] += len(written) - created
+
+    # ---------------------------------------------------------------------
+    # Point-in-time lookups
+    # ---------------------------------------------------------------------
+    @api.model
+    def _get_price_at(self, product, partner, date, company=None):
+        """Return the price of ``partner`` for ``product`` valid on ``date`` (or an empty recordset)."""
+        company = company or self.env.company
+        return self._get_prices_at([(product.id, partner.id, date, company.id)])[0]
+
+    @api.model
+    @instrument()
+    def _get_prices_at(self, keys, batch_size=UPSERT_BATCH_SIZE):
+        """Batch point-in-time lookup.
+
+        Args:
+            keys: sequence of ``(product_id, partner_id, date, company_id)``.
+
+        Returns:
+            list: one ``vendor.price`` record (possibly empty) per key, in order. When
+            validity windows overlap, the one that started last wins.
+        """
+        keys = list(keys)
+        found = {}
+        self.flush_model(['product_id', 'partner_id', 'company_id', 'valid_from', 'valid_to'])
+        for offset in range(0, len(keys), batch_size):
+            batch = keys[offset:offset + batch_size]
+            self.env.cr.execute(f"""
+                SELECT DISTINCT ON (k.idx) k.idx, vp.id
+                  FROM unnest(%s::int[], %s::int[], %s::date[], %s::int[]) WITH ORDINALITY
+                       AS k(product_id, partner_id, date, company_id, idx)
+                  JOIN vendor_price vp
+                    ON vp.product_id = k.product_id
+                   AND vp.partner_id = k.partner_id
+                   AND vp.company_id = k.company_id
+                   AND {_validity_range('vp')} @> k.date
+              ORDER BY k.idx, vp.valid_from DESC, vp.id DESC
+            """, [list(col) for col in zip(*batch)])
+            found.update({offset + idx - 1: price_id for idx, price_id in self.env.cr.fetchall()})
+        allowed = set(self.browse(found.values())._filter_access_rules('read').ids)
+        return [self.browse(found[i]) if found.get(i) in allowed else self.browse() for i in range(len(keys))]
+
+    @api.model
+    def _find_validity_overlaps(self, domain=None):
+        """Return ``(id, id)`` pairs of prices of the same product, vendor and company
+        whose validity windows overlap, optionally restricted to ``domain``.
+        """
+        self.flush_model(['product_id', 'partner_id', 'company_id', 'valid_from', 'valid_to'])
+        ids = self.search(domain).ids if domain is not None else None
+        self.env.cr.execute(f"""
+            SELECT a.id, b.id
+              FROM vendor_price a
+              JOIN vendor_price b
+                ON b.product_id = a.product_id
+               AND b.partner_id = a.partner_id
+               AND b.company_id = a.company_id
+               AND b.id > a.id
+               AND {_validity_range('a')} && {_validity_range('b')}
+             WHERE %(all)s OR a.id = ANY(%(ids)s) OR b.id = ANY(%(ids)s)
+          ORDER BY a.id, b.id
+        """, {'all': ids is None, 'ids': ids or []})
+        return self.env.cr.fetchall()
+
+    def action_check_overlaps(self):
+        """Open the selected prices that overlap another price of the same vendor."""
+        pairs = self._find_validity_overlaps([('id', 'in', self.ids)])
+        overlapping = {price_id for pair in pairs for price_id in pair}
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Overlapping Vendor Prices'),
+            'res_model': 'vendor.price',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', list(overlapping))],
+            'context': {'group_by': ['product_id', 'partner_id']},
+        }
 
     def action_open_product(self):
         self.ensure_one()
@@ -139,28 +538,95 @@ class VendorPrice(models.Model):
         }
 
 
-    def cron_post_expired_prices(self):
-        """Daily cron at 06:00: post chatter on products for prices that expired yesterday.
-        is_current is computed, so no explicit flagging is required beyond notifying.
+    @api.model
+    @instrument()
+    def cron_refresh_validity_flags(self):
+        """Daily cron: roll ``is_current`` and ``is_expiring_30`` over to today.
+
+        Only rows whose validity window starts or ends in the days since the last run
+        (or enters the 30-day horizon) can change, so the update uses the date indexes
+        instead of scanning the table. Without a previous run every row is checked.
         """
         today = fields.Date.context_today(self)
-        yesterday = today - timedelta(days=1)
-        expired = self.search([('valid_to', '=', yesterday)])
-        if not expired:
+        params = self.env['ir.config_parameter'].sudo()
+        last = fields.Date.to_date(params.get_param(VALIDITY_FLAGS_PARAM) or False)
+        if last and last >= today:
             return True
-        by_product = {}
-        for vp in expired:
-            by_product.setdefault(vp.product_id, self.env['vendor.price'])
-            by_product[vp.product_id] |= vp
-        for product, lines in by_product.items():
-            body = _('The following vendor prices expired on %s:') % yesterday
-            for vp in lines:
-                body += '<br/>- %s: %s %s (from %s to %s)' % (
-                    vp.partner_id.display_name,
-                    vp.currency_id.symbol,
-                    '%.2f' % vp.price,
-                    vp.valid_from,
-                    vp.valid_to or ''
-                )
-            product.message_post(body=body)
+        self.flush_model(['valid_from', 'valid_to', 'is_current', 'is_expiring_30'])
+        values = {'today': today, 'horizon': today + timedelta(days=30), 'last': last}
+        window = ''
+        if last:
+            window = """
+               AND ((valid_from > %(last)s AND valid_from <= %(today)s)
+                    OR (valid_to >= %(last)s AND valid_to <= %(horizon)s))
+            """
+        self.env.cr.execute("""
+            UPDATE vendor_price
+               SET is_current = (valid_from <= %(today)s AND (valid_to IS NULL OR valid_to >= %(today)s)),
+                   is_expiring_30 = (valid_to IS NOT NULL AND valid_to BETWEEN %(today)s AND %(horizon)s)
+             WHERE ((is_current IS TRUE) IS DISTINCT FROM (valid_from <= %(today)s AND (valid_to IS NULL OR valid_to >= %(today)s))
+                    OR (is_expiring_30 IS TRUE) IS DISTINCT FROM (valid_to IS NOT NULL AND valid_to BETWEEN %(today)s AND %(horizon)s))
+        """ + window, values)
+        _logger.info('Vendor prices: validity flags refreshed on %s rows', self.env.cr.rowcount)
+        self.invalidate_model(['is_current', 'is_expiring_30'])
+        params.set_param(VALIDITY_FLAGS_PARAM, fields.Date.to_string(today))
+        return True
+
+    @api.model
+    def _cron_enqueue_post_expired_prices(self):
+        """Daily cron at 06:00: queue ``cron_post_expired_prices`` as a background job."""
+        self.env['bg.job']._enqueue(
+            self.browse(), 'cron_post_expired_prices', name=_('Post expired vendor prices'),
+            identity_key='vendor_price.post_expired_prices')
+        return True
+
+    @instrument()
+    def cron_post_expired_prices(self):
+        """Post chatter on products for prices that expired since the last run.
+
+        The watermark ``vendor_price_tracker.expired_prices_date`` holds the last reported
+        day (``YYYY-MM-DD``, or ``YYYY-MM-DD,product_id`` while a day is half done), so
+        skipped or failed runs are caught up. Expirations are grouped per product and
+        day by one aggregate query and posted in chunks, each committed with the
+        watermark when running in a background job.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        yesterday = fields.Date.context_today(self) - timedelta(days=1)
+        date, __, product = (params.get_param(EXPIRED_PRICES_PARAM) or '').partition(',')
+        values = {
+            'date': fields.Date.to_date(date) or yesterday - timedelta(days=1),
+            'product': int(product) if product else None,
+            'yesterday': yesterday,
+        }
+        self.flush_model(['product_id', 'partner_id', 'currency_id', 'price', 'valid_from', 'valid_to'])
+        self.env['res.partner'].flush_model(['complete_name'])
+        self.env.cr.execute("""
+            SELECT vp.valid_to, vp.product_id,
+                   json_agg(json_build_array(rp.complete_name, cur.symbol, vp.price, vp.valid_from, vp.valid_to)
+                            ORDER BY rp.complete_name, vp.id)
+              FROM vendor_price vp
+              JOIN res_partner rp ON rp.id = vp.partner_id
+              JOIN res_currency cur ON cur.id = vp.currency_id
+             WHERE vp.valid_to <= %(yesterday)s
+               AND (vp.valid_to > %(date)s OR (vp.valid_to = %(date)s AND vp.product_id > %(product)s))
+          GROUP BY vp.valid_to, vp.product_id
+          ORDER BY vp.valid_to, vp.product_id
+        """, values)
+        rows = self.env.cr.fetchall()
+        Product = self.env['product.product']
+        done = 0
+        for chunk in split_every(EXPIRED_POST_BATCH_SIZE, rows, list):
+            products = Product.browse([product_id for __, product_id, __ in chunk])
+            for product, (day, __, lines) in zip(products, chunk):
+                body = Markup(_('The following vendor prices expired on %s:')) % day
+                for vendor, symbol, price, valid_from, valid_to in lines:
+                    body += Markup('<br/>- %s: %s %s (from %s to %s)') % (
+                        vendor, symbol, '%.2f' % price, valid_from, valid_to)
+                product.message_post(body=body)
+            day, product_id, __ = chunk[-1]
+            params.set_param(EXPIRED_PRICES_PARAM, f'{fields.Date.to_string(day)},{product_id}')
+            done += len(chunk)
+            self.env['bg.job']._report_progress(done, len(rows))
+        _logger.info('Vendor prices: posted expirations for %s product-days', len(rows))
+        params.set_param(EXPIRED_PRICES_PARAM, fields.Date.to_string(yesterday))
         return True
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Best current vendor price per product and company.
+
+The cache is rebuilt with one ``DISTINCT ON`` query per batch of products, incrementally
+when vendor prices change and daily for date-driven validity changes. Prices are
+ranked and stored in the company currency (``vendor.price.price_normalized``).
+
+Lookups for any date go through ``get_best_prices``, backed by a bounded in-memory
+cache per worker. Every transaction that refreshes the table increments a one-row
+generation counter; workers read it in the same snapshot as the prices they cache,
+and drop their cache when it moved.
+"""
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.tools.lru import LRU
+from odoo.addons.base_tools_lite.tools import instrument
+
+from .vendor_price import _validity_range
+
+# Products refreshed per SQL statement
+REFRESH_BATCH_SIZE = 1000
+# Version of the cache contents: bump it when the rows are computed differently,
+# so that the next module update rebuilds the cache
+CACHE_VERSION = '1'
+CACHE_VERSION_PARAM = 'vendor_price_tracker.best_cache_version'
+# One-row table holding the generation of best prices, incremented by each refresh
+LOOKUP_GENERATION_TABLE = 'vendor_price_best_generation'
+# Entries kept by the per-worker lookup cache
+LOOKUP_CACHE_SIZE = 50000
+# Keys accepted by one get_best_prices() call
+LOOKUP_MAX_KEYS = 5000
+
+# Per-worker lookup caches: {dbname: [generation, LRU]}
+_lookup_caches = {}
+_MISSING = object()
+
+
+class VendorPriceBest(models.Model):
+    """Cached best current vendor price for a product in a company."""
+    _name = 'vendor.price.best'
+    _description = 'Best Vendor Price'
+    _order = 'product_id, company_id'
+    _rec_name = 'product_id'
+
+    product_id = fields.Many2one('product.product', required=True, readonly=True, ondelete='cascade', index=True)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, ondelete='cascade', index=True)
+    vendor_price_id = fields.Many2one('vendor.price', readonly=True, ondelete='cascade')
+    partner_id = fields.Many2one('res.partner', string='Best Vendor', readonly=True, index=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', store=True, readonly=True)
+    price = fields.Monetary(string='Best Price', currency_field='currency_id', readonly=True)
+    price_count = fields.Integer(string='Current Prices', readonly=True)
+    date = fields.Date(string='Computed For', readonly=True)
+
+    _sql_constraints = [
+        ('product_company_uniq', 'unique(product_id, company_id)',
+         'Only one best price per product and company is allowed.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {LOOKUP_GENERATION_TABLE} (generation bigint NOT NULL);
+            INSERT INTO {LOOKUP_GENERATION_TABLE} (generation)
+                 SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM {LOOKUP_GENERATION_TABLE});
+        """)
+        # Fill the cache on install, and on upgrade when its contents changed, so
+        # products do not wait for the daily cron; other updates keep it as is
+        params = self.env['ir.config_parameter'].sudo()
+        self.env.cr.execute("SELECT EXISTS(SELECT 1 FROM vendor_price_best)")
+        if not self.env.cr.fetchone()[0] or params.get_param(CACHE_VERSION_PARAM) != CACHE_VERSION:
+            self._cron_refresh_all()
+            params.set_param(CACHE_VERSION_PARAM, CACHE_VERSION)
+
+    @api.model
+    @instrument()
+    def _refresh(self, product_ids, date=None):
+        """Recompute the cache rows of ``product_ids`` for every company.
+
+        Args:
+            product_ids: ids of ``product.product`` records to refresh.
+            date: validity date, defaults to today.
+        """
+        product_ids = sorted({pid for pid in product_ids if pid})
+        if not product_ids:
+            return
+        date = date or fields.Date.context_today(self)
+        self.env['vendor.price'].flush_model(['product_id', 'partner_id', 'company_id', 'price_normalized', 'valid_from', 'valid_to'])
+        self.flush_model()
+        cr = self.env.cr
+        for batch in split_every(REFRESH_BATCH_SIZE, product_ids, list):
+            cr.execute("DELETE FROM vendor_price_best WHERE product_id = ANY(%s)", [batch])
+            cr.execute("""
+                INSERT INTO vendor_price_best (
+                    product_id, company_id, vendor_price_id, partner_id, currency_id,
+                    price, price_count, date, create_uid, create_date, write_uid, write_date
+                )
+                SELECT DISTINCT ON (vp.product_id, vp.company_id)
+                       vp.product_id, vp.company_id, vp.id, vp.partner_id, c.currency_id,
+                       vp.price_normalized, count(*) OVER (PARTITION BY vp.product_id, vp.company_id), %(date)s,
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM vendor_price vp
+                  JOIN res_company c ON c.id = vp.company_id
+                 WHERE vp.product_id = ANY(%(products)s)
+                   AND vp.valid_from <= %(date)s
+                   AND (vp.valid_to IS NULL OR vp.valid_to >= %(date)s)
+              ORDER BY vp.product_id, vp.company_id, vp.price_normalized, vp.id
+            """, {'products': batch, 'date': date, 'uid': self.env.uid})
+        self.invalidate_model()
+        self.env['product.product'].invalidate_model(['vpt_best_vendor_id', 'vpt_best_price', 'vpt_price_count'])
+        self._queue_lookup_invalidation()
+
+    @api.model
+    @instrument()
+    def _cron_refresh_all(self):
+        """Daily cron: rebuild the cache so validity windows follow the date."""
+        self.env.cr.execute("""
+            SELECT product_id FROM vendor_price
+             UNION
+            SELECT product_id FROM vendor_price_best
+        """)
+        self._refresh([row[0] for row in self.env.cr.fetchall()])
+        return True
+
+    # ---------------------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------------------
+    @api.model
+    @instrument()
+    def get_best_prices(self, lines):
+        """Best vendor and price for a batch of products.
+
+        Args:
+            lines: list of dicts with ``product_id`` and optional ``company_id``
+                (current company) and ``date`` (today).
+
+        Returns:
+            list: one dict per line, in order, with ``product_id``, ``company_id``,
+            ``date``, ``vendor_price_id``, ``partner_id``, ``partner_name``,
+            ``price`` and ``currency_id`` (company currency) and ``price_count``;
+            the price fields are False when no price is valid on that date.
+        """
+        if len(lines) > LOOKUP_MAX_KEYS:
+            raise UserError(_('At most %s best-price lookups are allowed per call.', LOOKUP_MAX_KEYS))
+        today = fields.Date.context_today(self)
+        keys = []
+        for line in lines:
+            if not line.get('product_id'):
+                raise UserError(_('Each best-price lookup needs a product_id.'))
+            keys.append((
+                int(line['product_id']),
+                int(line.get('company_id') or self.env.company.id),
+                fields.Date.to_date(line.get('date')) or today,
+            ))
+        return [
+            dict(zip(('vendor_price_id', 'partner_id', 'partner_name', 'price', 'currency_id', 'price_count'),
+                     best or (False, False, False, False, False, 0)),
+                 product_id=product_id, company_id=company_id, date=fields.Date.to_string(date))
+            for (product_id, company_id, date), best in zip(keys, self._get_best_prices(keys))
+        ]
+
+    @api.model
+    def _get_best_prices(self, keys):
+        """Return the best price tuple (or None) of each ``(product_id, company_id, date)`` key.
+
+        Tuples are ``(vendor_price_id, partner_id, partner_name, price, currency_id,
+        price_count)`` with the price in company currency. Results come from the
+        worker cache when still valid; misses are resolved with one query.
+        Companies the user cannot access yield None.
+        """
+        self.env['vendor.price'].check_access('read')
+        allowed = set(self.env.user.company_ids.ids)
+        cache = self._lookup_cache()
+        results = [None] * len(keys)
+        missing = {}
+        for i, key in enumerate(keys):
+            if key[1] not in allowed:
+                continue
+            best = cache.get(key, _MISSING) if cache is not None else _MISSING
+            if best is _MISSING:
+                missing.setdefault(key, []).append(i)
+            else:
+                results[i] = best
+        if not missing:
+            return results
+
+        self.env['vendor.price'].flush_model(['product_id', 'company_id', 'partner_id', 'price_normalized', 'valid_from', 'valid_to'])
+        found = dict.fromkeys(missing)
+        for batch in split_every(LOOKUP_MAX_KEYS, list(missing), list):
+            self.env.cr.execute(f"""
+                SELECT DISTINCT ON (k.idx) k.idx, vp.id, vp.partner_id, rp.complete_name,
+                       vp.price_normalized, c.currency_id, count(*) OVER (PARTITION BY k.idx)
+                  FROM unnest(%s::int[], %s::int[], %s::date[]) WITH ORDINALITY AS k(product_id, company_id, date, idx)
+                  JOIN vendor_price vp
+                    ON vp.product_id = k.product_id
+                   AND vp.company_id = k.company_id
+                   AND {_validity_range('vp')} @> k.date
+                  JOIN res_partner rp ON rp.id = vp.partner_id
+                  JOIN res_company c ON c.id = vp.company_id
+              ORDER BY k.idx, vp.price_normalized, vp.id
+            """, [list(col) for col in zip(*batch)])
+            for idx, price_id, partner_id, partner_name, price, currency_id, count in self.env.cr.fetchall():
+                found[batch[idx - 1]] = (price_id, partner_id, partner_name, float(price), currency_id, count)
+        for key, best in found.items():
+            if cache is not None:
+                cache[key] = best
+            for i in missing[key]:
+                results[i] = best
+        return results
+
+    @api.model
+    def _lookup_cache(self):
+        """Return this worker's lookup cache for the database, or None to bypass it.
+
+        The generation is read in the transaction's snapshot, so it always matches
+        the prices the cache is filled from. The cache is dropped when a newer
+        generation is seen, and bypassed by transactions with an older snapshot and
+        by a transaction that changed best prices and has not committed yet.
+        """
+        if 'vendor_price_best.lookup_changed' in self.env.cr.postcommit.data:
+            return None
+        self.env.cr.execute(f"SELECT generation FROM {LOOKUP_GENERATION_TABLE}")
+        generation = self.env.cr.fetchone()[0]
+        entry = _lookup_caches.get(self.env.cr.dbname)
+        if entry is not None and generation < entry[0]:
+            return None
+        if entry is None or entry[0] != generation:
+            entry = _lookup_caches[self.env.cr.dbname] = [generation, LRU(LOOKUP_CACHE_SIZE)]
+        return entry[1]
+
+    @api.model
+    def _queue_lookup_invalidation(self):
+        """Move the lookup generation.
+
+        The counter is incremented by the current transaction, so the new value
+        becomes visible together with the refreshed prices when it commits. It is
+        incremented on every refresh, as an earlier one may have been rolled back to
+        a savepoint; the flag only makes this transaction bypass the worker cache.
+        """
+        self.env.cr.postcommit.data['vendor_price_best.lookup_changed'] = True
+        self.env.cr.execute(f"UPDATE {LOOKUP_GENERATION_TABLE} SET generation = generation + 1")
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""Vendor price feeds.
+
+Price batches pushed by vendor systems over HTTP (JSON or CSV). Each batch is
+stored once per sender, reference and payload checksum, then validated with the
+rules of the CSV import wizard and upserted by a background job.
+"""
+
+import base64
+import csv
+import hashlib
+import io
+import json
+
+import psycopg2
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+from odoo.tools import split_every
+from odoo.addons.base_tools_lite.tools import instrument
+
+from ..wizard.vpt_csv_import import EXPECTED_COLUMNS, PREVIEW_BATCH_SIZE
+
+# Row errors kept on a feed for the status resource
+MAX_STORED_ERRORS = 1000
+
+
+class VendorPriceFeed(models.Model):
+    """Price batch pushed by a vendor system."""
+    _name = 'vendor.price.feed'
+    _description = 'Vendor Price Feed'
+    _order = 'id desc'
+    _rec_name = 'reference'
+
+    reference = fields.Char(required=True, readonly=True, help='Batch reference sent by the vendor system.')
+    checksum = fields.Char(required=True, readonly=True, index=True, help='SHA-256 of the payload.')
+    payload_type = fields.Selection([('json', 'JSON'), ('csv', 'CSV')], required=True, readonly=True)
+    payload = fields.Binary(readonly=True, attachment=True)
+    user_id = fields.Many2one('res.users', string='Pushed By', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, default=lambda self: self.env.company)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], default='pending', required=True, readonly=True, index=True)
+    rows_total = fields.Integer(readonly=True)
+    created_count = fields.Integer(string='Created', readonly=True)
+    updated_count = fields.Integer(string='Updated', readonly=True)
+    duplicate_count = fields.Integer(string='Duplicates', readonly=True,
+                                     help='Rows superseded by a later row with the same key in the batch.')
+    error_count = fields.Integer(string='Errors', readonly=True)
+    error_details = fields.Text(readonly=True, help='JSON list of {"row", "message"} for rejected rows.')
+    date_done = fields.Datetime(readonly=True)
+    job_id = fields.Many2one('bg.job', string='Background Job', readonly=True)
+
+    _sql_constraints = [
+        ('reference_user_uniq', 'unique(user_id, reference)',
+         'A feed with this reference was already received from this user.'),
+    ]
+
+    # ---------------------------------------------------------------------
+    # Reception
+    # ---------------------------------------------------------------------
+    @api.model
+    @instrument()
+    def _receive(self, data, payload_type, reference=None):
+        """Store a pushed batch and queue it, or return the status of the batch it replays.
+
+        Replays are detected among the batches of the same user only: the same
+        reference, or the same payload under another reference. A failed batch
+        sent again under its reference is processed again with the new payload.
+
+        Args:
+            data: raw request body (bytes).
+            payload_type: ``'json'`` or ``'csv'``.
+            reference: batch reference; for JSON it may also be given in the body.
+
+        Returns:
+            tuple: ``(status, created)``, the ``_get_status()`` dict of the feed;
+            ``created`` is False for a replayed batch.
+
+        Raises:
+            UserError: when the payload cannot be read.
+        """
+        checksum = hashlib.sha256(data).hexdigest()
+        rows = self._decode_rows(data, payload_type)
+        if payload_type == 'json' and not reference:
+            body = json.loads(data)
+            reference = body.get('reference') if isinstance(body, dict) else None
+        reference = reference or checksum
+        own_feeds = [('user_id', '=', self.env.uid)]
+        existing = self.search(own_feeds + [('reference', '=', reference)], limit=1) or self.search(
+            own_feeds + [('checksum', '=', checksum), ('state', '!=', 'failed')], limit=1)
+        if existing and existing.state != 'failed':
+            return existing._get_status(), False
+        vals = {
+            'reference': reference,
+            'checksum': checksum,
+            'payload_type': payload_type,
+            'payload': base64.b64encode(data),
+            'rows_total': len(rows),
+        }
+        if existing:
+            feed = existing
+            feed.sudo().write(dict(vals, state='pending', created_count=0, updated_count=0, duplicate_count=0,
+                                   error_count=0, error_details=False, date_done=False))
+        else:
+            try:
+                with self.env.cr.savepoint():
+                    feed = self.create(vals)
+            except psycopg2.errors.UniqueViolation:
+                # Pushed concurrently and committed after this transaction started,
+                # so only a new transaction can read it
+                return self._get_committed_status(reference), False
+        feed.sudo().job_id = self.env['bg.job']._enqueue(
+            feed, '_process', name=_('Vendor price feed %s') % reference, failure_method='_mark_failed')
+        return feed._get_status(), True
+
+    @api.model
+    def _get_committed_status(self, reference):
+        """Status of the current user's feed ``reference`` as committed in the database."""
+        with self.env.registry.cursor() as cr:
+            feed = self.with_env(self.env(cr=cr)).search(
+                [('user_id', '=', self.env.uid), ('reference', '=', reference)], limit=1)
+            return feed._get_status()
+
+    @api.model
+    def _decode_rows(self, data, payload_type):
+        """Return the rows of a payload as a list of dicts with the CSV column names."""
+        if payload_type == 'csv':
+            try:
+                text = data.decode('utf-8')
+            except UnicodeDecodeError:
+                text = data.decode('latin-1')
+            reader = csv.DictReader(io.StringIO(text))
+            missing = [c for c in EXPECTED_COLUMNS if c not in (reader.fieldnames or [])]
+            if missing:
+                raise UserError(_('Missing required columns: %s') % ', '.join(missing))
+            return list(reader)
+        try:
+            body = json.loads(data)
+        except ValueError:
+            raise UserError(_('The payload is not valid JSON.'))
+        rows = body.get('rows') if isinstance(body, dict) else body
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise UserError(_('The JSON payload must be a list of rows or an object with a "rows" list.'))
+        # JSON numbers are accepted as-is, the wizard parser expects strings
+        return [{key: '' if value is None else str(value) for key, value in row.items()} for row in rows]
+
+    def _get_status(self):
+        """Status resource of the feed, as returned by the HTTP routes."""
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'reference': self.reference,
+            'state': self.state,
+            'rows_total': self.rows_total,
+            'created': self.created_count,
+            'updated': self.updated_count,
+            'duplicates': self.duplicate_count,
+            'errors': self.error_count,
+            'error_details': json.loads(self.error_details or '[]'),
+            'date_done': fields.Datetime.to_string(self.date_done) if self.date_done else None,
+        }
+
+    # ---------------------------------------------------------------------
+    # Processing
+    # ---------------------------------------------------------------------
+    @instrument()
+    def _process(self):
+        """Validate the rows like the CSV import wizard and upsert the valid ones.
+
+        Runs in the background job queued by ``_receive``, as the user who pushed
+        the feed. The upsert commits batch by batch; a retried job processes the
+        whole feed again, which the upsert makes harmless.
+        """
+        self.ensure_one()
+        self.sudo().state = 'processing'
+        self.env['bg.job']._report_progress(0, self.rows_total)
+        rows = self._decode_rows(base64.b64decode(self.payload), self.payload_type)
+        # The wizard's parsing and bulk matching are reused on an in-memory wizard
+        wizard = self.env['vpt.csv.import.wizard'].new({'company_id': self.company_id.id})
+        vals_list, row_numbers, errors = [], [], []
+        # Row numbers as the vendor sees them: CSV lines (after the header), JSON positions
+        rowno = 1 if self.payload_type == 'csv' else 0
+        for batch in split_every(PREVIEW_BATCH_SIZE, rows, list):
+            parsed = []
+            for row in batch:
+                rowno += 1
+                parsed.append(wizard._parse_row(row, rowno))
+            wizard._match_rows(parsed)
+            for vals in parsed:
+                if vals['status'] != 'ok':
+                    errors.append({'row': vals['row_number'], 'message': vals['message']})
+                    continue
+                row_numbers.append(vals['row_number'])
+                vals_list.append({
+                    'product_id': vals['product_id'],
+                    'partner_id': vals['partner_id'],
+                    'currency_id': vals['currency_id'] or self.company_id.currency_id.id,
+                    'price': vals['price'],
+                    'valid_from': vals['valid_from'],
+                    'valid_to': vals.get('valid_to'),
+                    'company_id': self.company_id.id,
+                })
+        result = self.env['vendor.price']._upsert_prices(vals_list, commit=True)
+        if result['cancelled']:
+            self._mark_failed(_('Processing was cancelled.'))
+            return
+        errors += [{'row': row_numbers[index], 'message': msg} for index, msg in result['errors']]
+        self.sudo().write({
+            'state': 'done',
+            'created_count': result['created'],
+            'updated_count': result['updated'],
+            'duplicate_count': result['duplicates'],
+            'error_count': len(errors),
+            'error_details': json.dumps(errors[:MAX_STORED_ERRORS]),
+            'date_done': fields.Datetime.now(),
+        })
+
+    def _mark_failed(self, error):
+        """Failure handler of the processing job."""
+        self.sudo().write({
+            'state': 'failed',
+            'error_details': json.dumps([{'row': None, 'message': error}]),
+            'date_done': fields.Datetime.now(),
+        })
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""Vendor price trend analytics.
+
+Monthly price statistics per product, vendor and company, in company currency,
+built with one SQL aggregate over ``vendor.price``; the trend figures (change,
+volatility, cheapest share) are window functions computed for all products in
+the same statement.
+"""
+
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools import split_every
+from odoo.addons.base_tools_lite.tools import instrument
+
+# Products refreshed per SQL statement
+TREND_BATCH_SIZE = 500
+# Last time the trend table was refreshed incrementally
+TREND_REFRESH_PARAM = 'vendor_price_tracker.trend_refresh_date'
+# Rows are rescanned this far before the watermark: ``write_date`` is the start of
+# the writing transaction, which may commit after the previous run took its snapshot
+TREND_REFRESH_OVERLAP = timedelta(hours=2)
+
+
+class VendorPriceTrend(models.Model):
+    """Monthly vendor price statistics."""
+    _name = 'vendor.price.trend'
+    _description = 'Vendor Price Trend'
+    _order = 'month desc, product_id, partner_id'
+    _rec_name = 'product_id'
+
+    month = fields.Date(required=True, readonly=True, index=True)
+    product_id = fields.Many2one('product.product', required=True, readonly=True, ondelete='cascade', index=True)
+    # Filled by _refresh() and kept in sync by the ORM when a product changes category
+    categ_id = fields.Many2one(related='product_id.categ_id', string='Product Category', store=True,
+                               readonly=True, index=True)
+    partner_id = fields.Many2one('res.partner', string='Vendor', required=True, readonly=True, index=True)
+    company_id = fields.Many2one('res.company', required=True, readonly=True, index=True)
+    currency_id = fields.Many2one(related='company_id.currency_id', store=True, readonly=True)
+    price_min = fields.Monetary(string='Min Price', currency_field='currency_id', readonly=True, aggregator='min')
+    price_avg = fields.Monetary(string='Avg Price', currency_field='currency_id', readonly=True, aggregator='avg')
+    price_max = fields.Monetary(string='Max Price', currency_field='currency_id', readonly=True, aggregator='max')
+    pct_change = fields.Float(string='Change (%)', readonly=True, aggregator='avg',
+                              help='Change of the average price against the previous month with prices.')
+    volatility = fields.Float(string='Volatility (%)', readonly=True, aggregator='avg',
+                              help='Standard deviation of the monthly average over the last 6 months with prices, relative to their mean.')
+    is_cheapest = fields.Boolean(string='Cheapest Vendor', readonly=True)
+    cheapest_share = fields.Float(string='Cheapest Share (%)', readonly=True, aggregator='avg',
+                                  help='Share of the last 12 months with prices in which this vendor had the lowest average price.')
+
+    _sql_constraints = [
+        ('month_product_partner_company_uniq', 'unique(month, product_id, partner_id, company_id)',
+         'Only one trend row per month, product, vendor and company is allowed.'),
+    ]
+
+    @api.model
+    @instrument()
+    def _refresh(self, product_ids, date=None):
+        """Rebuild the trend rows of ``product_ids``.
+
+        Each price contributes to every month of its validity window up to the
+        month of ``date`` (today by default).
+        """
+        product_ids = sorted({pid for pid in product_ids if pid})
+        if not product_ids:
+            return
+        date = date or fields.Date.context_today(self)
+        self.env['vendor.price'].flush_model(['product_id', 'partner_id', 'company_id', 'price_normalized', 'valid_from', 'valid_to'])
+        self.env['product.product'].flush_model(['product_tmpl_id'])
+        self.env['product.template'].flush_model(['categ_id'])
+        cr = self.env.cr
+        for batch in split_every(TREND_BATCH_SIZE, product_ids, list):
+            cr.execute("DELETE FROM vendor_price_trend WHERE product_id = ANY(%s)", [batch])
+            cr.execute("""
+                WITH spread AS (
+                    SELECT vp.product_id, vp.partner_id, vp.company_id, vp.price_normalized AS price, m::date AS month
+                      FROM vendor_price vp
+                CROSS JOIN LATERAL generate_series(
+                               date_trunc('month', vp.valid_from),
+                               date_trunc('month', LEAST(COALESCE(vp.valid_to, %(date)s), %(date)s)),
+                               interval '1 month') AS m
+                     WHERE vp.product_id = ANY(%(products)s)
+                       AND vp.valid_from <= %(date)s
+                ), monthly AS (
+                    SELECT product_id, partner_id, company_id, month,
+                           min(price) AS price_min, avg(price) AS price_avg, max(price) AS price_max
+                      FROM spread
+                  GROUP BY product_id, partner_id, company_id, month
+                ), ranked AS (
+                    SELECT *,
+                           price_avg = min(price_avg) OVER (PARTITION BY product_id, company_id, month) AS is_cheapest,
+                           lag(price_avg) OVER vendor AS prev_avg,
+                           stddev_samp(price_avg) OVER (vendor ROWS BETWEEN 5 PRECEDING AND CURRENT ROW) AS std_6,
+                           avg(price_avg) OVER (vendor ROWS BETWEEN 5 PRECEDING AND CURRENT ROW) AS mean_6
+                      FROM monthly
+                    WINDOW vendor AS (PARTITION BY product_id, partner_id, company_id ORDER BY month)
+                )
+                INSERT INTO vendor_price_trend (
+                    month, product_id, categ_id, partner_id, company_id, currency_id,
+                    price_min, price_avg, price_max, pct_change, volatility, is_cheapest, cheapest_share,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT r.month, r.product_id, t.categ_id, r.partner_id, r.company_id, c.currency_id,
+                       r.price_min, r.price_avg, r.price_max,
+                       CASE WHEN r.prev_avg > 0 THEN 100 * (r.price_avg - r.prev_avg) / r.prev_avg END,
+                       CASE WHEN r.mean_6 > 0 THEN 100 * COALESCE(r.std_6, 0) / r.mean_6 END,
+                       r.is_cheapest,
+                       100 * avg(r.is_cheapest::int) OVER (
+                           PARTITION BY r.product_id, r.partner_id, r.company_id ORDER BY r.month
+                           ROWS BETWEEN 11 PRECEDING AND CURRENT ROW),
+                       %(uid)s, now() at time zone 'UTC', %(uid)s, now() at time zone 'UTC'
+                  FROM ranked r
+                  JOIN product_product p ON p.id = r.product_id
+                  JOIN product_template t ON t.id = p.product_tmpl_id
+                  JOIN res_company c ON c.id = r.company_id
+            """, {'products': batch, 'date': date, 'uid': self.env.uid})
+        self.invalidate_model()
+
+    @api.model
+    @instrument()
+    def _cron_refresh(self):
+        """Refresh the products whose prices changed since the last run.
+
+        The first run of a month rebuilds everything, since open-ended prices
+        extend into the new month. The watermark is the start of this transaction,
+        the clock ``write_date`` is taken from, and is rescanned with an overlap of
+        ``TREND_REFRESH_OVERLAP`` so that long transactions committed after a run
+        are caught by the next one.
+        """
+        params = self.env['ir.config_parameter'].sudo()
+        now = self.env.cr.now()
+        last = fields.Datetime.to_datetime(params.get_param(TREND_REFRESH_PARAM) or False)
+        if last and (last.year, last.month) == (now.year, now.month):
+            self.env.cr.execute("SELECT DISTINCT product_id FROM vendor_price WHERE write_date >= %s",
+                                [last - TREND_REFRESH_OVERLAP])
+        else:
+            self.env.cr.execute("SELECT product_id FROM vendor_price UNION SELECT product_id FROM vendor_price_trend")
+        self._refresh([row[0] for row in self.env.cr.fetchall()])
+        params.set_param(TREND_REFRESH_PARAM, fields.Datetime.to_string(now))
+        return True
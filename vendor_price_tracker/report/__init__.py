@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+from . import vendor_price_report
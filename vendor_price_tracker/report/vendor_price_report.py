@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models
+from odoo.addons.base_tools_lite.tools import replica_env
+
+
+class ReportVendorPriceSnapshot(models.AbstractModel):
+    """Data provider for the vendor price snapshot.
+
+    Loads the prices of all printed products at once (from the read replica when
+    one is usable) and evaluates "current" for the requested date instead of today.
+    """
+    _name = 'report.vendor_price_tracker.report_vendor_price_snapshot'
+    _description = 'Vendor Price Snapshot Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        data = data or {}
+        date = fields.Date.to_date(data.get('date') or self.env.context.get('date')) or fields.Date.context_today(self)
+        products = self.env['product.product'].browse(docids)
+        with replica_env(self.env) as env:
+            rows = env['vendor.price'].search_read(
+                [('product_id', 'in', products.ids)],
+                ['product_id', 'partner_id', 'currency_id', 'price', 'valid_from', 'valid_to'],
+                order='product_id, partner_id, valid_from desc',
+            )
+        prices_by_product = {product.id: [] for product in products}
+        for row in rows:
+            prices_by_product[row['product_id'][0]].append({
+                'vendor': row['partner_id'][1] if row['partner_id'] else '',
+                'price': row['price'],
+                'currency': row['currency_id'][1] if row['currency_id'] else '',
+                'valid_from': row['valid_from'],
+                'valid_to': row['valid_to'],
+                'is_current': row['valid_from'] <= date and (not row['valid_to'] or row['valid_to'] >= date),
+            })
+        return {
+            'doc_ids': products.ids,
+            'doc_model': 'product.product',
+            'docs': products,
+            'date': date,
+            'prices_by_product': prices_by_product,
+        }
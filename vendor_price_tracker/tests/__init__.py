@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+from . import test_best_price
+from . import test_csv_import
+from . import test_currency
+from . import test_expired_prices
+from . import test_price_lookup
+from . import test_price_trend
+from . import test_snapshot_report
+from . import test_upsert
+from . import test_validity_flags
+from . import test_vendor_price_feed
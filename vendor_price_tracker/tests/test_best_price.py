@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from freezegun import freeze_time
+
+from odoo import fields
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.vendor_price_tracker.models import vendor_price_best
+
+
+@tagged('post_install', '-at_install')
+class TestBestPriceCache(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.today()
+        cls.company = cls.env.company
+        cls.vendor_a = cls.env['res.partner'].create({'name': 'Best Vendor A', 'supplier_rank': 1})
+        cls.vendor_b = cls.env['res.partner'].create({'name': 'Best Vendor B', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Best Product'})
+        cls.other_product = cls.env['product.product'].create({'name': 'Best Other Product'})
+
+    def _price(self, vendor, price, product=None, **vals):
+        return self.env['vendor.price'].create(dict({
+            'product_id': (product or self.product).id,
+            'partner_id': vendor.id,
+            'price': price,
+            'valid_from': self.today - timedelta(days=10),
+        }, **vals))
+
+    def _best(self, product=None):
+        return self.env['vendor.price.best'].search([
+            ('product_id', '=', (product or self.product).id), ('company_id', '=', self.company.id)])
+
+    def test_incremental_refresh(self):
+        price_a = self._price(self.vendor_a, 10.0)
+        self.assertEqual((self._best().partner_id, self._best().price, self._best().price_count), (self.vendor_a, 10.0, 1))
+        price_b = self._price(self.vendor_b, 8.0)
+        self.assertEqual((self._best().vendor_price_id, self._best().price_count), (price_b, 2))
+        self.assertEqual((self.product.vpt_best_vendor_id, self.product.vpt_best_price), (self.vendor_b, 8.0))
+
+        price_b.price = 12.0
+        self.assertEqual(self._best().vendor_price_id, price_a)
+        price_a.valid_to = self.today - timedelta(days=1)
+        self.assertEqual((self._best().vendor_price_id, self._best().price_count), (price_b, 1), 'expired prices do not count')
+        price_b.unlink()
+        self.assertFalse(self._best())
+        self.assertEqual(self.product.vpt_price_count, 0)
+
+    def test_product_change_refreshes_both_products(self):
+        price = self._price(self.vendor_a, 10.0)
+        price.product_id = self.other_product
+        self.assertFalse(self._best())
+        self.assertEqual(self._best(self.other_product).vendor_price_id, price)
+
+    def test_future_price_daily_refresh(self):
+        self._price(self.vendor_a, 5.0, valid_from=self.today + timedelta(days=1))
+        self.assertFalse(self._best(), 'not valid yet')
+        with freeze_time(self.today + timedelta(days=1)):
+            self.env['vendor.price.best']._cron_refresh_all()
+        self.assertEqual(self._best().price, 5.0)
+
+    def test_search_and_order(self):
+        self._price(self.vendor_a, 10.0)
+        self._price(self.vendor_b, 4.0, product=self.other_product)
+        Product = self.env['product.product']
+        products = self.product | self.other_product
+        self.assertEqual(Product.search([('id', 'in', products.ids), ('vpt_best_price', '<', 5)]), self.other_product)
+        self.assertEqual(Product.search([('id', 'in', products.ids), ('vpt_best_vendor_id', '=', self.vendor_a.id)]), self.product)
+        self.assertEqual(Product.search([('id', 'in', products.ids), ('vpt_price_count', '>', 0)], order='vpt_best_price').ids,
+                         [self.other_product.id, self.product.id])
+        without_price = Product.create({'name': 'No Price'})
+        self.assertEqual(Product.search([('id', 'in', (products | without_price).ids), ('vpt_best_price', '=', False)]),
+                         without_price)
+
+
+@tagged('post_install', '-at_install')
+class TestBestPriceLookup(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Lookup Best Vendor', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Lookup Best Product'})
+        cls.price = cls.env['vendor.price'].create({
+            'product_id': cls.product.id, 'partner_id': cls.vendor.id, 'price': 10.0,
+            'valid_from': date(2025, 1, 1), 'valid_to': date(2025, 12, 31)})
+
+    def setUp(self):
+        super().setUp()
+        self.Best = self.env['vendor.price.best']
+        self.startPatcher(patch.dict(vendor_price_best._lookup_caches, clear=True))
+
+    def _new_transaction(self):
+        # Without this transaction's own price changes, the worker cache is used
+        self.env.cr.postcommit.data.pop('vendor_price_best.lookup_changed', None)
+
+    def _generation(self):
+        self.env.cr.execute("SELECT generation FROM vendor_price_best_generation")
+        return self.env.cr.fetchone()[0]
+
+    def test_lookup(self):
+        results = self.Best.get_best_prices([
+            {'product_id': self.product.id, 'date': '2025-06-01'},
+            {'product_id': self.product.id, 'date': '2026-06-01'},
+        ])
+        self.assertEqual((results[0]['vendor_price_id'], results[0]['partner_name'], results[0]['price']),
+                         (self.price.id, 'Lookup Best Vendor', 10.0))
+        self.assertEqual((results[0]['company_id'], results[0]['date'], results[0]['price_count']),
+                         (self.env.company.id, '2025-06-01', 1))
+        self.assertEqual((results[1]['vendor_price_id'], results[1]['price_count']), (False, 0))
+        with self.assertRaises(UserError):
+            self.Best.get_best_prices([{'date': '2025-06-01'}])
+        with self.assertRaises(UserError):
+            self.Best.get_best_prices([{'product_id': self.product.id}] * (vendor_price_best.LOOKUP_MAX_KEYS + 1))
+
+    def test_other_company(self):
+        other_company_id = max(self.env.user.company_ids.ids) + 1000
+        result = self.Best.get_best_prices([{'product_id': self.product.id, 'company_id': other_company_id, 'date': '2025-06-01'}])
+        self.assertFalse(result[0]['vendor_price_id'], "companies outside the user's are not looked up")
+
+    def test_refresh_moves_generation(self):
+        generation = self._generation()
+        self.price.price = 9.0
+        self.assertGreater(self._generation(), generation)
+        key = (self.product.id, self.env.company.id, date(2025, 6, 1))
+        self.assertEqual(self.Best._get_best_prices([key])[0][3], 9.0,
+                         'the transaction that changed prices bypasses the worker cache')
+
+    def test_worker_cache(self):
+        self._new_transaction()
+        key = (self.product.id, self.env.company.id, date(2025, 6, 1))
+        self.assertEqual(self.Best._get_best_prices([key])[0][3], 10.0)
+        # Served from the cache while the generation stays
+        cache = vendor_price_best._lookup_caches[self.env.cr.dbname][1]
+        cache[key] = cache[key][:3] + (1.0,) + cache[key][4:]
+        self.assertEqual(self.Best._get_best_prices([key])[0][3], 1.0)
+        # Dropped when another transaction committed a refresh
+        self.env.cr.execute("UPDATE vendor_price_best_generation SET generation = generation + 1")
+        self.assertEqual(self.Best._get_best_prices([key])[0][3], 10.0)
+        # Bypassed by a snapshot older than the cached generation
+        self.env.cr.execute("UPDATE vendor_price_best_generation SET generation = generation - 5")
+        self.assertIsNone(self.Best._lookup_cache())
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import base64
+from unittest.mock import patch
+
+from odoo.exceptions import UserError
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.vendor_price_tracker.wizard import vpt_csv_import
+
+HEADER = 'product_default_code,vendor_name,price,valid_from,valid_to\n'
+
+
+@tagged('post_install', '-at_install')
+class TestCsvImport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'CSV Vendor', 'supplier_rank': 1})
+        cls.customer = cls.env['res.partner'].create({'name': 'CSV Customer'})
+        cls.product = cls.env['product.product'].create({'name': 'CSV Product', 'default_code': 'CSV-1'})
+        cls.env['vendor.price'].create({
+            'product_id': cls.product.id, 'partner_id': cls.vendor.id, 'price': 1.0, 'valid_from': '2025-01-01'})
+
+    def _wizard(self, rows):
+        return self.env['vpt.csv.import.wizard'].create({
+            'data_file': base64.b64encode((HEADER + ''.join(rows)).encode()),
+            'filename': 'prices.csv',
+        })
+
+    def _run_jobs(self):
+        Job = self.env['bg.job']
+        Job.search([('state', '=', 'pending')]).write({'date_scheduled': '2000-01-01 00:00:00'})
+        Job._cron_run_jobs()
+
+    def test_preview_and_import(self):
+        wizard = self._wizard([
+            'CSV-1,CSV Vendor,2.5,2025-01-01,\n',
+            'CSV-1,CSV Vendor,3.0,2025-06-01,2025-12-31\n',
+            'UNKNOWN,CSV Vendor,1,2025-01-01,\n',
+            'CSV-1,CSV Customer,1,2025-01-01,\n',
+            'CSV-1,CSV Vendor,abc,2025-13-01,\n',
+            'CSV-1,CSV Vendor,4,2025-06-01,2025-05-01\n',
+        ])
+        wizard.action_preview()
+        self.assertEqual(wizard.state, 'preview')
+        lines = wizard.line_ids.sorted('row_number')
+        self.assertEqual(lines.mapped('row_number'), [2, 3, 4, 5, 6, 7])
+        self.assertEqual(lines.mapped('status'), ['ok', 'ok', 'error', 'error', 'error', 'error'])
+        self.assertEqual(lines[:2].mapped('action'), ['update', 'create'])
+        self.assertEqual(lines[2].message, 'Product not found')
+        self.assertEqual(lines[3].message, 'Vendor not found or not a supplier')
+        self.assertEqual(lines[5].message, 'valid_to is before valid_from')
+
+        wizard.action_import()
+        self.assertEqual(wizard.state, 'done')
+        self.assertIn('Created: 1\nUpdated: 1', wizard.summary)
+        self.assertIn('Errors: 4', wizard.summary)
+        prices = self.env['vendor.price'].search([('product_id', '=', self.product.id)], order='valid_from')
+        self.assertEqual(prices.mapped('price'), [2.5, 3.0])
+
+    def test_missing_columns(self):
+        wizard = self.env['vpt.csv.import.wizard'].create({
+            'data_file': base64.b64encode(b'product_default_code,price\nCSV-1,1\n')})
+        with self.assertRaisesRegex(UserError, 'Missing required columns: vendor_name, valid_from, valid_to'):
+            wizard.action_preview()
+
+    def test_background_preview_and_import(self):
+        wizard = self._wizard(['CSV-1,CSV Vendor,%s,2025-%02d-01,\n' % (month, month) for month in range(2, 6)])
+        with patch.object(vpt_csv_import, 'BACKGROUND_ROW_THRESHOLD', 2):
+            wizard.action_preview()
+            self.assertEqual((wizard.state, wizard.job_id.state), ('processing', 'pending'))
+            self._run_jobs()
+            self.assertEqual((wizard.state, wizard.job_id.state), ('preview', 'done'))
+            self.assertEqual(wizard.rows_done, 4)
+            self.assertEqual(wizard.line_ids.mapped('status'), ['ok'] * 4)
+
+            wizard.action_import()
+            self.assertEqual(wizard.state, 'processing')
+            self._run_jobs()
+        self.assertEqual(wizard.state, 'done')
+        self.assertEqual(self.env['vendor.price'].search_count([('product_id', '=', self.product.id)]), 5)
+
+    def test_failed_background_job(self):
+        wizard = self._wizard(['CSV-1,CSV Vendor,2,2025-02-01,\n'])
+        wizard.write({'state': 'processing'})
+        wizard._job_failed('ValueError: boom')
+        self.assertEqual(wizard.state, 'draft')
+        self.assertIn('boom', wizard.summary)
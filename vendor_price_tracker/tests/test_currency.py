@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestCurrencyNormalization(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.company = cls.env.company
+        cls.currency = cls.env['res.currency'].create({'name': 'VPX', 'symbol': 'X', 'rounding': 0.01})
+        cls.rate = cls.env['res.currency.rate'].create({
+            'currency_id': cls.currency.id, 'company_id': cls.company.id, 'name': date(2025, 1, 1), 'rate': 2.0})
+        cls.vendor_foreign = cls.env['res.partner'].create({'name': 'Foreign Vendor', 'supplier_rank': 1})
+        cls.vendor_local = cls.env['res.partner'].create({'name': 'Local Vendor', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Currency Product'})
+        cls.foreign = cls.env['vendor.price'].create({
+            'product_id': cls.product.id, 'partner_id': cls.vendor_foreign.id, 'price': 10.0,
+            'currency_id': cls.currency.id, 'valid_from': date(2025, 2, 1)})
+        cls.local = cls.env['vendor.price'].create({
+            'product_id': cls.product.id, 'partner_id': cls.vendor_local.id, 'price': 7.0,
+            'valid_from': date(2025, 2, 1)})
+
+    def _expected(self, amount, day=date(2025, 2, 1)):
+        return self.currency._convert(amount, self.company.currency_id, self.company, day, round=True)
+
+    def _best(self):
+        return self.env['vendor.price.best'].search([('product_id', '=', self.product.id),
+                                                     ('company_id', '=', self.company.id)])
+
+    def test_normalized_price(self):
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0))
+        self.assertEqual(self.local.price_normalized, 7.0)
+        best = min((self.foreign, self.local), key=lambda p: p.price_normalized)
+        self.assertEqual(self._best().vendor_price_id, best, 'vendors are ranked in company currency')
+
+    def test_rate_changes_recompute(self):
+        Currency = self.env['res.currency']
+        stamp = Currency._vpt_rate_stamp()
+        self.rate.rate = 0.5
+        self.assertNotEqual(Currency._vpt_rate_stamp(), stamp, 'the rate table cache is keyed on the rates')
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0))
+        self.assertEqual(self._best().vendor_price_id,
+                         min((self.foreign, self.local), key=lambda p: p.price_normalized))
+
+        # A rate dated after the price does not apply to it...
+        self.env['res.currency.rate'].create({
+            'currency_id': self.currency.id, 'company_id': self.company.id, 'name': date(2025, 3, 1), 'rate': 4.0})
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0))
+        # ...a backfilled one dated before it does
+        self.env['res.currency.rate'].create({
+            'currency_id': self.currency.id, 'company_id': self.company.id, 'name': date(2025, 1, 15), 'rate': 1.0})
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0))
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0, date(2025, 1, 15)))
+
+    def test_rate_deletion_recomputes(self):
+        before = self.foreign.price_normalized
+        self.rate.unlink()
+        self.assertAlmostEqual(self.foreign.price_normalized, self._expected(10.0))
+        self.assertNotAlmostEqual(self.foreign.price_normalized, before)
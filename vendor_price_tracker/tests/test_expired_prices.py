@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from freezegun import freeze_time
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.vendor_price_tracker.models.vendor_price import EXPIRED_PRICES_PARAM
+
+
+@tagged('post_install', '-at_install')
+@freeze_time('2025-06-10')
+class TestExpiredPrices(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Expired Vendor', 'supplier_rank': 1})
+        cls.products = cls.env['product.product'].create([{'name': 'Expired %s' % i} for i in range(3)])
+        cls.env['vendor.price'].create([{
+            'product_id': product.id, 'partner_id': cls.vendor.id, 'price': 5.0,
+            'valid_from': date(2025, 1, 1), 'valid_to': valid_to,
+        } for product, valid_to in (
+            (cls.products[0], date(2025, 6, 9)),
+            (cls.products[1], date(2025, 6, 9)),
+            (cls.products[2], date(2025, 6, 6)),
+        )])
+        cls.param = cls.env['ir.config_parameter'].sudo()
+
+    def _posted(self, product):
+        return product.message_ids.filtered(lambda m: 'vendor prices expired on' in (m.body or ''))
+
+    def test_first_run_reports_yesterday(self):
+        self.param.set_param(EXPIRED_PRICES_PARAM, False)
+        self.env['vendor.price'].cron_post_expired_prices()
+        self.assertEqual([len(self._posted(p)) for p in self.products], [1, 1, 0])
+        self.assertIn('2025-06-09', self._posted(self.products[0]).body)
+        self.assertIn('Expired Vendor', self._posted(self.products[0]).body)
+        self.assertEqual(self.param.get_param(EXPIRED_PRICES_PARAM), '2025-06-09')
+        # Nothing new on a second run
+        self.env['vendor.price'].cron_post_expired_prices()
+        self.assertEqual([len(self._posted(p)) for p in self.products], [1, 1, 0])
+
+    def test_catch_up_missed_days(self):
+        self.param.set_param(EXPIRED_PRICES_PARAM, '2025-06-01')
+        self.env['vendor.price'].cron_post_expired_prices()
+        self.assertEqual([len(self._posted(p)) for p in self.products], [1, 1, 1])
+
+    def test_resume_within_a_day(self):
+        first, second = self.products[:2].sorted('id')
+        self.param.set_param(EXPIRED_PRICES_PARAM, '2025-06-09,%s' % first.id)
+        self.env['vendor.price'].cron_post_expired_prices()
+        self.assertFalse(self._posted(first), 'already posted before the interruption')
+        self.assertTrue(self._posted(second))
+
+    def test_enqueue_once(self):
+        VendorPrice = self.env['vendor.price']
+        domain = [('identity_key', '=', 'vendor_price.post_expired_prices'), ('state', '=', 'pending')]
+        VendorPrice._cron_enqueue_post_expired_prices()
+        VendorPrice._cron_enqueue_post_expired_prices()
+        self.assertEqual(self.env['bg.job'].search_count(domain), 1)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestPriceLookup(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Lookup Vendor', 'supplier_rank': 1})
+        cls.other_vendor = cls.env['res.partner'].create({'name': 'Lookup Other Vendor', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Lookup Product'})
+        cls.company = cls.env.company
+
+        def price(vendor, amount, valid_from, valid_to=False):
+            return cls.env['vendor.price'].create({
+                'product_id': cls.product.id, 'partner_id': vendor.id, 'price': amount,
+                'valid_from': valid_from, 'valid_to': valid_to,
+            })
+
+        cls.q1 = price(cls.vendor, 10.0, date(2025, 1, 1), date(2025, 3, 31))
+        cls.q2 = price(cls.vendor, 12.0, date(2025, 4, 1))
+        # Overlaps q2 from May
+        cls.promo = price(cls.vendor, 9.0, date(2025, 5, 1), date(2025, 5, 31))
+        cls.other = price(cls.other_vendor, 11.0, date(2025, 1, 1))
+
+    def test_point_in_time(self):
+        VendorPrice = self.env['vendor.price']
+        self.assertEqual(VendorPrice._get_price_at(self.product, self.vendor, date(2025, 3, 31)), self.q1,
+                         'valid_to is inclusive')
+        self.assertEqual(VendorPrice._get_price_at(self.product, self.vendor, date(2025, 4, 1)), self.q2)
+        self.assertFalse(VendorPrice._get_price_at(self.product, self.vendor, date(2024, 12, 31)))
+        keys = [
+            (self.product.id, self.vendor.id, date(2025, 5, 15), self.company.id),
+            (self.product.id, self.other_vendor.id, date(2030, 1, 1), self.company.id),
+            (self.product.id, self.vendor.id, date(2025, 2, 1), self.company.id + 1000),
+            (self.product.id, self.vendor.id, date(2025, 6, 1), self.company.id),
+        ]
+        result = VendorPrice._get_prices_at(keys, batch_size=2)
+        self.assertEqual(result, [self.promo, self.other, VendorPrice, self.q2],
+                         'the latest-starting window wins, results stay in key order across batches')
+
+    def test_overlaps(self):
+        VendorPrice = self.env['vendor.price']
+        self.assertEqual(VendorPrice._find_validity_overlaps([('product_id', '=', self.product.id)]),
+                         [(self.q2.id, self.promo.id)])
+        self.assertEqual(VendorPrice._find_validity_overlaps([('id', '=', self.q1.id)]), [])
+        action = (self.q1 | self.promo).action_check_overlaps()
+        self.assertEqual(VendorPrice.search(action['domain']), self.q2 | self.promo)
+
+    def test_overlap_constraint_refused_with_overlaps(self):
+        self.env['ir.config_parameter'].sudo().set_param('vendor_price_tracker.exclude_overlaps', 'True')
+        self.assertFalse(self.env['vendor.price']._apply_overlap_constraint())
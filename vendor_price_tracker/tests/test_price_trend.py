@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from psycopg2 import IntegrityError
+
+from odoo.tests import TransactionCase, tagged
+from odoo.tools import mute_logger
+
+from odoo.addons.vendor_price_tracker.models.vendor_price_trend import TREND_REFRESH_PARAM
+
+
+@tagged('post_install', '-at_install')
+class TestPriceTrend(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor_a = cls.env['res.partner'].create({'name': 'Trend Vendor A', 'supplier_rank': 1})
+        cls.vendor_b = cls.env['res.partner'].create({'name': 'Trend Vendor B', 'supplier_rank': 1})
+        cls.categ = cls.env['product.category'].create({'name': 'Trend Category'})
+        cls.product = cls.env['product.product'].create({'name': 'Trend Product', 'categ_id': cls.categ.id})
+        cls.env['vendor.price'].create([{
+            'product_id': cls.product.id, 'partner_id': vendor.id, 'price': price,
+            'valid_from': valid_from, 'valid_to': valid_to,
+        } for vendor, price, valid_from, valid_to in (
+            (cls.vendor_a, 10.0, date(2025, 1, 1), date(2025, 3, 31)),
+            (cls.vendor_a, 20.0, date(2025, 2, 1), date(2025, 2, 28)),
+            (cls.vendor_b, 12.0, date(2025, 2, 1), False),
+        )])
+
+    def _trends(self, vendor):
+        return self.env['vendor.price.trend'].search([
+            ('product_id', '=', self.product.id), ('partner_id', '=', vendor.id)], order='month')
+
+    def test_monthly_statistics(self):
+        self.env['vendor.price.trend']._refresh(self.product.ids, date=date(2025, 3, 15))
+        trend_a, trend_b = self._trends(self.vendor_a), self._trends(self.vendor_b)
+        self.assertEqual(trend_a.mapped('month'), [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)])
+        self.assertEqual(trend_b.mapped('month'), [date(2025, 2, 1), date(2025, 3, 1)], 'open-ended up to the refresh month')
+        self.assertEqual([(t.price_min, t.price_avg, t.price_max) for t in trend_a],
+                         [(10.0, 10.0, 10.0), (10.0, 15.0, 20.0), (10.0, 10.0, 10.0)])
+        self.assertFalse(trend_a[0].pct_change, 'no previous month')
+        self.assertAlmostEqual(trend_a[1].pct_change, 50.0)
+        self.assertAlmostEqual(trend_a[2].pct_change, -100 / 3, places=2)
+        self.assertEqual(trend_a.mapped('is_cheapest'), [True, False, True])
+        self.assertEqual(trend_b.mapped('is_cheapest'), [True, False])
+        self.assertAlmostEqual(trend_a[2].cheapest_share, 200 / 3, places=2)
+        self.assertEqual((trend_a | trend_b).categ_id, self.categ)
+
+    def test_category_follows_product(self):
+        self.env['vendor.price.trend']._refresh(self.product.ids, date=date(2025, 3, 15))
+        other = self.env['product.category'].create({'name': 'Trend Other Category'})
+        self.product.categ_id = other
+        self.assertEqual(self._trends(self.vendor_a).categ_id, other)
+
+    def test_one_row_per_key(self):
+        self.env['vendor.price.trend']._refresh(self.product.ids, date=date(2025, 3, 15))
+        row = self._trends(self.vendor_a)[:1]
+        with mute_logger('odoo.sql_db'), self.assertRaises(IntegrityError), self.env.cr.savepoint():
+            self.env.cr.execute("""
+                INSERT INTO vendor_price_trend (month, product_id, partner_id, company_id)
+                VALUES (%s, %s, %s, %s)
+            """, [row.month, row.product_id.id, row.partner_id.id, row.company_id.id])
+
+    def test_cron_watermark(self):
+        Param = self.env['ir.config_parameter'].sudo()
+        Param.set_param(TREND_REFRESH_PARAM, False)
+        self.env['vendor.price.trend']._cron_refresh()
+        self.assertTrue(self._trends(self.vendor_b), 'first run rebuilds everything')
+        self.assertTrue(Param.get_param(TREND_REFRESH_PARAM))
+        # A later run of the month refreshes the products changed since (minus the overlap)
+        self.env.cr.execute("DELETE FROM vendor_price_trend WHERE product_id = %s", [self.product.id])
+        self.env['vendor.price.trend'].invalidate_model()
+        self.env['vendor.price.trend']._cron_refresh()
+        self.assertTrue(self._trends(self.vendor_b))
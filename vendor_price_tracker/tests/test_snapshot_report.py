@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.vendor_price_tracker.wizard import vpt_snapshot_wizard
+
+REPORT = 'report.vendor_price_tracker.report_vendor_price_snapshot'
+
+
+@tagged('post_install', '-at_install')
+class TestSnapshotReport(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Snapshot Vendor', 'supplier_rank': 1})
+        cls.categ = cls.env['product.category'].create({'name': 'Snapshot Category'})
+        cls.subcateg = cls.env['product.category'].create({'name': 'Snapshot Sub', 'parent_id': cls.categ.id})
+        cls.products = cls.env['product.product'].create([
+            {'name': 'Snapshot %s' % i, 'categ_id': (cls.categ if i % 2 else cls.subcateg).id} for i in range(6)
+        ])
+        cls.env['vendor.price'].create([{
+            'product_id': product.id, 'partner_id': cls.vendor.id, 'price': price,
+            'valid_from': valid_from, 'valid_to': valid_to,
+        } for product in cls.products for price, valid_from, valid_to in (
+            (10.0, date(2025, 1, 1), date(2025, 1, 31)),
+            (12.0, date(2025, 2, 1), False),
+        )])
+
+    def _report_values(self, products, day):
+        self.env.invalidate_all()
+        before = self.env.cr.sql_log_count
+        values = self.env[REPORT]._get_report_values(products.ids, data={'date': day})
+        return values, self.env.cr.sql_log_count - before
+
+    def test_current_as_of_date(self):
+        values, __ = self._report_values(self.products[:1], '2025-01-15')
+        self.assertEqual(values['date'], date(2025, 1, 15))
+        rows = values['prices_by_product'][self.products[0].id]
+        self.assertEqual([(row['price'], row['is_current']) for row in rows], [(12.0, False), (10.0, True)])
+        self.assertEqual(rows[0]['vendor'], 'Snapshot Vendor')
+        values, __ = self._report_values(self.products[:1], '2025-03-01')
+        self.assertEqual([row['is_current'] for row in values['prices_by_product'][self.products[0].id]], [True, False])
+
+    def test_queries_independent_of_products(self):
+        __, few = self._report_values(self.products[:2], '2025-03-01')
+        values, many = self._report_values(self.products, '2025-03-01')
+        self.assertEqual(few, many)
+        self.assertEqual(len(values['prices_by_product']), 6)
+
+    def test_wizard(self):
+        wizard = self.env['vpt.snapshot.wizard'].create({'date': '2025-03-01', 'categ_id': self.categ.id})
+        self.assertEqual(wizard._get_products(), self.products, 'subcategories included')
+        action = wizard.action_print()
+        self.assertEqual((action['type'], action['data']), ('ir.actions.report', {'date': '2025-03-01'}))
+        with patch.object(vpt_snapshot_wizard, 'SNAPSHOT_BACKGROUND_THRESHOLD', 4):
+            action = wizard.action_print()
+        job = self.env['bg.job'].browse(action['res_id'])
+        self.assertEqual((job.method, job.kwargs, job.result_type), ('_vpt_render_snapshot', {'date': '2025-03-01'}, 'pdf'))
+        self.assertEqual(sorted(job.res_ids), sorted(self.products.ids))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from datetime import date
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestUpsertPrices(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Upsert Vendor', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Upsert Product'})
+        deleted = cls.env['product.product'].create({'name': 'Deleted Product'})
+        cls.deleted_product_id = deleted.id
+        deleted.unlink()
+
+    def _vals(self, price, valid_from=date(2025, 1, 1), product_id=None, **vals):
+        return dict({
+            'product_id': product_id or self.product.id,
+            'partner_id': self.vendor.id,
+            'price': price,
+            'valid_from': valid_from,
+        }, **vals)
+
+    def _prices(self):
+        return self.env['vendor.price'].search([('product_id', '=', self.product.id)], order='valid_from')
+
+    def _best(self):
+        # Rows are rebuilt by each refresh
+        return self.env['vendor.price.best'].search([('product_id', '=', self.product.id)])
+
+    def test_insert_update_and_duplicates(self):
+        VendorPrice = self.env['vendor.price']
+        result = VendorPrice._upsert_prices([
+            self._vals(10.0),
+            self._vals(11.0, valid_from=date(2025, 2, 1), valid_to=date(2025, 2, 28)),
+            self._vals(12.0),
+        ])
+        self.assertEqual((result['created'], result['updated'], result['duplicates'], result['errors']), (2, 0, 1, []))
+        prices = self._prices()
+        self.assertEqual(prices.mapped('price'), [12.0, 11.0], 'the last row of a key wins')
+        self.assertEqual(prices[0].display_name, '%s - %s (2025-01-01)' % (self.product.display_name, self.vendor.display_name))
+        self.assertEqual(prices.mapped('is_current'), [True, False])
+        self.assertFalse(prices.message_ids.tracking_value_ids, 'no tracking messages for bulk writes')
+        self.assertEqual(self._best().vendor_price_id, prices[0])
+
+        result = VendorPrice._upsert_prices([self._vals(9.0), self._vals(8.0, valid_from=date(2025, 3, 1))])
+        self.assertEqual((result['created'], result['updated']), (1, 1))
+        self.assertEqual(self._prices().mapped('price'), [9.0, 11.0, 8.0])
+        self.assertEqual(self._best().price, 8.0, 'best price refreshed after the upsert')
+
+    def test_failed_batch_retried_row_by_row(self):
+        result = self.env['vendor.price']._upsert_prices([
+            self._vals(10.0),
+            self._vals(10.0, product_id=self.deleted_product_id),
+            self._vals(11.0, valid_from=date(2025, 2, 1)),
+        ], batch_size=10)
+        self.assertEqual((result['created'], result['updated']), (2, 0))
+        self.assertEqual([index for index, __ in result['errors']], [1])
+        self.assertEqual(len(self._prices()), 2)
+
+    def test_committed_batches(self):
+        rows = [self._vals(10.0 + month, valid_from=date(2025, month, 1)) for month in range(1, 4)]
+        # Outside a background job the batches are not committed and never cancelled
+        result = self.env['vendor.price']._upsert_prices(rows, batch_size=1, commit=True)
+        self.assertEqual((result['created'], result['cancelled']), (3, False))
+
+    def test_cancelled_job_stops_after_batch(self):
+        job = self.env['bg.job'].create({
+            'name': 'Upsert', 'res_model': 'vendor.price', 'method': '_upsert_prices',
+            'state': 'running', 'cancel_requested': True,
+        })
+        rows = [self._vals(10.0 + month, valid_from=date(2025, month, 1)) for month in range(1, 4)]
+        result = self.env['vendor.price'].with_context(bg_job_id=job.id)._upsert_prices(rows, batch_size=1, commit=True)
+        self.assertEqual((result['created'], result['cancelled']), (1, True))
+        self.assertEqual((job.progress_done, job.progress_total), (1, 3))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+
+from freezegun import freeze_time
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.vendor_price_tracker.models.vendor_price import VALIDITY_FLAGS_PARAM
+
+
+@tagged('post_install', '-at_install')
+class TestValidityFlags(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.today = fields.Date.today()
+        vendor = cls.env['res.partner'].create({'name': 'Flag Vendor', 'supplier_rank': 1})
+        product = cls.env['product.product'].create({'name': 'Flag Product'})
+
+        def price(valid_from, valid_to=False):
+            return cls.env['vendor.price'].create({
+                'product_id': product.id, 'partner_id': vendor.id, 'price': 1.0,
+                'valid_from': cls.today + timedelta(days=valid_from),
+                'valid_to': valid_to is not False and cls.today + timedelta(days=valid_to),
+            })
+
+        cls.ending = price(-10, 1)
+        cls.starting = price(2)
+        cls.expiring_later = price(-10, 40)
+        cls.open_ended = price(-10)
+        cls.prices = cls.ending | cls.starting | cls.expiring_later | cls.open_ended
+        cls.param = cls.env['ir.config_parameter'].sudo()
+
+    def _flags(self):
+        self.prices.invalidate_recordset(['is_current', 'is_expiring_30'])
+        return [(p.is_current, p.is_expiring_30) for p in self.prices]
+
+    def test_flags_of_the_write_day(self):
+        self.assertEqual(self._flags(), [(True, True), (False, False), (True, False), (True, False)])
+        self.assertEqual(self.env['vendor.price'].search([('id', 'in', self.prices.ids), ('is_current', '=', False)]),
+                         self.starting)
+
+    def test_daily_rollover(self):
+        self.param.set_param(VALIDITY_FLAGS_PARAM, fields.Date.to_string(self.today))
+        with freeze_time(self.today + timedelta(days=12)):
+            self.env['vendor.price'].cron_refresh_validity_flags()
+        self.assertEqual(self._flags(), [(False, False), (True, False), (True, True), (True, False)])
+        self.assertEqual(self.param.get_param(VALIDITY_FLAGS_PARAM),
+                         fields.Date.to_string(self.today + timedelta(days=12)))
+
+    def test_same_day_run_is_noop(self):
+        self.param.set_param(VALIDITY_FLAGS_PARAM, fields.Date.to_string(self.today))
+        # A stale flag outside the watermark window is left alone on the same day...
+        self.env.cr.execute("UPDATE vendor_price SET is_current = FALSE WHERE id = %s", [self.open_ended.id])
+        self.env['vendor.price'].cron_refresh_validity_flags()
+        self.assertEqual(self._flags()[3], (False, False))
+        # ...and fixed by a run without watermark, which checks every row
+        self.param.set_param(VALIDITY_FLAGS_PARAM, False)
+        self.env['vendor.price'].cron_refresh_validity_flags()
+        self.assertEqual(self._flags()[3], (True, False))
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import HttpCase, new_test_user, tagged
+
+FEED_URL = '/vendor_price_tracker/feed'
+
+
+class FeedClient:
+    """Stub of a vendor system pushing price batches to the feed endpoint."""
+
+    def __init__(self, case, api_key):
+        self.case = case
+        self.api_key = api_key
+
+    def _headers(self, extra=None):
+        headers = dict(extra or {})
+        if self.api_key:
+            headers['Authorization'] = 'Bearer %s' % self.api_key
+        return headers
+
+    def push(self, payload, content_type='application/json', reference=None):
+        if not isinstance(payload, bytes):
+            payload = json.dumps(payload).encode()
+        headers = {'Content-Type': content_type}
+        if reference:
+            headers['X-Batch-Reference'] = reference
+        return self.case.url_open(FEED_URL, data=payload, headers=self._headers(headers))
+
+    def status(self, feed_id):
+        return self.case.url_open('%s/%s' % (FEED_URL, feed_id), headers=self._headers())
+
+
+@tagged('post_install', '-at_install')
+class TestVendorPriceFeed(HttpCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.vendor = cls.env['res.partner'].create({'name': 'Feed Vendor', 'supplier_rank': 1})
+        cls.product = cls.env['product.product'].create({'name': 'Feed Product', 'default_code': 'FEED-1'})
+        cls.user = new_test_user(cls.env, login='feed_user', groups='base.group_user,vendor_price_tracker.group_vpt_user')
+        cls.other_user = new_test_user(cls.env, login='feed_other', groups='base.group_user,vendor_price_tracker.group_vpt_user')
+        cls.client = FeedClient(cls, cls._api_key(cls.user))
+
+    @classmethod
+    def _api_key(cls, user):
+        expiration = fields.Datetime.now() + timedelta(days=1)
+        return cls.env['res.users.apikeys'].with_user(user)._generate(None, 'price feed', expiration)
+
+    def _rows(self, price=9.5):
+        return [{
+            'product_default_code': 'FEED-1',
+            'vendor_name': 'Feed Vendor',
+            'price': price,
+            'valid_from': '2025-09-01',
+        }]
+
+    def _process_pending(self):
+        Job = self.env['bg.job'].sudo()
+        # The runner compares with the transaction time, which precedes the jobs
+        Job.search([('state', '=', 'pending')]).write({'date_scheduled': '2000-01-01 00:00:00'})
+        Job._cron_run_jobs()
+
+    def _prices(self):
+        return self.env['vendor.price'].search([('product_id', '=', self.product.id), ('partner_id', '=', self.vendor.id)])
+
+    def test_push_valid(self):
+        response = self.client.push({'reference': 'PL-1', 'rows': self._rows()})
+        self.assertEqual(response.status_code, 202)
+        status = response.json()
+        self.assertEqual(status['reference'], 'PL-1')
+        self.assertEqual(status['state'], 'pending')
+        self.assertEqual(response.headers['Location'], '%s/%s' % (FEED_URL, status['id']))
+
+        self._process_pending()
+        status = self.client.status(status['id']).json()
+        self.assertEqual(status['state'], 'done')
+        self.assertEqual((status['created'], status['updated'], status['errors']), (1, 0, 0))
+        self.assertEqual(self._prices().price, 9.5)
+
+    def test_push_csv_with_row_errors(self):
+        payload = b'product_default_code,vendor_name,price,valid_from,valid_to\n' \
+                  b'FEED-1,Feed Vendor,7.25,2025-09-01,\n' \
+                  b'UNKNOWN,Feed Vendor,3,2025-09-01,\n'
+        response = self.client.push(payload, content_type='text/csv', reference='PL-CSV')
+        self.assertEqual(response.status_code, 202)
+        self._process_pending()
+        status = self.client.status(response.json()['id']).json()
+        self.assertEqual((status['state'], status['created'], status['errors']), ('done', 1, 1))
+        self.assertEqual(status['error_details'][0]['row'], 3)
+
+    def test_replayed_reference(self):
+        first = self.client.push({'reference': 'PL-2', 'rows': self._rows()})
+        self._process_pending()
+        # Same reference with another payload: the stored batch is returned, nothing is queued
+        replay = self.client.push({'reference': 'PL-2', 'rows': self._rows(price=1.0)})
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()['id'], first.json()['id'])
+        self.assertEqual(replay.json()['state'], 'done')
+        self.assertFalse(self.env['bg.job'].sudo().search([('state', '=', 'pending')]))
+        self.assertEqual(self._prices().price, 9.5)
+
+    def test_replayed_checksum(self):
+        payload = json.dumps(self._rows()).encode()
+        first = self.client.push(payload, reference='PL-3')
+        replay = self.client.push(payload, reference='PL-3-resent')
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json()['id'], first.json()['id'])
+        self.assertEqual(self.env['vendor.price.feed'].sudo().search_count([('user_id', '=', self.user.id)]), 1)
+
+    def test_replay_scoped_to_sender(self):
+        first = self.client.push({'reference': 'PL-4', 'rows': self._rows()})
+        other = FeedClient(self, self._api_key(self.other_user)).push({'reference': 'PL-4', 'rows': self._rows()})
+        self.assertEqual(other.status_code, 202)
+        self.assertNotEqual(other.json()['id'], first.json()['id'])
+
+    def test_resend_failed_feed(self):
+        first = self.client.push({'reference': 'PL-5', 'rows': self._rows()})
+        feed = self.env['vendor.price.feed'].browse(first.json()['id'])
+        feed.job_id.sudo().state = 'failed'
+        feed._mark_failed('database unavailable')
+        resent = self.client.push({'reference': 'PL-5', 'rows': self._rows(price=8.0)})
+        self.assertEqual(resent.status_code, 202)
+        self.assertEqual(resent.json()['id'], feed.id)
+        self.assertEqual((resent.json()['state'], resent.json()['error_details']), ('pending', []))
+        self._process_pending()
+        self.assertEqual(self.client.status(feed.id).json()['state'], 'done')
+        self.assertEqual(self._prices().price, 8.0)
+
+    def test_invalid_payload(self):
+        response = self.client.push(b'{"rows": ', reference='PL-6')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.push({'rows': 'not a list'}, reference='PL-6')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.push(b'code,vendor\nFEED-1,Feed Vendor\n', content_type='text/csv', reference='PL-6')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.push(b'<prices/>', content_type='application/xml', reference='PL-6')
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(self.env['vendor.price.feed'].sudo().search([('reference', '=', 'PL-6')]))
+
+    def test_bearer_auth_failure(self):
+        for api_key in (None, 'not-a-valid-key'):
+            response = FeedClient(self, api_key).push({'reference': 'PL-7', 'rows': self._rows()})
+            self.assertEqual(response.status_code, 401)
+        # A valid key of a user without the Vendor Prices group
+        outsider = new_test_user(self.env, login='feed_outsider', groups='base.group_user')
+        response = FeedClient(self, self._api_key(outsider)).push({'reference': 'PL-7', 'rows': self._rows()})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.env['vendor.price.feed'].sudo().search([('reference', '=', 'PL-7')]))
@@ -1,2 +1,3 @@
 # -*- coding: utf-8 -*-
 from . import vpt_csv_import
+from . import vpt_snapshot_wizard
@@ -6,9 +6,16 @@ from datetime import datetime
 
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
-
+from odoo.tools import split_every
+from odoo.addons.base_tools_lite.tools import instrument
 
 EXPECTED_COLUMNS = ['product_default_code', 'vendor_name', 'price', 'valid_from', 'valid_to']
+# Optional column: ISO code of the price currency (company currency when empty)
+CURRENCY_COLUMN = 'currency'
+# Rows validated per batch (one product, vendor and price lookup each)
+PREVIEW_BATCH_SIZE = 2000
+# Files (or previews) with more rows than this are processed by a background job
+BACKGROUND_ROW_THRESHOLD = 20000
 
 
 class VptCsvImportLine(models.TransientModel):
@@ -23,7 +30,9 @@ class VptCsvImportLine(models.TransientModel):
     price = fields.Float(readonly=True)
     valid_from = fields.Date(readonly=True)
     valid_to = fields.Date(readonly=True)
+    currency_code = fields.Char(string='Currency Code', readonly=True)
 
+    currency_id = fields.Many2one('res.currency', readonly=True)
     product_id = fields.Many2one('product.product', readonly=True)
     partner_id = fields.Many2one('res.partner', readonly=True)
 
@@ -39,8 +48,18 @@ class VptCsvImportWizard(models.TransientModel):
     data_file = fields.Binary(string='CSV File', required=True)
     filename = fields.Char()
     line_ids = fields.One2many('vpt.csv.import.line', 'wizard_id', string='Lines')
-    state = fields.Selection([('draft', 'Draft'), ('preview', 'Preview'), ('done', 'Done')], default='draft')
+    state = fields.Selection([('draft', 'Draft'), ('processing', 'Processing'), ('preview', 'Preview'), ('done', 'Done')], default='draft')
     summary = fields.Text(readonly=True)
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+    rows_total = fields.Integer(readonly=True)
+    rows_done = fields.Integer(readonly=True)
+    progress = fields.Float(compute='_compute_progress')
+    job_id = fields.Many2one('bg.job', string='Background Job', readonly=True)
+
+    @api.depends('rows_total', 'rows_done')
+    def _compute_progress(self):
+        for wizard in self:
+            wizard.progress = 100.0 * wizard.rows_done / wizard.rows_total if wizard.rows_total else 0.0
 
     def _decode_csv(self):
         self.ensure_one()
@@ -54,72 +73,26 @@ class VptCsvImportWizard(models.TransientModel):
             text = data.decode('latin-1')
         return io.StringIO(text)
 
+    @instrument()
     def action_preview(self):
         self.ensure_one()
         # reset previous lines
         self.line_ids.unlink()
         f = self._decode_csv()
         reader = csv.DictReader(f)
-        missing = [c for c in EXPECTED_COLUMNS if c not in reader.fieldnames]
+        missing = [c for c in EXPECTED_COLUMNS if c not in (reader.fieldnames or [])]
         if missing:
             raise UserError(_('Missing required columns: %s') % ', '.join(missing))
-        lines = self.env['vpt.csv.import.line']
-        rowno = 1
-        for row in reader:
-            rowno += 1
-            vals = {
-                'wizard_id': self.id,
-                'row_number': rowno,
-                'product_default_code': (row.get('product_default_code') or '').strip(),
-                'vendor_name': (row.get('vendor_name') or '').strip(),
-            }
-            # parse price
-            msg = ''
-            status = 'ok'
-            try:
-                vals['price'] = float(row.get('price') or 0.0)
-            except Exception:
-                status, msg = 'error', _('Invalid price')
-            # parse dates
-            dt_format = '%Y-%m-%d'
-            try:
-                vals['valid_from'] = datetime.strptime((row.get('valid_from') or '').strip(), dt_format).date()
-            except Exception:
-                status, msg = 'error', _('Invalid valid_from (expected YYYY-MM-DD)')
-            valid_to_str = (row.get('valid_to') or '').strip()
-            if valid_to_str:
-                try:
-                    vals['valid_to'] = datetime.strptime(valid_to_str, dt_format).date()
-                except Exception:
-                    status, msg = 'error', _('Invalid valid_to (expected YYYY-MM-DD)')
-            # find product
-            product = self.env['product.product'].search([('default_code', '=', vals['product_default_code'])], limit=1)
-            if not product:
-                status, msg = 'error', _('Product not found')
-            # find vendor
-            partner = self.env['res.partner'].search([('name', '=', vals['vendor_name']), ('supplier_rank', '>', 0)], limit=1)
-            if not partner:
-                status, msg = 'error', _('Vendor not found or not a supplier')
-            if status == 'ok' and vals.get('valid_to') and vals['valid_to'] < vals['valid_from']:
-                status, msg = 'error', _('valid_to is before valid_from')
-            vals['status'] = status
-            vals['message'] = msg
-            vals['product_id'] = product.id if product else False
-            vals['partner_id'] = partner.id if partner else False
-            # check existing
-            action = 'create'
-            if status == 'ok':
-                existing = self.env['vendor.price'].search([
-                    ('product_id', '=', product.id),
-                    ('partner_id', '=', partner.id),
-                    ('valid_from', '=', vals['valid_from']),
-                    ('company_id', '=', self.env.company.id),
-                ], limit=1)
-                if existing:
-                    action = 'update'
-            vals['action'] = action
-            lines |= lines.create(vals)
+        # Very large files are previewed by a background job
+        rows_total = f.getvalue().count('\n')
+        if rows_total > BACKGROUND_ROW_THRESHOLD:
+            self._enqueue_job('_job_preview', _('Vendor price import preview: %s'), rows_total)
+            return self._reopen()
+        self._preview_rows(reader)
         self.state = 'preview'
+        return self._reopen()
+
+    def _reopen(self):
         return {
             'type': 'ir.actions.act_window',
             'res_model': 'vpt.csv.import.wizard',
@@ -128,43 +101,181 @@ class VptCsvImportWizard(models.TransientModel):
             'target': 'new',
         }
 
+    def action_refresh(self):
+        """Reload the wizard while a background preview or import is running."""
+        self.ensure_one()
+        return self._reopen()
+
+    def action_cancel_job(self):
+        """Stop the background preview or import and go back to the upload step."""
+        self.ensure_one()
+        self.job_id.action_cancel()
+        self.state = 'draft'
+        return self._reopen()
+
+    def _enqueue_job(self, method, name, rows_total):
+        self.write({'state': 'processing', 'rows_total': rows_total, 'rows_done': 0})
+        self.job_id = self.env['bg.job']._enqueue(
+            self, method, name=name % (self.filename or _('CSV file')), failure_method='_job_failed')
+
+    def _job_failed(self, error):
+        """Give the wizard back to the user when its background job gave up."""
+        self.write({'state': 'draft', 'summary': _('Background processing failed: %s') % error})
+
+    def _preview_rows(self, reader, commit=False):
+        """Validate and match the CSV rows in batches and create the preview lines.
+
+        Each batch costs a fixed number of queries (products, vendors, existing
+        prices, one ``create``) whatever its size.
+
+        Args:
+            reader: csv.DictReader positioned on the first data row.
+            commit: commit after each batch and report progress (background job).
+
+        Returns:
+            bool: False when the background job was cancelled before the end.
+        """
+        Line = self.env['vpt.csv.import.line']
+        rowno = 1
+        for batch in split_every(PREVIEW_BATCH_SIZE, reader, list):
+            vals_list = []
+            for row in batch:
+                rowno += 1
+                vals_list.append(self._parse_row(row, rowno))
+            self._match_rows(vals_list)
+            Line.create(vals_list)
+            if commit:
+                self.rows_done = rowno - 1
+                if not self.env['bg.job']._report_progress(rowno - 1, self.rows_total):
+                    return False
+        return True
+
+    def _parse_row(self, row, rowno):
+        """Parse one CSV row into preview line values (without database lookups)."""
+        vals = {
+            'wizard_id': self.id,
+            'row_number': rowno,
+            'product_default_code': (row.get('product_default_code') or '').strip(),
+            'vendor_name': (row.get('vendor_name') or '').strip(),
+            'currency_code': (row.get(CURRENCY_COLUMN) or '').strip().upper(),
+        }
+        # parse price
+        msg = ''
+        status = 'ok'
+        try:
+            vals['price'] = float(row.get('price') or 0.0)
+        except Exception:
+            status, msg = 'error', _('Invalid price')
+        # parse dates
+        dt_format = '%Y-%m-%d'
+        try:
+            vals['valid_from'] = datetime.strptime((row.get('valid_from') or '').strip(), dt_format).date()
+        except Exception:
+            status, msg = 'error', _('Invalid valid_from (expected YYYY-MM-DD)')
+        valid_to_str = (row.get('valid_to') or '').strip()
+        if valid_to_str:
+            try:
+                vals['valid_to'] = datetime.strptime(valid_to_str, dt_format).date()
+            except Exception:
+                status, msg = 'error', _('Invalid valid_to (expected YYYY-MM-DD)')
+        vals['status'] = status
+        vals['message'] = msg
+        return vals
+
+    def _match_rows(self, vals_list):
+        """Resolve products, vendors, currencies and existing prices for parsed rows in bulk."""
+        codes = {vals['product_default_code'] for vals in vals_list}
+        currency_codes = {vals['currency_code'] for vals in vals_list if vals['currency_code']}
+        names = {vals['vendor_name'] for vals in vals_list}
+        product_by_code = {}
+        for product in self.env['product.product'].search_read([('default_code', 'in', list(codes))], ['default_code']):
+            product_by_code.setdefault(product['default_code'], product['id'])
+        partner_by_name = {}
+        for partner in self.env['res.partner'].search_read(
+                [('name', 'in', list(names)), ('supplier_rank', '>', 0)], ['name']):
+            partner_by_name.setdefault(partner['name'], partner['id'])
+        currency_by_code = {}
+        if currency_codes:
+            currency_by_code = {c['name']: c['id'] for c in self.env['res.currency'].search_read(
+                [('name', 'in', list(currency_codes))], ['name'])}
+
+        for vals in vals_list:
+            status, msg = vals['status'], vals['message']
+            product_id = product_by_code.get(vals['product_default_code'], False)
+            if not product_id:
+                status, msg = 'error', _('Product not found')
+            partner_id = partner_by_name.get(vals['vendor_name'], False)
+            if not partner_id:
+                status, msg = 'error', _('Vendor not found or not a supplier')
+            currency_id = currency_by_code.get(vals['currency_code'], False)
+            if vals['currency_code'] and not currency_id:
+                status, msg = 'error', _('Unknown or inactive currency %s') % vals['currency_code']
+            if status == 'ok' and vals.get('valid_to') and vals['valid_to'] < vals['valid_from']:
+                status, msg = 'error', _('valid_to is before valid_from')
+            vals.update(status=status, message=msg, product_id=product_id, partner_id=partner_id,
+                        currency_id=currency_id)
+
+        existing = self._existing_price_keys([vals for vals in vals_list if vals['status'] == 'ok'])
+        for vals in vals_list:
+            key = (vals['product_id'], vals['partner_id'], vals.get('valid_from'))
+            vals['action'] = 'update' if vals['status'] == 'ok' and key in existing else 'create'
+
+    def _existing_price_keys(self, vals_list):
+        """Return the ``(product_id, partner_id, valid_from)`` keys already stored for the company."""
+        if not vals_list:
+            return set()
+        prices = self.env['vendor.price'].search_read([
+            ('product_id', 'in', list({vals['product_id'] for vals in vals_list})),
+            ('partner_id', 'in', list({vals['partner_id'] for vals in vals_list})),
+            ('valid_from', 'in', list({vals['valid_from'] for vals in vals_list})),
+            ('company_id', '=', self.company_id.id),
+        ], ['product_id', 'partner_id', 'valid_from'], load=None)
+        return {(p['product_id'], p['partner_id'], p['valid_from']) for p in prices}
+
+    @instrument()
+    def _job_preview(self):
+        """Background preview of large files queued by ``action_preview``."""
+        self.ensure_one()
+        self.line_ids.unlink()
+        if self._preview_rows(csv.DictReader(self._decode_csv()), commit=True):
+            self.state = 'preview'
+
+    @instrument()
     def action_import(self):
         self.ensure_one()
-        created = updated = errors = 0
-        for line in self.line_ids:
-            if line.status != 'ok':
-                errors += 1
-                continue
-            vals = {
-                'product_id': line.product_id.id,
-                'partner_id': line.partner_id.id,
-                'price': line.price,
-                'valid_from': line.valid_from,
-                'valid_to': line.valid_to,
-                'company_id': self.env.company.id,
-            }
-            if line.action == 'update':
-                rec = self.env['vendor.price'].search([
-                    ('product_id', '=', line.product_id.id),
-                    ('partner_id', '=', line.partner_id.id),
-                    ('valid_from', '=', line.valid_from),
-                    ('company_id', '=', self.env.company.id),
-                ], limit=1)
-                if rec:
-                    rec.write(vals)
-                    updated += 1
-                else:
-                    self.env['vendor.price'].create(vals)
-                    created += 1
-            else:
-                self.env['vendor.price'].create(vals)
-                created += 1
-        self.summary = _('Created: %s\nUpdated: %s\nErrors: %s') % (created, updated, errors)
+        rows_total = len(self.line_ids)
+        if rows_total > BACKGROUND_ROW_THRESHOLD:
+            self._enqueue_job('_job_import', _('Vendor price import: %s'), rows_total)
+        else:
+            self._job_import()
+        return self._reopen()
+
+    @instrument()
+    def _job_import(self):
+        """Create and update the vendor prices of the previewed lines.
+
+        In the background job, every upsert batch is committed with its progress.
+        """
+        self.ensure_one()
+        lines = self.line_ids.read(
+            ['status', 'product_id', 'partner_id', 'currency_id', 'price', 'valid_from', 'valid_to'], load=None)
+        vals_list = [{
+            'product_id': line['product_id'],
+            'partner_id': line['partner_id'],
+            'currency_id': line['currency_id'] or self.company_id.currency_id.id,
+            'price': line['price'],
+            'valid_from': line['valid_from'],
+            'valid_to': line['valid_to'],
+            'company_id': self.company_id.id,
+        } for line in lines if line['status'] == 'ok']
+        errors = len(lines) - len(vals_list)
+        result = self.env['vendor.price']._upsert_prices(vals_list, commit=True)
+        errors += len(result['errors'])
+        summary = _('Created: %s\nUpdated: %s\nDuplicates (superseded by a later row): %s\nErrors: %s') % (
+            result['created'], result['updated'], result['duplicates'], errors)
+        if result['cancelled']:
+            # Stopped by the user, who is back on the upload step; the batches written are kept
+            self.summary = _('Import stopped. Written before stopping:\n%s') % summary
+            return
+        self.summary = summary
         self.state = 'done'
-        return {
-            'type': 'ir.actions.act_window',
-            'res_model': 'vpt.csv.import.wizard',
-            'res_id': self.id,
-            'view_mode': 'form',
-            'target': 'new',
-        }
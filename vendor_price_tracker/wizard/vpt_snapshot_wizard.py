@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+from odoo import fields, models, _
+from odoo.exceptions import UserError
+from odoo.addons.base_tools_lite.tools import instrument
+
+# Products rendered per PDF chunk in the background
+SNAPSHOT_CHUNK_SIZE = 100
+# Selections above this size are rendered by a background job
+SNAPSHOT_BACKGROUND_THRESHOLD = 200
+
+
+class VptSnapshotWizard(models.TransientModel):
+    _name = 'vpt.snapshot.wizard'
+    _description = 'Vendor Price Snapshot Wizard'
+
+    date = fields.Date(string='As of', required=True, default=fields.Date.context_today)
+    product_ids = fields.Many2many('product.product', string='Products',
+                                   default=lambda self: self._default_product_ids())
+    categ_id = fields.Many2one('product.category', string='Product Category',
+                               help='Print all products of this category (including subcategories) in addition to the selected ones.')
+
+    def _default_product_ids(self):
+        if self.env.context.get('active_model') == 'product.product':
+            return self.env.context.get('active_ids', [])
+        return []
+
+    def _get_products(self):
+        self.ensure_one()
+        products = self.product_ids
+        if self.categ_id:
+            products |= self.env['product.product'].search([('categ_id', 'child_of', self.categ_id.id)])
+        return products
+
+    @instrument()
+    def action_print(self):
+        """Print the snapshot, or render large selections in chunks in a background job."""
+        self.ensure_one()
+        products = self._get_products()
+        if not products:
+            raise UserError(_('Select at least one product or a category.'))
+        date = fields.Date.to_string(self.date)
+        if len(products) <= SNAPSHOT_BACKGROUND_THRESHOLD:
+            return self.env.ref('vendor_price_tracker.report_vendor_price_snapshot_action').report_action(
+                products, data={'date': date})
+        job = self.env['bg.job']._enqueue(
+            products, '_vpt_render_snapshot',
+            name=_('Vendor Price Snapshot %s (%s products)') % (date, len(products)),
+            kwargs={'date': date},
+            chunk_size=SNAPSHOT_CHUNK_SIZE,
+            result_type='pdf',
+            result_name=_('Vendor Price Snapshot %s.pdf') % date,
+        )
+        return job._action_open()